@@ -0,0 +1,31 @@
+"""foreign key indexes
+
+Revision ID: 0835ae1524b5
+Revises: 953a3e3ce5ac
+Create Date: 2026-10-18 11:02:17.881402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0835ae1524b5'
+down_revision = '953a3e3ce5ac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_mall_account_id'), 'mall', ['account_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_unit_mall_id'), 'unit', ['mall_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_unit_mall_id'), table_name='unit', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_mall_account_id'), table_name='mall', postgresql_concurrently=True)
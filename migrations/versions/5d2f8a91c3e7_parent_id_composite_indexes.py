@@ -0,0 +1,38 @@
+"""parent id composite indexes
+
+Revision ID: 5d2f8a91c3e7
+Revises: 0835ae1524b5
+Create Date: 2026-10-18 14:58:06.214937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8a91c3e7'
+down_revision = '0835ae1524b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (parent_id, id) serves the parent's pages in id order and still covers the foreign key lookups,
+    # so the single-column indexes are dropped once their replacements exist
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_mall_account_id_id'), 'mall', ['account_id', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_unit_mall_id_id'), 'unit', ['mall_id', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index(op.f('ix_unit_mall_id'), table_name='unit', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_mall_account_id'), table_name='mall', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_mall_account_id'), 'mall', ['account_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_unit_mall_id'), 'unit', ['mall_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index(op.f('ix_unit_mall_id_id'), table_name='unit', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_mall_account_id_id'), table_name='mall', postgresql_concurrently=True)
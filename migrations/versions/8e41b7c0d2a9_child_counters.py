@@ -0,0 +1,96 @@
+"""child counters
+
+Revision ID: 8e41b7c0d2a9
+Revises: 5d2f8a91c3e7
+Create Date: 2026-10-18 15:31:44.610285
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41b7c0d2a9'
+down_revision = '5d2f8a91c3e7'
+branch_labels = None
+depends_on = None
+
+
+COUNTERS = (
+    {'table': 'mall', 'foreign_key': 'account_id', 'parent': 'account', 'counter': 'mall_count'},
+    {'table': 'unit', 'foreign_key': 'mall_id', 'parent': 'mall', 'counter': 'unit_count'},
+)
+
+CHILD_COUNT_FUNCTION = '''
+CREATE OR REPLACE FUNCTION {parent}_{counter}_refresh() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Lock the parents in id order first, statements touching several of them could deadlock otherwise
+        PERFORM FROM {parent} WHERE id IN (SELECT {foreign_key} FROM new_rows) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {parent}.{counter} + delta.n
+        FROM (SELECT {foreign_key} AS id, count(*) AS n FROM new_rows GROUP BY {foreign_key}) AS delta
+        WHERE {parent}.id = delta.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM FROM {parent} WHERE id IN (SELECT {foreign_key} FROM old_rows) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {parent}.{counter} - delta.n
+        FROM (SELECT {foreign_key} AS id, count(*) AS n FROM old_rows GROUP BY {foreign_key}) AS delta
+        WHERE {parent}.id = delta.id;
+    ELSE
+        -- Fired per row, and only for rows moved to another parent
+        PERFORM FROM {parent} WHERE id IN (OLD.{foreign_key}, NEW.{foreign_key}) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {counter} + CASE WHEN id = NEW.{foreign_key} THEN 1 ELSE -1 END
+        WHERE id IN (OLD.{foreign_key}, NEW.{foreign_key});
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+'''
+
+CHILD_COUNT_TRIGGERS = '''
+CREATE TRIGGER {table}_{counter}_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {parent}_{counter}_refresh();
+CREATE TRIGGER {table}_{counter}_move AFTER UPDATE OF {foreign_key} ON {table}
+    FOR EACH ROW WHEN (OLD.{foreign_key} IS DISTINCT FROM NEW.{foreign_key})
+    EXECUTE FUNCTION {parent}_{counter}_refresh();
+CREATE TRIGGER {table}_{counter}_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {parent}_{counter}_refresh();
+'''
+
+
+def upgrade():
+    # A constant default is stored in the catalog, existing rows are not rewritten
+    op.add_column('account', sa.Column('mall_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('mall', sa.Column('unit_count', sa.Integer(), server_default='0', nullable=False))
+
+    for ddl in COUNTERS:
+        # Lock out writers so the seeded counts and the triggers start from the same snapshot
+        op.execute('LOCK TABLE {table} IN SHARE MODE'.format(**ddl))
+        op.execute((CHILD_COUNT_FUNCTION + CHILD_COUNT_TRIGGERS).format(**ddl))
+        op.execute('''
+        UPDATE {parent} SET {counter} = counts.n
+        FROM (SELECT {foreign_key} AS id, count(*) AS n FROM {table} GROUP BY {foreign_key}) AS counts
+        WHERE {parent}.id = counts.id
+        '''.format(**ddl))
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_account_mall_count_id'), 'account', ['mall_count', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_mall_unit_count_id'), 'mall', ['unit_count', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_mall_unit_count_id'), table_name='mall', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_account_mall_count_id'), table_name='account', postgresql_concurrently=True)
+
+    for ddl in COUNTERS:
+        for operation in ('insert', 'move', 'delete'):
+            op.execute('DROP TRIGGER IF EXISTS {table}_{counter}_{operation} ON {table}'.format(
+                operation=operation, **ddl
+            ))
+        op.execute('DROP FUNCTION IF EXISTS {parent}_{counter}_refresh()'.format(**ddl))
+
+    op.drop_column('mall', 'unit_count')
+    op.drop_column('account', 'mall_count')
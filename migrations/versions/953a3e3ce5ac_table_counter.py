@@ -0,0 +1,82 @@
+"""table counter
+
+Revision ID: 953a3e3ce5ac
+Revises: ac7779fcbd36
+Create Date: 2026-10-18 10:12:41.503912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '953a3e3ce5ac'
+down_revision = 'ac7779fcbd36'
+branch_labels = None
+depends_on = None
+
+
+TRACKED_TABLES = ('account', 'mall', 'unit')
+
+
+def upgrade():
+    op.create_table('table_counter',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_table_counter_table_name'), 'table_counter', ['table_name'], unique=False)
+    # Writers append one delta row per statement and never update a shared row, so they don't queue on it
+    op.execute('''
+    CREATE OR REPLACE FUNCTION table_counter_refresh() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO table_counter (table_name, row_count)
+            SELECT TG_TABLE_NAME, count(*) FROM new_rows HAVING count(*) > 0;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO table_counter (table_name, row_count)
+            SELECT TG_TABLE_NAME, -count(*) FROM old_rows HAVING count(*) > 0;
+        ELSE
+            -- TRUNCATE: a compaction folding the deltas concurrently would otherwise re-add them
+            PERFORM pg_advisory_xact_lock('table_counter'::regclass::oid::bigint);
+            DELETE FROM table_counter WHERE table_name = TG_TABLE_NAME;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    ''')
+    op.execute('''
+    CREATE OR REPLACE FUNCTION table_counter_compact() RETURNS void AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock('table_counter'::regclass::oid::bigint);
+        -- Only committed deltas are folded, those of transactions still writing stay as they are
+        WITH deltas AS (DELETE FROM table_counter RETURNING table_name, row_count)
+        INSERT INTO table_counter (table_name, row_count)
+        SELECT table_name, sum(row_count) FROM deltas GROUP BY table_name;
+    END
+    $$ LANGUAGE plpgsql
+    ''')
+    for table in TRACKED_TABLES:
+        # Lock out writers so the seeded count and the triggers start from the same snapshot
+        op.execute(f'LOCK TABLE {table} IN SHARE MODE')
+        op.execute(f'''
+        CREATE TRIGGER {table}_counter_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+        CREATE TRIGGER {table}_counter_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+        CREATE TRIGGER {table}_counter_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+        INSERT INTO table_counter (table_name, row_count) SELECT '{table}', count(*) FROM {table};
+        ''')
+
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_counter_truncate ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_counter_delete ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_counter_insert ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS table_counter_compact()')
+    op.execute('DROP FUNCTION IF EXISTS table_counter_refresh()')
+    op.drop_index(op.f('ix_table_counter_table_name'), table_name='table_counter')
+    op.drop_table('table_counter')
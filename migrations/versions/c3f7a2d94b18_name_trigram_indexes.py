@@ -0,0 +1,37 @@
+"""name trigram indexes
+
+Revision ID: c3f7a2d94b18
+Revises: 8e41b7c0d2a9
+Create Date: 2026-10-18 16:42:09.381527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a2d94b18'
+down_revision = '8e41b7c0d2a9'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('account', 'mall', 'unit')
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(op.f(f'ix_{table}_name_trgm'), table, ['name'], unique=False,
+                            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    # The extension is left installed: other objects of the database may depend on it
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.drop_index(op.f(f'ix_{table}_name_trgm'), table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,54 @@
+from injector import Injector
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.routing import Route
+
+from api.aio.dependency_injection import AsyncSQLAlchemyModule
+from api.aio.endpoints import RequestArgsException, app_exception_handler, request_args_exception_handler
+from api.aio.replicas import StickToPrimaryMiddleware
+from api.aio.routes.account import AccountsResource, AccountResource
+from api.aio.routes.mall import AccountMallsResource, MallsResource, MallResource
+from api.aio.routes.unit import MallUnitsResource, UnitsResource, UnitResource
+from api.config import DefaultConfig, get_async_database_uri, get_async_engine_options, get_replica_uris
+from api.exceptions import AppException
+
+
+def create_asgi_app(
+    config_class=DefaultConfig,
+) -> Starlette:
+    """ASGI counterpart of `create_app` serving the account, mall and unit resources on an asyncpg engine"""
+    config = {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+
+    # Requests hold a pooled connection only while they await the database, so one process keeps many in flight
+    engine = create_async_engine(get_async_database_uri(config), **get_async_engine_options(config))
+    # Same SQLALCHEMY_REPLICA_URIS as the WSGI app, switched to the asyncpg driver
+    replicas = [
+        create_async_engine(
+            get_async_database_uri({'SQLALCHEMY_DATABASE_URI': uri}), **get_async_engine_options(config)
+        )
+        for uri in get_replica_uris(config)
+    ]
+
+    app = Starlette(
+        routes=[
+            Route('/api/accounts/', AccountsResource),
+            Route('/api/accounts/{account_id:int}', AccountResource),
+            Route('/api/accounts/{account_id:int}/malls', AccountMallsResource),
+            Route('/api/malls/', MallsResource),
+            Route('/api/malls/{mall_id:int}', MallResource),
+            Route('/api/malls/{mall_id:int}/units', MallUnitsResource),
+            Route('/api/units/', UnitsResource),
+            Route('/api/units/{unit_id:int}', UnitResource),
+        ],
+        exception_handlers={
+            AppException: app_exception_handler,
+            RequestArgsException: request_args_exception_handler,
+        },
+        middleware=[Middleware(StickToPrimaryMiddleware)] if replicas else [],
+        on_shutdown=[engine.dispose, *(replica.dispose for replica in replicas)],
+    )
+    app.state.config = config
+    app.state.injector = Injector([AsyncSQLAlchemyModule(engine=engine, replicas=replicas)])
+
+    return app
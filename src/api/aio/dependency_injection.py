@@ -0,0 +1,33 @@
+from typing import Sequence
+
+from injector import Binder, Module, singleton
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from api.aio.repositories.account import AccountRepository
+from api.aio.repositories.mall import MallRepository
+from api.aio.repositories.unit import UnitRepository
+from api.aio.services.account import AccountService
+from api.aio.services.mall import MallService
+from api.aio.services.unit import UnitService
+from api.utils.replicas import RoutingSession
+
+
+class AsyncSQLAlchemyModule(Module):
+    def __init__(self, engine: AsyncEngine, replicas: Sequence[AsyncEngine] = ()):
+        self.engine = engine
+        self.replicas = replicas
+
+    def configure(self, binder: Binder):
+        # RoutingSession picks the bind of the Session behind each AsyncSession, so it is given the sync engines
+        session = sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            replicas=[replica.sync_engine for replica in self.replicas],
+            expire_on_commit=False
+        )
+        binder.bind(interface=sessionmaker, to=session, scope=singleton)
+
+        for interface in (AccountService, AccountRepository, MallService, MallRepository, UnitService, UnitRepository):
+            binder.bind(interface=interface, to=interface, scope=singleton)
@@ -0,0 +1,67 @@
+import json
+from http import HTTPStatus
+
+from marshmallow import EXCLUDE, Schema, ValidationError
+from starlette.endpoints import HTTPEndpoint
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from api.exceptions import AppException
+
+
+class RequestArgsException(Exception):
+    """Invalid request arguments, answered in the same `{'errors': {location: messages}}` shape as webargs"""
+
+    http_code = HTTPStatus.UNPROCESSABLE_ENTITY
+
+    def __init__(self, location: str, messages, http_code: int = None):
+        self.location = location
+        self.messages = messages
+        self.http_code = http_code or self.http_code
+
+
+class ServiceEndpoint(HTTPEndpoint):
+    """HTTPEndpoint whose `service` is resolved from the app's injector"""
+
+    service_class = None
+
+    @property
+    def service(self):
+        return self.scope['app'].state.injector.get(self.service_class)
+
+
+async def json_args(request: Request, schema: Schema) -> dict:
+    body = await request.body()
+
+    try:
+        # An empty body loads like webargs does, as an empty object
+        data = json.loads(body) if body else {}
+    except ValueError:
+        raise RequestArgsException('json', ['Invalid JSON body.'], HTTPStatus.BAD_REQUEST)
+
+    try:
+        return schema.load(data)
+    except ValidationError as e:
+        raise RequestArgsException('json', e.messages)
+
+
+def query_args(request: Request, schema: Schema) -> dict:
+    try:
+        return schema.load(dict(request.query_params), unknown=EXCLUDE)
+    except ValidationError as e:
+        raise RequestArgsException('querystring', e.messages)
+
+
+def serialize_response(schema: Schema, result, code: int, empty_code: int = None) -> Response:
+    if schema is not None and result is not None:
+        return JSONResponse(schema.dump(result), code)
+
+    return Response(status_code=empty_code or code)
+
+
+async def app_exception_handler(request: Request, exception: AppException) -> Response:
+    return JSONResponse({'error': str(exception)}, exception.http_code)
+
+
+async def request_args_exception_handler(request: Request, exception: RequestArgsException) -> Response:
+    return JSONResponse({'errors': {exception.location: exception.messages}}, exception.http_code)
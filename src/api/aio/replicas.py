@@ -0,0 +1,31 @@
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api.utils.replicas import (
+    parse_sticky_cookie,
+    sticky_until,
+    DEFAULT_STICKY_SECONDS,
+    STICKY_COOKIE,
+    WRITE_METHODS
+)
+
+
+class StickToPrimaryMiddleware(BaseHTTPMiddleware):
+    """ASGI counterpart of `stick_to_primary`: reads and renews the client's sticky window around each request"""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        # Read by RoutingSession.get_bind through `is_sticky_to_primary` while the endpoint awaits the database
+        token = sticky_until.set(parse_sticky_cookie(request.cookies.get(STICKY_COOKIE)))
+        try:
+            response = await call_next(request)
+        finally:
+            sticky_until.reset(token)
+
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            seconds = int(request.app.state.config.get('REPLICA_STICKY_SECONDS') or DEFAULT_STICKY_SECONDS)
+            response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True)
+
+        return response
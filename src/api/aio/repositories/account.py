@@ -0,0 +1,92 @@
+from typing import List, Tuple, Union
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from injector import inject
+
+from api.exceptions import DoesNotExistException
+from api.models.account import Account
+from api.queries import account as queries
+from api.utils.counting import count_rows_async, COUNT_EXACT
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only_async
+
+
+account_table = Account.__table__
+
+
+class AccountRepository:
+    """AccountRepository counterpart on AsyncSession for the ASGI stack"""
+
+    @inject
+    def __init__(
+        self,
+        session: sessionmaker,
+    ):
+        self._session = session
+
+    async def create(self, data: dict) -> Account:
+        account = Account(
+            name=data['name'],
+        )
+
+        try:
+            async with self._session.begin() as session:
+                session.add(account)
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Account already exists!')
+
+        return account
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, sort, q)
+
+        async with read_only_async(self._session) as session:
+            accounts = (await session.execute(statement)).all()
+            total, total_kind = await count_rows_async(session, Account, count, counter, matching)
+
+        return queries.list_result(accounts, total, total_kind, page, per_page, cursor, sort, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        async with read_only_async(self._session) as session:
+            accounts = (await session.execute(queries.many_statement(ids, names))).all()
+
+        return queries.many_result(accounts, ids, names)
+
+    async def update(self, account_id: int, data: dict) -> bool:
+        try:
+            async with self._session.begin() as session:
+                result = await session.execute(
+                    update(account_table).where(account_table.c.id == account_id).values(**data)
+                )
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Account already exists!')
+
+        return bool(result.rowcount)
+
+    async def delete(self, account_id: int) -> bool:
+        async with self._session.begin() as session:
+            result = await session.execute(delete(account_table).where(account_table.c.id == account_id))
+
+        return bool(result.rowcount)
+
+    async def get(self, account_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        async with read_only_async(self._session) as session:
+            account = (await session.execute(queries.get_statement(account_id))).first()
+            if not account:
+                raise DoesNotExistException('Account does not exist!')
+
+            malls = (
+                await session.execute(queries.children_statement(account_id, children_limit, children_cursor))
+            ).all()
+
+        return queries.get_result(account, malls, children_limit)
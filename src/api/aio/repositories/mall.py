@@ -0,0 +1,94 @@
+from typing import List, Tuple, Union
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from injector import inject
+
+from api.exceptions import DoesNotExistException
+from api.models.mall import Mall
+from api.queries import mall as queries
+from api.utils.counting import count_rows_async, COUNT_EXACT
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only_async
+
+
+mall_table = Mall.__table__
+
+
+class MallRepository:
+    """MallRepository counterpart on AsyncSession for the ASGI stack"""
+
+    @inject
+    def __init__(
+        self,
+        session: sessionmaker,
+    ):
+        self._session = session
+
+    async def create(self, data: dict) -> Mall:
+        mall = Mall(
+            name=data['name'],
+            account_id=data['account_id']
+        )
+
+        try:
+            async with self._session.begin() as session:
+                session.add(mall)
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Mall already exists!', 'Account does not exist!')
+
+        return mall
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        account_id: int = None,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, account_id, sort, q)
+
+        async with read_only_async(self._session) as session:
+            malls = (await session.execute(statement)).all()
+            total, total_kind = await count_rows_async(session, Mall, count, counter, matching)
+
+        return queries.list_result(malls, total, total_kind, page, per_page, cursor, sort, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        async with read_only_async(self._session) as session:
+            malls = (await session.execute(queries.many_statement(ids, names))).all()
+
+        return queries.many_result(malls, ids, names)
+
+    async def update(self, mall_id: int, data: dict) -> bool:
+        try:
+            async with self._session.begin() as session:
+                result = await session.execute(
+                    update(mall_table).where(mall_table.c.id == mall_id).values(**data)
+                )
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Mall already exists!', 'Account does not exist!')
+
+        return bool(result.rowcount)
+
+    async def delete(self, mall_id: int) -> bool:
+        async with self._session.begin() as session:
+            result = await session.execute(delete(mall_table).where(mall_table.c.id == mall_id))
+
+        return bool(result.rowcount)
+
+    async def get(self, mall_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        async with read_only_async(self._session) as session:
+            mall = (await session.execute(queries.get_statement(mall_id))).first()
+            if not mall:
+                raise DoesNotExistException('Mall does not exist!')
+
+            units = (
+                await session.execute(queries.children_statement(mall_id, children_limit, children_cursor))
+            ).all()
+
+        return queries.get_result(mall, units, children_limit)
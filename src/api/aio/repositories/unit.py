@@ -0,0 +1,91 @@
+from typing import List
+
+from sqlalchemy import delete, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from injector import inject
+
+from api.exceptions import DoesNotExistException
+from api.models.unit import Unit
+from api.queries import unit as queries
+from api.utils.counting import count_rows_async, COUNT_EXACT
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only_async
+
+
+unit_table = Unit.__table__
+
+
+class UnitRepository:
+    """UnitRepository counterpart on AsyncSession for the ASGI stack"""
+
+    @inject
+    def __init__(
+        self,
+        session: sessionmaker,
+    ):
+        self._session = session
+
+    async def create(self, data: dict) -> Unit:
+        unit = Unit(
+            name=data['name'],
+            mall_id=data['mall_id']
+        )
+
+        try:
+            async with self._session.begin() as session:
+                session.add(unit)
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Unit already exists!', 'Mall does not exist!')
+
+        return unit
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: int = None,
+        count: str = COUNT_EXACT,
+        mall_id: int = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, mall_id, q)
+
+        async with read_only_async(self._session) as session:
+            units = (await session.execute(statement)).all()
+            total, total_kind = await count_rows_async(session, Unit, count, counter, matching)
+
+        return queries.list_result(units, total, total_kind, page, per_page, cursor, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        async with read_only_async(self._session) as session:
+            units = (await session.execute(queries.many_statement(ids, names))).all()
+
+        return queries.many_result(units, ids, names)
+
+    async def update(self, unit_id: int, data: dict) -> bool:
+        try:
+            async with self._session.begin() as session:
+                result = await session.execute(
+                    update(unit_table).where(unit_table.c.id == unit_id).values(**data)
+                )
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Unit already exists!', 'Mall does not exist!')
+
+        return bool(result.rowcount)
+
+    async def delete(self, unit_id: int) -> bool:
+        async with self._session.begin() as session:
+            result = await session.execute(delete(unit_table).where(unit_table.c.id == unit_id))
+
+        return bool(result.rowcount)
+
+    async def get(self, unit_id: int) -> Row:
+        async with read_only_async(self._session) as session:
+            unit = (await session.execute(queries.get_statement(unit_id))).first()
+
+        if not unit:
+            raise DoesNotExistException('Unit does not exist!')
+
+        return unit
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+from starlette.requests import Request
+
+from api.aio.endpoints import ServiceEndpoint, json_args, query_args, serialize_response
+from api.aio.services.account import AccountService
+from api.schemas.base import ChildrenArgsSchema, MultiGetArgsSchema
+from api.utils.counting import COUNT_EXACT
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.schemas.account import (
+    AccountCreateSchema,
+    AccountUpdateSchema,
+    AccountRetrieveSchema,
+    AccountListSchema,
+    AccountMultiGetSchema
+)
+
+
+class AccountsResource(ServiceEndpoint):
+    service_class = AccountService
+
+    create_schema = AccountCreateSchema()
+    list_schema = AccountListSchema()
+    multi_get_args_schema = MultiGetArgsSchema()
+    multi_get_schema = AccountMultiGetSchema()
+
+    async def post(self, request: Request):
+        account = await json_args(request, self.create_schema)
+
+        return serialize_response(self.create_schema, await self.service.create(account), HTTPStatus.CREATED)
+
+    async def get(self, request: Request):
+        if any(key in request.query_params for key in MULTI_GET_KEYS):
+            return await self.get_many(request)
+
+        args = {
+            'page': 1, 'per_page': 20, 'cursor': None, 'count': COUNT_EXACT, 'sort': None, 'q': None,
+            **query_args(request, self.list_schema)
+        }
+
+        return serialize_response(
+            self.list_schema,
+            await self.service.get_list(
+                args['page'], args['per_page'], args['cursor'], args['count'], args['sort'], args['q']
+            ),
+            HTTPStatus.OK
+        )
+
+    async def get_many(self, request: Request):
+        args = {'ids': None, 'names': None, **query_args(request, self.multi_get_args_schema)}
+
+        return serialize_response(
+            self.multi_get_schema, await self.service.get_many(args['ids'], args['names']), HTTPStatus.OK
+        )
+
+
+class AccountResource(ServiceEndpoint):
+    service_class = AccountService
+
+    update_schema = AccountUpdateSchema()
+    retrieve_schema = AccountRetrieveSchema()
+    children_schema = ChildrenArgsSchema()
+
+    async def patch(self, request: Request):
+        account = await json_args(request, self.update_schema)
+        await self.service.update(request.path_params['account_id'], account)
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def delete(self, request: Request):
+        await self.service.delete(request.path_params['account_id'])
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def get(self, request: Request):
+        args = {'children_limit': 20, 'children_cursor': None, **query_args(request, self.children_schema)}
+
+        return serialize_response(
+            self.retrieve_schema,
+            await self.service.get(request.path_params['account_id'], args['children_limit'], args['children_cursor']),
+            HTTPStatus.OK
+        )
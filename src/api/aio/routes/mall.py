@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+from starlette.requests import Request
+
+from api.aio.endpoints import ServiceEndpoint, json_args, query_args, serialize_response
+from api.aio.services.mall import MallService
+from api.schemas.base import ChildrenArgsSchema, MultiGetArgsSchema
+from api.utils.counting import COUNT_EXACT
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.schemas.mall import (
+    MallCreateSchema,
+    MallUpdateSchema,
+    MallRetrieveSchema,
+    MallListSchema,
+    MallMultiGetSchema
+)
+
+
+class MallsResource(ServiceEndpoint):
+    service_class = MallService
+
+    create_schema = MallCreateSchema()
+    list_schema = MallListSchema()
+    multi_get_args_schema = MultiGetArgsSchema()
+    multi_get_schema = MallMultiGetSchema()
+
+    async def post(self, request: Request):
+        mall = await json_args(request, self.create_schema)
+
+        return serialize_response(self.create_schema, await self.service.create(mall), HTTPStatus.CREATED)
+
+    async def get(self, request: Request):
+        if any(key in request.query_params for key in MULTI_GET_KEYS):
+            return await self.get_many(request)
+
+        args = {
+            'page': 1, 'per_page': 20, 'cursor': None, 'count': COUNT_EXACT, 'account_id': None, 'sort': None,
+            'q': None,
+            **query_args(request, self.list_schema)
+        }
+
+        return serialize_response(
+            self.list_schema,
+            await self.service.get_list(
+                args['page'], args['per_page'], args['cursor'], args['count'], args['account_id'], args['sort'],
+                args['q']
+            ),
+            HTTPStatus.OK
+        )
+
+    async def get_many(self, request: Request):
+        args = {'ids': None, 'names': None, **query_args(request, self.multi_get_args_schema)}
+
+        return serialize_response(
+            self.multi_get_schema, await self.service.get_many(args['ids'], args['names']), HTTPStatus.OK
+        )
+
+
+class AccountMallsResource(ServiceEndpoint):
+    service_class = MallService
+
+    list_schema = MallListSchema(exclude=('account_id',))
+
+    async def get(self, request: Request):
+        args = {
+            'page': 1, 'per_page': 20, 'cursor': None, 'count': COUNT_EXACT, 'sort': None, 'q': None,
+            **query_args(request, self.list_schema)
+        }
+
+        return serialize_response(
+            self.list_schema,
+            await self.service.get_list(
+                args['page'], args['per_page'], args['cursor'], args['count'], request.path_params['account_id'],
+                args['sort'], args['q']
+            ),
+            HTTPStatus.OK
+        )
+
+
+class MallResource(ServiceEndpoint):
+    service_class = MallService
+
+    update_schema = MallUpdateSchema()
+    retrieve_schema = MallRetrieveSchema()
+    children_schema = ChildrenArgsSchema()
+
+    async def patch(self, request: Request):
+        mall = await json_args(request, self.update_schema)
+        await self.service.update(request.path_params['mall_id'], mall)
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def delete(self, request: Request):
+        await self.service.delete(request.path_params['mall_id'])
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def get(self, request: Request):
+        args = {'children_limit': 20, 'children_cursor': None, **query_args(request, self.children_schema)}
+
+        return serialize_response(
+            self.retrieve_schema,
+            await self.service.get(request.path_params['mall_id'], args['children_limit'], args['children_cursor']),
+            HTTPStatus.OK
+        )
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+from starlette.requests import Request
+
+from api.aio.endpoints import ServiceEndpoint, json_args, query_args, serialize_response
+from api.aio.services.unit import UnitService
+from api.schemas.base import MultiGetArgsSchema
+from api.utils.counting import COUNT_EXACT
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.schemas.unit import (
+    UnitCreateSchema,
+    UnitUpdateSchema,
+    UnitRetrieveSchema,
+    UnitListSchema,
+    UnitMultiGetSchema
+)
+
+
+class UnitsResource(ServiceEndpoint):
+    service_class = UnitService
+
+    create_schema = UnitCreateSchema()
+    list_schema = UnitListSchema()
+    multi_get_args_schema = MultiGetArgsSchema()
+    multi_get_schema = UnitMultiGetSchema()
+
+    async def post(self, request: Request):
+        unit = await json_args(request, self.create_schema)
+
+        return serialize_response(self.create_schema, await self.service.create(unit), HTTPStatus.CREATED)
+
+    async def get(self, request: Request):
+        if any(key in request.query_params for key in MULTI_GET_KEYS):
+            return await self.get_many(request)
+
+        args = {
+            'page': 1, 'per_page': 20, 'cursor': None, 'count': COUNT_EXACT, 'mall_id': None, 'q': None,
+            **query_args(request, self.list_schema)
+        }
+
+        return serialize_response(
+            self.list_schema,
+            await self.service.get_list(
+                args['page'], args['per_page'], args['cursor'], args['count'], args['mall_id'], args['q']
+            ),
+            HTTPStatus.OK
+        )
+
+    async def get_many(self, request: Request):
+        args = {'ids': None, 'names': None, **query_args(request, self.multi_get_args_schema)}
+
+        return serialize_response(
+            self.multi_get_schema, await self.service.get_many(args['ids'], args['names']), HTTPStatus.OK
+        )
+
+
+class MallUnitsResource(ServiceEndpoint):
+    service_class = UnitService
+
+    list_schema = UnitListSchema(exclude=('mall_id',))
+
+    async def get(self, request: Request):
+        args = {
+            'page': 1, 'per_page': 20, 'cursor': None, 'count': COUNT_EXACT, 'q': None,
+            **query_args(request, self.list_schema)
+        }
+
+        return serialize_response(
+            self.list_schema,
+            await self.service.get_list(
+                args['page'], args['per_page'], args['cursor'], args['count'], request.path_params['mall_id'],
+                args['q']
+            ),
+            HTTPStatus.OK
+        )
+
+
+class UnitResource(ServiceEndpoint):
+    service_class = UnitService
+
+    update_schema = UnitUpdateSchema()
+    retrieve_schema = UnitRetrieveSchema()
+
+    async def patch(self, request: Request):
+        unit = await json_args(request, self.update_schema)
+        await self.service.update(request.path_params['unit_id'], unit)
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def delete(self, request: Request):
+        await self.service.delete(request.path_params['unit_id'])
+
+        return serialize_response(None, None, HTTPStatus.NO_CONTENT)
+
+    async def get(self, request: Request):
+        return serialize_response(
+            self.retrieve_schema, await self.service.get(request.path_params['unit_id']), HTTPStatus.OK
+        )
@@ -0,0 +1,42 @@
+from typing import List, Tuple, Union
+
+from injector import inject
+
+from api.aio.repositories.account import AccountRepository
+from api.utils.counting import COUNT_EXACT
+from api.models.account import Account
+
+
+class AccountService:
+    @inject
+    def __init__(
+        self,
+        account_repository: AccountRepository
+    ):
+        self._account_repository = account_repository
+
+    async def create(self, data: dict) -> Account:
+        return await self._account_repository.create(data)
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        return await self._account_repository.get_list(page, per_page, cursor, count, sort, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return await self._account_repository.get_many(ids, names)
+
+    async def get(self, account_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        return await self._account_repository.get(account_id, children_limit, children_cursor)
+
+    async def update(self, account_id: int, data: dict) -> bool:
+        return await self._account_repository.update(account_id, data)
+
+    async def delete(self, account_id: int) -> bool:
+        return await self._account_repository.delete(account_id)
@@ -0,0 +1,43 @@
+from typing import List, Tuple, Union
+
+from injector import inject
+
+from api.aio.repositories.mall import MallRepository
+from api.utils.counting import COUNT_EXACT
+from api.models.mall import Mall
+
+
+class MallService:
+    @inject
+    def __init__(
+        self,
+        mall_repository: MallRepository
+    ):
+        self._mall_repository = mall_repository
+
+    async def create(self, data: dict) -> Mall:
+        return await self._mall_repository.create(data)
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        account_id: int = None,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        return await self._mall_repository.get_list(page, per_page, cursor, count, account_id, sort, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return await self._mall_repository.get_many(ids, names)
+
+    async def get(self, mall_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        return await self._mall_repository.get(mall_id, children_limit, children_cursor)
+
+    async def update(self, mall_id: int, data: dict) -> bool:
+        return await self._mall_repository.update(mall_id, data)
+
+    async def delete(self, mall_id: int) -> bool:
+        return await self._mall_repository.delete(mall_id)
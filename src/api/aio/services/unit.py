@@ -0,0 +1,43 @@
+from typing import List
+
+from injector import inject
+from sqlalchemy.engine import Row
+
+from api.aio.repositories.unit import UnitRepository
+from api.utils.counting import COUNT_EXACT
+from api.models.unit import Unit
+
+
+class UnitService:
+    @inject
+    def __init__(
+        self,
+        unit_repository: UnitRepository
+    ):
+        self._unit_repository = unit_repository
+
+    async def create(self, data: dict) -> Unit:
+        return await self._unit_repository.create(data)
+
+    async def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: int = None,
+        count: str = COUNT_EXACT,
+        mall_id: int = None,
+        q: str = None
+    ) -> dict:
+        return await self._unit_repository.get_list(page, per_page, cursor, count, mall_id, q)
+
+    async def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return await self._unit_repository.get_many(ids, names)
+
+    async def get(self, unit_id: int) -> Row:
+        return await self._unit_repository.get(unit_id)
+
+    async def update(self, unit_id: int, data: dict) -> bool:
+        return await self._unit_repository.update(unit_id, data)
+
+    async def delete(self, unit_id: int) -> bool:
+        return await self._unit_repository.delete(unit_id)
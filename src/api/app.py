@@ -1,14 +1,28 @@
 from flask import Flask
 from flask_injector import FlaskInjector
 from injector import Injector
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
 
 from api.dependency_injection import SQLAlchemyModule
 from api.exceptions import AppException, api_exception_handler, app_exception_handler
 from api.extensions import db, migrate, api
-from api.config import DefaultConfig
-from api.routes.account import AccountsResource, AccountResource, AccountsBulkResource
-from api.routes.mall import MallsResource, MallResource, MallsBulkResource
-from api.routes.unit import UnitsResource, UnitResource, UnitsBulkResource
+from api.config import DefaultConfig, get_engine_options, get_replica_uris
+from api.routes.account import (
+    AccountsResource,
+    AccountResource,
+    AccountsBulkResource,
+    AccountsExportResource,
+    AccountTreeResource
+)
+from api.routes.mall import AccountMallsResource, MallsResource, MallResource, MallsBulkResource, MallsExportResource
+from api.routes.unit import MallUnitsResource, UnitsResource, UnitResource, UnitsBulkResource, UnitsExportResource
+from api.routes.telemetry import TelemetryResource
+from api.utils.counting import compact_row_counts
+from api.utils.query_budget import QUERY_BUDGET_RAISE, QUERY_BUDGET_WARN, track_query_budgets
+from api.utils.replicas import stick_to_primary
+from api.utils.statement_cache import track_statement_cache
+from api.utils.telemetry import track_query_telemetry
 
 
 def create_app(
@@ -23,6 +37,7 @@ def create_app(
     app.errorhandler(AppException)(app_exception_handler)
 
     register_extensions(app)
+    register_commands(app)
 
     return app
 
@@ -35,18 +50,49 @@ def register_extensions(app):
     api.add_resource(AccountsResource, '/api/accounts/', endpoint='accounts')
     api.add_resource(AccountResource, '/api/accounts/<int:account_id>', endpoint='account')
     api.add_resource(AccountsBulkResource, '/api/accounts/bulk', endpoint='accounts_bulk')
+    api.add_resource(AccountsExportResource, '/api/accounts/export', endpoint='accounts_export')
+    api.add_resource(AccountTreeResource, '/api/accounts/<int:account_id>/tree', endpoint='account_tree')
+    api.add_resource(AccountMallsResource, '/api/accounts/<int:account_id>/malls', endpoint='account_malls')
 
     api.add_resource(MallsResource, '/api/malls/', endpoint='malls')
     api.add_resource(MallResource, '/api/malls/<int:mall_id>', endpoint='mall')
     api.add_resource(MallsBulkResource, '/api/malls/bulk', endpoint='malls_bulk')
+    api.add_resource(MallsExportResource, '/api/malls/export', endpoint='malls_export')
+    api.add_resource(MallUnitsResource, '/api/malls/<int:mall_id>/units', endpoint='mall_units')
 
     api.add_resource(UnitsResource, '/api/units/', endpoint='units')
     api.add_resource(UnitResource, '/api/units/<int:unit_id>', endpoint='unit')
     api.add_resource(UnitsBulkResource, '/api/units/bulk', endpoint='units_bulk')
+    api.add_resource(UnitsExportResource, '/api/units/export', endpoint='units_export')
 
+    api.add_resource(TelemetryResource, '/api/telemetry', endpoint='telemetry')
+
+    # Flask-SQLAlchemy and the repositories share one engine, so the pool settings apply to both
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(app.config)
     db.init_app(app)
     migrate.init_app(app, db)
     api.init_app(app)
 
-    injector = Injector([SQLAlchemyModule(sqlalchemy_url=app.config.get('SQLALCHEMY_DATABASE_URI'))])
+    replicas = [
+        create_engine(uri, **app.config['SQLALCHEMY_ENGINE_OPTIONS']) for uri in get_replica_uris(app.config)
+    ]
+    if replicas:
+        app.after_request(stick_to_primary)
+
+    for engine in [db.get_engine(app), *replicas]:
+        track_statement_cache(engine)
+    track_query_telemetry(app, [db.get_engine(app), *replicas])
+
+    if app.config.get('QUERY_BUDGET_MODE') in (QUERY_BUDGET_WARN, QUERY_BUDGET_RAISE):
+        track_query_budgets(app, [db.get_engine(app), *replicas])
+
+    injector = Injector([SQLAlchemyModule(engine=db.get_engine(app), replicas=replicas)])
     FlaskInjector(app=app, injector=injector)
+
+
+def register_commands(app):
+    @app.cli.command('compact-counters')
+    def compact_counters():
+        """Fold the row count deltas appended by the table_counter triggers; run it periodically, e.g. from cron"""
+        with Session(db.get_engine(app)) as session, session.begin():
+            compact_row_counts(session)
@@ -1,5 +1,17 @@
 import os
 from dotenv import load_dotenv
+from flask import current_app, has_app_context
+from sqlalchemy.pool import NullPool
+
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_RECYCLE = 1800
+DEFAULT_POOL_PRE_PING = True
+
+DB_POOLER_NONE = 'none'
+DB_POOLER_PGBOUNCER = 'pgbouncer'
 
 
 def choose_config_class():
@@ -24,10 +36,106 @@ def get_config_class(env_filename=None):
     return config_class
 
 
+def get_setting(key, default=None):
+    """Reads `key` from the running app's config, falling back to `default` when it is unset"""
+    if has_app_context():
+        value = current_app.config.get(key)
+        if value is not None:
+            return value
+
+    return default
+
+
+def get_engine_options(config) -> dict:
+    """Builds the `create_engine` pool arguments from the DB_POOL* settings of `config`
+
+    Behind a transaction pooler (DB_POOLER=pgbouncer) the pooler owns the server
+    connections: NullPool is used unless DB_POOL_SIZE asks for a small fixed pool.
+    """
+    def setting(key, default):
+        value = config.get(key)
+        return default if value is None else value
+
+    max_overflow = DEFAULT_MAX_OVERFLOW
+    if setting('DB_POOLER', DB_POOLER_NONE) == DB_POOLER_PGBOUNCER:
+        if config.get('DB_POOL_SIZE') is None:
+            return {'poolclass': NullPool}
+
+        # Never open more connections than asked for, the pooler queues the rest
+        max_overflow = 0
+
+    return {
+        'pool_size': int(setting('DB_POOL_SIZE', DEFAULT_POOL_SIZE)),
+        'max_overflow': int(setting('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': int(setting('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)),
+        'pool_recycle': int(setting('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE)),
+        'pool_pre_ping': str(setting('DB_POOL_PRE_PING', DEFAULT_POOL_PRE_PING)).lower() in ('1', 'true', 'yes'),
+    }
+
+
+def get_async_engine_options(config) -> dict:
+    """`get_engine_options` for `create_async_engine`
+
+    SQLAlchemy's asyncpg dialect prepares every statement under a name kept on
+    the server connection, which a transaction pooler hands to other clients
+    in between: the async stack is refused behind DB_POOLER=pgbouncer.
+    """
+    if config.get('DB_POOLER') == DB_POOLER_PGBOUNCER:
+        raise ValueError(
+            'The ASGI app cannot run behind a transaction pooler (DB_POOLER=pgbouncer): '
+            'connect it to PostgreSQL or a session-pooling PgBouncer and leave DB_POOLER unset'
+        )
+
+    return get_engine_options(config)
+
+
+def get_replica_uris(config) -> list:
+    """Splits the comma-separated SQLALCHEMY_REPLICA_URIS setting"""
+    uris = config.get('SQLALCHEMY_REPLICA_URIS') or ''
+    return [uri.strip() for uri in uris.split(',') if uri.strip()]
+
+
+def get_async_database_uri(config) -> str:
+    """SQLALCHEMY_ASYNC_DATABASE_URI, or SQLALCHEMY_DATABASE_URI switched to the asyncpg driver"""
+    uri = config.get('SQLALCHEMY_ASYNC_DATABASE_URI')
+    if uri:
+        return uri
+
+    scheme, rest = config.get('SQLALCHEMY_DATABASE_URI').split('://', 1)
+    if scheme.split('+')[0] in ('postgres', 'postgresql'):
+        scheme = 'postgresql+asyncpg'
+
+    return f'{scheme}://{rest}'
+
+
 class DefaultConfig:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = os.environ.get('SQLALCHEMY_TRACK_MODIFICATIONS')
-    SQLALCHEMY_RECORD_QUERIES = os.environ.get('SQLALCHEMY_RECORD_QUERIES')
+    # Statements are timed by api.utils.telemetry, Flask-SQLAlchemy need not keep them for the whole request
+    SQLALCHEMY_RECORD_QUERIES = False
+    SQLALCHEMY_REPLICA_URIS = os.environ.get('SQLALCHEMY_REPLICA_URIS')
+    SQLALCHEMY_ASYNC_DATABASE_URI = os.environ.get('SQLALCHEMY_ASYNC_DATABASE_URI')
+    REPLICA_STICKY_SECONDS = os.environ.get('REPLICA_STICKY_SECONDS')
+
+    DB_POOLER = os.environ.get('DB_POOLER')
+    DB_POOL_SIZE = os.environ.get('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = os.environ.get('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = os.environ.get('DB_POOL_TIMEOUT')
+    DB_POOL_RECYCLE = os.environ.get('DB_POOL_RECYCLE')
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING')
+
+    BULK_ANALYZE_THRESHOLD = os.environ.get('BULK_ANALYZE_THRESHOLD')
+    BULK_RETURNING_CHUNK_SIZE = os.environ.get('BULK_RETURNING_CHUNK_SIZE')
+    BULK_MAX_BODY_SIZE = os.environ.get('BULK_MAX_BODY_SIZE')
+    BULK_MAX_LINE_SIZE = os.environ.get('BULK_MAX_LINE_SIZE')
+    BULK_STREAM_CHUNK_SIZE = os.environ.get('BULK_STREAM_CHUNK_SIZE')
+    EXPORT_CHUNK_SIZE = os.environ.get('EXPORT_CHUNK_SIZE')
+    TREE_MAX_NODES = os.environ.get('TREE_MAX_NODES')
+
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE')
+    QUERY_REPEAT_THRESHOLD = os.environ.get('QUERY_REPEAT_THRESHOLD')
+    QUERY_SLOW_THRESHOLD_MS = os.environ.get('QUERY_SLOW_THRESHOLD_MS')
+    QUERY_SAMPLE_RATE = os.environ.get('QUERY_SAMPLE_RATE')
 
 
 class DevelopmentConfig(DefaultConfig):
@@ -1,17 +1,21 @@
+from typing import Sequence
+
 from injector import Binder, Module, singleton
-from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from api.services.account import AccountService
 from api.repositories.account import AccountRepository
+from api.utils.replicas import RoutingSession
 
 
 class SQLAlchemyModule(Module):
-    def __init__(self, sqlalchemy_url: str):
-        self.sqlalchemy_url = sqlalchemy_url
+    def __init__(self, engine: Engine, replicas: Sequence[Engine] = ()):
+        self.engine = engine
+        self.replicas = replicas
 
     def configure(self, binder: Binder):
-        session = sessionmaker(create_engine(self.sqlalchemy_url), expire_on_commit=False)
+        session = sessionmaker(self.engine, class_=RoutingSession, replicas=self.replicas, expire_on_commit=False)
         binder.bind(interface=sessionmaker, to=session, scope=singleton)
         binder.bind(interface=AccountService, to=AccountService, scope=singleton)
         binder.bind(interface=AccountRepository, to=AccountRepository, scope=singleton)
@@ -31,6 +31,12 @@ class AccessDeniedException(AppException):
     """Attempt to modify constant data"""
 
 
+class PayloadTooLargeException(AppException):
+    """Request body over the configured limit"""
+
+    http_code = 413
+
+
 def app_exception_handler(exception):
     http_code = exception.http_code
     r = make_response({'error': str(exception)}, http_code)
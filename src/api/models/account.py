@@ -1,13 +1,25 @@
 from api.extensions import db
+from api.models.counter import track_row_count
+from api.models.search import trigram_index
 
 
+@track_row_count
 class Account(db.Model):
+    # Sorting by the counter seeks on (mall_count, id), in either direction
+    __table_args__ = (
+        db.Index('ix_account_mall_count_id', 'mall_count', 'id'),
+        trigram_index('ix_account_name_trgm', 'name'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True)
+    # Maintained by the triggers of `track_child_count` on mall, never written by the application
+    mall_count = db.Column(db.Integer, nullable=False, server_default='0')
 
     malls = db.relationship(
         'Mall',
         back_populates='account',
         cascade='all, delete',
         passive_deletes=True,
+        lazy='raise',
     )
@@ -0,0 +1,145 @@
+from sqlalchemy import DDL, event
+
+from api.extensions import db
+
+
+class TableCounter(db.Model):
+    """Row count deltas: a table's row count is the sum of its rows here
+
+    Every writing statement appends its own delta instead of updating a shared
+    row, so concurrent writers to a table never wait on each other's counter;
+    `table_counter_compact()` folds the deltas back into one row per table.
+    """
+    id = db.Column(db.BigInteger, primary_key=True)
+    table_name = db.Column(db.String(63), nullable=False, index=True)
+    row_count = db.Column(db.BigInteger, nullable=False)
+
+
+REFRESH_FUNCTION = DDL('''
+CREATE OR REPLACE FUNCTION table_counter_refresh() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO table_counter (table_name, row_count)
+        SELECT TG_TABLE_NAME, count(*) FROM new_rows HAVING count(*) > 0;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO table_counter (table_name, row_count)
+        SELECT TG_TABLE_NAME, -count(*) FROM old_rows HAVING count(*) > 0;
+    ELSE
+        -- TRUNCATE: a compaction folding the deltas concurrently would otherwise re-add them
+        PERFORM pg_advisory_xact_lock('table_counter'::regclass::oid::bigint);
+        DELETE FROM table_counter WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+''')
+
+COMPACT_FUNCTION = DDL('''
+CREATE OR REPLACE FUNCTION table_counter_compact() RETURNS void AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock('table_counter'::regclass::oid::bigint);
+    -- Only committed deltas are folded, those of transactions still writing stay as they are
+    WITH deltas AS (DELETE FROM table_counter RETURNING table_name, row_count)
+    INSERT INTO table_counter (table_name, row_count)
+    SELECT table_name, sum(row_count) FROM deltas GROUP BY table_name;
+END
+$$ LANGUAGE plpgsql
+''')
+
+REFRESH_TRIGGERS = '''
+CREATE TRIGGER {table}_counter_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+CREATE TRIGGER {table}_counter_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+CREATE TRIGGER {table}_counter_truncate AFTER TRUNCATE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION table_counter_refresh();
+'''
+
+event.listen(db.Model.metadata, 'before_create', REFRESH_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(TableCounter.__table__, 'after_create', COMPACT_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(
+    db.Model.metadata,
+    'after_drop',
+    DDL(
+        'DROP FUNCTION IF EXISTS table_counter_refresh(); DROP FUNCTION IF EXISTS table_counter_compact()'
+    ).execute_if(dialect='postgresql')
+)
+
+
+def track_row_count(model):
+    """Keeps `model`'s row count in `table_counter` with statement-level triggers, TRUNCATE included"""
+    table = model.__table__
+    event.listen(
+        table,
+        'after_create',
+        DDL(REFRESH_TRIGGERS.format(table=table.name)).execute_if(dialect='postgresql')
+    )
+    return model
+
+
+CHILD_COUNT_FUNCTION = '''
+CREATE OR REPLACE FUNCTION {parent}_{counter}_refresh() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Lock the parents in id order first, statements touching several of them could deadlock otherwise
+        PERFORM FROM {parent} WHERE id IN (SELECT {foreign_key} FROM new_rows) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {parent}.{counter} + delta.n
+        FROM (SELECT {foreign_key} AS id, count(*) AS n FROM new_rows GROUP BY {foreign_key}) AS delta
+        WHERE {parent}.id = delta.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM FROM {parent} WHERE id IN (SELECT {foreign_key} FROM old_rows) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {parent}.{counter} - delta.n
+        FROM (SELECT {foreign_key} AS id, count(*) AS n FROM old_rows GROUP BY {foreign_key}) AS delta
+        WHERE {parent}.id = delta.id;
+    ELSE
+        -- Fired per row, and only for rows moved to another parent
+        PERFORM FROM {parent} WHERE id IN (OLD.{foreign_key}, NEW.{foreign_key}) ORDER BY id FOR NO KEY UPDATE;
+        UPDATE {parent} SET {counter} = {counter} + CASE WHEN id = NEW.{foreign_key} THEN 1 ELSE -1 END
+        WHERE id IN (OLD.{foreign_key}, NEW.{foreign_key});
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+'''
+
+CHILD_COUNT_TRIGGERS = '''
+CREATE TRIGGER {table}_{counter}_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {parent}_{counter}_refresh();
+CREATE TRIGGER {table}_{counter}_move AFTER UPDATE OF {foreign_key} ON {table}
+    FOR EACH ROW WHEN (OLD.{foreign_key} IS DISTINCT FROM NEW.{foreign_key})
+    EXECUTE FUNCTION {parent}_{counter}_refresh();
+CREATE TRIGGER {table}_{counter}_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {parent}_{counter}_refresh();
+'''
+
+
+def track_child_count(foreign_key: str, counter: str):
+    """Keeps the referenced row's `counter` column equal to the number of `model` rows pointing at it
+
+    Inserts and deletes apply one grouped UPDATE per statement, so bulk
+    inserts and cascaded deletes touch each parent once; rows moved to
+    another parent are handled one by one, renames fire nothing.
+    """
+    def decorator(model):
+        table = model.__table__
+        (reference,) = table.c[foreign_key].foreign_keys
+        ddl = {
+            'table': table.name,
+            'foreign_key': foreign_key,
+            'parent': reference.target_fullname.split('.')[0],
+            'counter': counter,
+        }
+
+        event.listen(
+            table,
+            'after_create',
+            DDL((CHILD_COUNT_FUNCTION + CHILD_COUNT_TRIGGERS).format(**ddl)).execute_if(dialect='postgresql')
+        )
+        event.listen(
+            table,
+            'after_drop',
+            DDL('DROP FUNCTION IF EXISTS {parent}_{counter}_refresh()'.format(**ddl)).execute_if(dialect='postgresql')
+        )
+        return model
+
+    return decorator
@@ -1,16 +1,31 @@
 from api.extensions import db
+from api.models.counter import track_child_count, track_row_count
+from api.models.search import trigram_index
 
 
+@track_row_count
+@track_child_count('account_id', 'mall_count')
 class Mall(db.Model):
+    # Pages of a parent's children seek on (parent_id, id), which also serves the foreign key.
+    # Sorting by the counter seeks on (unit_count, id), in either direction
+    __table_args__ = (
+        db.Index('ix_mall_account_id_id', 'account_id', 'id'),
+        db.Index('ix_mall_unit_count_id', 'unit_count', 'id'),
+        trigram_index('ix_mall_name_trgm', 'name'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True)
+    # Maintained by the triggers of `track_child_count` on unit, never written by the application
+    unit_count = db.Column(db.Integer, nullable=False, server_default='0')
 
     account_id = db.Column(db.Integer, db.ForeignKey('account.id', ondelete='CASCADE'), nullable=False)
-    account = db.relationship('Account', back_populates='malls')
+    account = db.relationship('Account', back_populates='malls', lazy='raise')
 
     units = db.relationship(
         'Unit',
         back_populates='mall',
         cascade='all, delete',
         passive_deletes=True,
+        lazy='raise',
     )
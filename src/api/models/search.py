@@ -0,0 +1,15 @@
+from sqlalchemy import DDL, event
+
+from api.extensions import db
+
+
+event.listen(
+    db.Model.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
+def trigram_index(name: str, column: str) -> db.Index:
+    """GIN index over the trigrams of `column`, serving `?q=` substring matches"""
+    return db.Index(name, column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
@@ -1,9 +1,19 @@
 from api.extensions import db
+from api.models.counter import track_child_count, track_row_count
+from api.models.search import trigram_index
 
 
+@track_row_count
+@track_child_count('mall_id', 'unit_count')
 class Unit(db.Model):
+    # Pages of a parent's children seek on (parent_id, id), which also serves the foreign key
+    __table_args__ = (
+        db.Index('ix_unit_mall_id_id', 'mall_id', 'id'),
+        trigram_index('ix_unit_name_trgm', 'name'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True)
 
     mall_id = db.Column(db.Integer, db.ForeignKey('mall.id', ondelete='CASCADE'), nullable=False)
-    mall = db.relationship('Mall', back_populates='units')
+    mall = db.relationship('Mall', back_populates='units', lazy='raise')
@@ -0,0 +1 @@
+"""Read statements and result shaping shared by the WSGI repositories and their ASGI counterparts"""
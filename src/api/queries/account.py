@@ -0,0 +1,188 @@
+from typing import List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import any_, lambda_stmt, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from api.exceptions import DoesNotExistException
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.utils.multi_get import in_requested_order
+from api.utils.search import name_matches, similarity
+from api.utils.sorting import is_descending
+from api.utils.tree import TREE_DEPTH_UNITS
+
+
+account_table = Account.__table__
+mall_table = Mall.__table__
+unit_table = Unit.__table__
+
+
+def list_statements(
+    page: int,
+    per_page: int,
+    cursor: Union[int, Tuple[int, int]] = None,
+    sort: str = None,
+    q: str = None
+) -> Tuple[StatementLambdaElement, Optional[Select], Optional[Select]]:
+    """The statement reading a page of accounts, the parent counter of its total and its search matches"""
+    # Lambda statements are cached by code location, so the query is built and compiled only once.
+    # Plain Core rows are returned: list pages need no ORM identity map or attribute instrumentation
+    statement = lambda_stmt(lambda: select(
+        account_table.c.id, account_table.c.name, account_table.c.mall_count
+    ))
+
+    if q is not None:
+        # The trigram index finds the names containing `q`, then the matches are ranked by similarity
+        matches, rank = name_matches(account_table.c.name, q), similarity(account_table.c.name, q)
+        statement += lambda s: s.where(matches).order_by(rank.desc(), account_table.c.id)
+    elif sort is None:
+        statement += lambda s: s.order_by(account_table.c.id)
+    elif is_descending(sort):
+        # Both directions walk the (mall_count, id) index, the id breaks ties
+        statement += lambda s: s.order_by(account_table.c.mall_count.desc(), account_table.c.id.desc())
+    else:
+        statement += lambda s: s.order_by(account_table.c.mall_count, account_table.c.id)
+
+    if cursor is not None:
+        # Keyset pagination: seek past the last seen id instead of skipping rows with OFFSET
+        if sort is None:
+            statement += lambda s: s.where(account_table.c.id > cursor)
+        else:
+            # Sorted lists seek past the last seen (mall_count, id) row
+            last_count, last_id = cursor
+            if is_descending(sort):
+                statement += lambda s: s.where(
+                    tuple_(account_table.c.mall_count, account_table.c.id) < tuple_(last_count, last_id)
+                )
+            else:
+                statement += lambda s: s.where(
+                    tuple_(account_table.c.mall_count, account_table.c.id) > tuple_(last_count, last_id)
+                )
+    else:
+        offset = (page - 1) * per_page
+        statement += lambda s: s.offset(offset)
+
+    limit = per_page + 1
+    statement += lambda s: s.limit(limit)
+
+    # Search results are counted over the matches
+    matching = None if q is None else select(account_table.c.id).where(matches)
+
+    return statement, None, matching
+
+
+def list_result(
+    accounts: Sequence[Row],
+    total: Optional[int],
+    total_kind: str,
+    page: int,
+    per_page: int,
+    cursor: Union[int, Tuple[int, int]] = None,
+    sort: str = None,
+    q: str = None
+) -> dict:
+    if not accounts and cursor is None and page != 1:
+        raise DoesNotExistException('`page` or `per_page` specified incorrectly or accounts are not found!')
+
+    has_next = len(accounts) > per_page
+    accounts = accounts[:per_page]
+
+    if not has_next or q is not None:
+        next_cursor = None
+    elif sort is None:
+        next_cursor = accounts[-1].id
+    else:
+        next_cursor = (accounts[-1].mall_count, accounts[-1].id)
+
+    return {
+        'total': total,
+        'total_kind': total_kind,
+        'accounts': accounts,
+        'next_cursor': next_cursor
+    }
+
+
+def many_statement(ids: List[int] = None, names: List[str] = None) -> StatementLambdaElement:
+    # All the keys are bound as one array: a single statement whatever their number
+    statement = lambda_stmt(lambda: select(
+        account_table.c.id, account_table.c.name, account_table.c.mall_count
+    ))
+
+    if ids is not None:
+        statement += lambda s: s.where(account_table.c.id == any_(ids))
+    else:
+        statement += lambda s: s.where(account_table.c.name == any_(names))
+
+    return statement
+
+
+def many_result(accounts: Sequence[Row], ids: List[int] = None, names: List[str] = None) -> dict:
+    if ids is not None:
+        accounts, missing = in_requested_order(accounts, ids, 'id')
+    else:
+        accounts, missing = in_requested_order(accounts, names, 'name')
+
+    return {
+        'accounts': accounts,
+        'missing': missing
+    }
+
+
+def get_statement(account_id: int) -> StatementLambdaElement:
+    statement = lambda_stmt(lambda: select(
+        account_table.c.id, account_table.c.name, account_table.c.mall_count
+    ))
+    statement += lambda s: s.where(account_table.c.id == account_id)
+
+    return statement
+
+
+def children_statement(account_id: int, children_limit: int, children_cursor: int = None) -> StatementLambdaElement:
+    # Children come from their own LIMITed query over the account_id index instead of a JOIN
+    statement = lambda_stmt(lambda: select(
+        mall_table.c.id, mall_table.c.name, mall_table.c.unit_count, mall_table.c.account_id
+    ).where(mall_table.c.account_id == account_id).order_by(mall_table.c.id))
+
+    if children_cursor is not None:
+        statement += lambda s: s.where(mall_table.c.id > children_cursor)
+
+    limit = children_limit + 1
+    statement += lambda s: s.limit(limit)
+
+    return statement
+
+
+def get_result(account: Row, malls: Sequence[Row], children_limit: int) -> dict:
+    has_next = len(malls) > children_limit
+    malls = malls[:children_limit]
+
+    return {
+        **account._asdict(),
+        'malls': malls,
+        'next_children_cursor': malls[-1].id if has_next else None
+    }
+
+
+def tree_account_statement(account_id: int) -> StatementLambdaElement:
+    statement = lambda_stmt(lambda: select(account_table.c.id, account_table.c.name))
+    statement += lambda s: s.where(account_table.c.id == account_id)
+
+    return statement
+
+
+def tree_statement(account_id: int, depth: int, max_nodes: int) -> Select:
+    """The malls, and with TREE_DEPTH_UNITS their units, below the account, one row per node at most"""
+    # The whole hierarchy below the account is a single joined, ordered statement streamed from a
+    # server-side cursor: every row adds at least one node, so LIMIT bounds the work at `max_nodes`
+    columns = [mall_table.c.id.label('mall_id'), mall_table.c.name.label('mall_name')]
+    statement = select(*columns).where(mall_table.c.account_id == account_id).order_by(mall_table.c.id)
+
+    if depth == TREE_DEPTH_UNITS:
+        statement = statement.add_columns(
+            unit_table.c.id.label('unit_id'), unit_table.c.name.label('unit_name')
+        ).outerjoin(unit_table, unit_table.c.mall_id == mall_table.c.id).order_by(unit_table.c.id)
+
+    return statement.limit(max_nodes + 1)
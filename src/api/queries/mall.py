@@ -0,0 +1,177 @@
+from typing import List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import any_, lambda_stmt, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from api.exceptions import DoesNotExistException
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.utils.multi_get import in_requested_order
+from api.utils.search import name_matches, similarity
+from api.utils.sorting import is_descending
+
+
+account_table = Account.__table__
+mall_table = Mall.__table__
+unit_table = Unit.__table__
+
+
+def list_statements(
+    page: int,
+    per_page: int,
+    cursor: Union[int, Tuple[int, int]] = None,
+    account_id: int = None,
+    sort: str = None,
+    q: str = None
+) -> Tuple[StatementLambdaElement, Optional[Select], Optional[Select]]:
+    """The statement reading a page of malls, the parent counter of its total and its search matches"""
+    # Lambda statements are cached by code location, so the query is built and compiled only once.
+    # Plain Core rows are returned: list pages need no ORM identity map or attribute instrumentation
+    statement = lambda_stmt(lambda: select(
+        mall_table.c.id, mall_table.c.name, mall_table.c.unit_count, mall_table.c.account_id
+    ))
+
+    if q is not None:
+        # The trigram index finds the names containing `q`, then the matches are ranked by similarity
+        matches, rank = name_matches(mall_table.c.name, q), similarity(mall_table.c.name, q)
+        statement += lambda s: s.where(matches).order_by(rank.desc(), mall_table.c.id)
+    elif sort is None:
+        statement += lambda s: s.order_by(mall_table.c.id)
+    elif is_descending(sort):
+        # Both directions walk the (unit_count, id) index, the id breaks ties
+        statement += lambda s: s.order_by(mall_table.c.unit_count.desc(), mall_table.c.id.desc())
+    else:
+        statement += lambda s: s.order_by(mall_table.c.unit_count, mall_table.c.id)
+
+    if account_id is not None:
+        # With the (parent_id, id) index, a parent's page is one range scan however many children it has
+        statement += lambda s: s.where(mall_table.c.account_id == account_id)
+
+    if cursor is not None:
+        # Keyset pagination: seek past the last seen id instead of skipping rows with OFFSET
+        if sort is None:
+            statement += lambda s: s.where(mall_table.c.id > cursor)
+        else:
+            # Sorted lists seek past the last seen (unit_count, id) row
+            last_count, last_id = cursor
+            if is_descending(sort):
+                statement += lambda s: s.where(
+                    tuple_(mall_table.c.unit_count, mall_table.c.id) < tuple_(last_count, last_id)
+                )
+            else:
+                statement += lambda s: s.where(
+                    tuple_(mall_table.c.unit_count, mall_table.c.id) > tuple_(last_count, last_id)
+                )
+    else:
+        offset = (page - 1) * per_page
+        statement += lambda s: s.offset(offset)
+
+    limit = per_page + 1
+    statement += lambda s: s.limit(limit)
+
+    counter = matching = None
+    if q is not None:
+        # Search results are counted over the matches, within the parent when one is given
+        matching = select(mall_table.c.id).where(matches)
+        if account_id is not None:
+            matching = matching.where(mall_table.c.account_id == account_id)
+    elif account_id is not None:
+        # A parent's children are counted by the parent's own counter column, a single row read
+        counter = select(account_table.c.mall_count).where(account_table.c.id == account_id)
+
+    return statement, counter, matching
+
+
+def list_result(
+    malls: Sequence[Row],
+    total: Optional[int],
+    total_kind: str,
+    page: int,
+    per_page: int,
+    cursor: Union[int, Tuple[int, int]] = None,
+    sort: str = None,
+    q: str = None
+) -> dict:
+    if not malls and cursor is None and page != 1:
+        raise DoesNotExistException('`page` or `per_page` specified incorrectly or malls are not found!')
+
+    has_next = len(malls) > per_page
+    malls = malls[:per_page]
+
+    if not has_next or q is not None:
+        next_cursor = None
+    elif sort is None:
+        next_cursor = malls[-1].id
+    else:
+        next_cursor = (malls[-1].unit_count, malls[-1].id)
+
+    return {
+        'total': total,
+        'total_kind': total_kind,
+        'malls': malls,
+        'next_cursor': next_cursor
+    }
+
+
+def many_statement(ids: List[int] = None, names: List[str] = None) -> StatementLambdaElement:
+    # All the keys are bound as one array: a single statement whatever their number
+    statement = lambda_stmt(lambda: select(
+        mall_table.c.id, mall_table.c.name, mall_table.c.unit_count, mall_table.c.account_id
+    ))
+
+    if ids is not None:
+        statement += lambda s: s.where(mall_table.c.id == any_(ids))
+    else:
+        statement += lambda s: s.where(mall_table.c.name == any_(names))
+
+    return statement
+
+
+def many_result(malls: Sequence[Row], ids: List[int] = None, names: List[str] = None) -> dict:
+    if ids is not None:
+        malls, missing = in_requested_order(malls, ids, 'id')
+    else:
+        malls, missing = in_requested_order(malls, names, 'name')
+
+    return {
+        'malls': malls,
+        'missing': missing
+    }
+
+
+def get_statement(mall_id: int) -> StatementLambdaElement:
+    statement = lambda_stmt(lambda: select(
+        mall_table.c.id, mall_table.c.name, mall_table.c.unit_count, mall_table.c.account_id
+    ))
+    statement += lambda s: s.where(mall_table.c.id == mall_id)
+
+    return statement
+
+
+def children_statement(mall_id: int, children_limit: int, children_cursor: int = None) -> StatementLambdaElement:
+    # Children come from their own LIMITed query over the mall_id index instead of a JOIN
+    statement = lambda_stmt(lambda: select(
+        unit_table.c.id, unit_table.c.name, unit_table.c.mall_id
+    ).where(unit_table.c.mall_id == mall_id).order_by(unit_table.c.id))
+
+    if children_cursor is not None:
+        statement += lambda s: s.where(unit_table.c.id > children_cursor)
+
+    limit = children_limit + 1
+    statement += lambda s: s.limit(limit)
+
+    return statement
+
+
+def get_result(mall: Row, units: Sequence[Row], children_limit: int) -> dict:
+    has_next = len(units) > children_limit
+    units = units[:children_limit]
+
+    return {
+        **mall._asdict(),
+        'units': units,
+        'next_children_cursor': units[-1].id if has_next else None
+    }
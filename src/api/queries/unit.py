@@ -0,0 +1,117 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import any_, lambda_stmt, select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from api.exceptions import DoesNotExistException
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.utils.multi_get import in_requested_order
+from api.utils.search import name_matches, similarity
+
+
+mall_table = Mall.__table__
+unit_table = Unit.__table__
+
+
+def list_statements(
+    page: int,
+    per_page: int,
+    cursor: int = None,
+    mall_id: int = None,
+    q: str = None
+) -> Tuple[StatementLambdaElement, Optional[Select], Optional[Select]]:
+    """The statement reading a page of units, the parent counter of its total and its search matches"""
+    # Lambda statements are cached by code location, so the query is built and compiled only once.
+    # Plain Core rows are returned: list pages need no ORM identity map or attribute instrumentation
+    statement = lambda_stmt(lambda: select(unit_table.c.id, unit_table.c.name, unit_table.c.mall_id))
+
+    if q is not None:
+        # The trigram index finds the names containing `q`, then the matches are ranked by similarity
+        matches, rank = name_matches(unit_table.c.name, q), similarity(unit_table.c.name, q)
+        statement += lambda s: s.where(matches).order_by(rank.desc(), unit_table.c.id)
+    else:
+        statement += lambda s: s.order_by(unit_table.c.id)
+
+    if mall_id is not None:
+        # With the (parent_id, id) index, a parent's page is one range scan however many children it has
+        statement += lambda s: s.where(unit_table.c.mall_id == mall_id)
+
+    if cursor is not None:
+        # Keyset pagination: seek past the last seen id instead of skipping rows with OFFSET
+        statement += lambda s: s.where(unit_table.c.id > cursor)
+    else:
+        offset = (page - 1) * per_page
+        statement += lambda s: s.offset(offset)
+
+    limit = per_page + 1
+    statement += lambda s: s.limit(limit)
+
+    counter = matching = None
+    if q is not None:
+        # Search results are counted over the matches, within the parent when one is given
+        matching = select(unit_table.c.id).where(matches)
+        if mall_id is not None:
+            matching = matching.where(unit_table.c.mall_id == mall_id)
+    elif mall_id is not None:
+        # A parent's children are counted by the parent's own counter column, a single row read
+        counter = select(mall_table.c.unit_count).where(mall_table.c.id == mall_id)
+
+    return statement, counter, matching
+
+
+def list_result(
+    units: Sequence[Row],
+    total: Optional[int],
+    total_kind: str,
+    page: int,
+    per_page: int,
+    cursor: int = None,
+    q: str = None
+) -> dict:
+    if not units and cursor is None and page != 1:
+        raise DoesNotExistException('`page` or `per_page` specified incorrectly or units are not found!')
+
+    has_next = len(units) > per_page
+    units = units[:per_page]
+
+    return {
+        'total': total,
+        'total_kind': total_kind,
+        'units': units,
+        # Search results are paged with `page`
+        'next_cursor': units[-1].id if has_next and q is None else None
+    }
+
+
+def many_statement(ids: List[int] = None, names: List[str] = None) -> StatementLambdaElement:
+    # All the keys are bound as one array: a single statement whatever their number
+    statement = lambda_stmt(lambda: select(unit_table.c.id, unit_table.c.name, unit_table.c.mall_id))
+
+    if ids is not None:
+        statement += lambda s: s.where(unit_table.c.id == any_(ids))
+    else:
+        statement += lambda s: s.where(unit_table.c.name == any_(names))
+
+    return statement
+
+
+def many_result(units: Sequence[Row], ids: List[int] = None, names: List[str] = None) -> dict:
+    if ids is not None:
+        units, missing = in_requested_order(units, ids, 'id')
+    else:
+        units, missing = in_requested_order(units, names, 'name')
+
+    return {
+        'units': units,
+        'missing': missing
+    }
+
+
+def get_statement(unit_id: int) -> StatementLambdaElement:
+    statement = lambda_stmt(lambda: select(unit_table.c.id, unit_table.c.name, unit_table.c.mall_id))
+    statement += lambda s: s.where(unit_table.c.id == unit_id)
+
+    return statement
@@ -1,12 +1,29 @@
-import psycopg2.errors
-from sqlalchemy.orm import sessionmaker, joinedload
+from typing import Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
 from injector import inject
 
 from api.models.account import Account
+from api.queries import account as queries
+from api.utils.bulk_edit import rename_rows, delete_rows
+from api.utils.bulk_ingest import (
+    copy_rows,
+    insert_returning,
+    upsert_returning,
+    COMMIT_ALL,
+    COMMIT_CHUNK,
+    ON_CONFLICT_ERROR,
+    ON_CONFLICT_SKIP
+)
+from api.utils.counting import count_rows, COUNT_EXACT
+from api.utils.export import open_snapshot, RowStream
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only, READ_ONLY
+from api.utils.tree import TREE_DEPTH_ACCOUNT
 
-from werkzeug.exceptions import NotFound
 from sqlalchemy.exc import IntegrityError
-from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.exceptions import AppException, DoesNotExistException, PayloadTooLargeException, ValidationException
 
 
 class AccountRepository:
@@ -25,42 +42,116 @@ class AccountRepository:
         try:
             with self._session.begin() as session:
                 session.add(account)
-        except IntegrityError:
-            raise AlreadyExistsException('Account already exists!')
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Account already exists!')
 
         return account
 
-    def bulk_create(self, data: dict) -> None:
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        created_accounts = None
+
         try:
             with self._session.begin() as session:
-                session.bulk_insert_mappings(
-                    Account, [
-                        account for account in data['accounts']
-                    ]
-                )
+                if return_ids or on_conflict == ON_CONFLICT_SKIP:
+                    created_accounts, skipped = insert_returning(
+                        session, Account, data['accounts'], skip_conflicts=on_conflict == ON_CONFLICT_SKIP
+                    )
+                else:
+                    copy_rows(session, Account, ('name',), data['accounts'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more accounts already exist!')
+
+        if created_accounts is None:
+            return None
+
+        return {
+            'accounts': created_accounts,
+            'skipped': skipped
+        }
+
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        inserted = 0
+
+        try:
+            if commit == COMMIT_CHUNK:
+                for chunk in chunks:
+                    with self._session.begin() as session:
+                        inserted += copy_rows(session, Account, ('name',), chunk)
+            else:
+                # One transaction for the whole stream: nothing is kept if any chunk fails
+                with self._session.begin() as session:
+                    for chunk in chunks:
+                        inserted += copy_rows(session, Account, ('name',), chunk)
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.UniqueViolation):
-                raise AlreadyExistsException('One or more accounts already exist!')
+            exception = integrity_exception(e, 'One or more accounts already exist!')
+            raise self._committed_note(exception, commit, inserted)
+        except (ValidationException, PayloadTooLargeException) as e:
+            # The body is parsed while chunks are inserted: a bad line or the size limit may come after commits
+            raise self._committed_note(e, commit, inserted)
+
+        return {'inserted': inserted}
 
-            raise e
+    @staticmethod
+    def _committed_note(exception: Exception, commit: str, inserted: int) -> Exception:
+        if commit != COMMIT_CHUNK or not isinstance(exception, AppException):
+            return exception
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        Account.query.with_session(self._session)
+        return type(exception)(f'{exception.message} {inserted} accounts were committed before the failure.')
+
+    def bulk_upsert(self, data: dict) -> dict:
         try:
             with self._session.begin() as session:
-                pagination_result = Account.query.with_session(session=session).order_by(Account.id).paginate(
-                    page=page,
-                    per_page=per_page,
-                    error_out=True,
-                    max_per_page=50
-                )
-        except NotFound:
-            raise DoesNotExistException('`page` or `per_page` specified incorrectly or accounts are not found!')
+                accounts = upsert_returning(session, Account, data['accounts'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more accounts already exist!')
 
-        return {
-            'total': pagination_result.total,
-            'accounts': pagination_result.items
-        }
+        return {'accounts': accounts}
+
+    def bulk_update(self, data: dict) -> dict:
+        try:
+            with self._session.begin() as session:
+                results = rename_rows(session, Account, data['accounts'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more accounts already exist!')
+
+        return {'results': results}
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        with self._session.begin() as session:
+            results = delete_rows(session, Account, ids)
+
+        return {'results': results}
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, sort, q)
+
+        with read_only(self._session) as session:
+            accounts = session.execute(statement).all()
+            total, total_kind = count_rows(session, Account, count, counter, matching)
+
+        return queries.list_result(accounts, total, total_kind, page, per_page, cursor, sort, q)
+
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        with read_only(self._session) as session:
+            accounts = session.execute(queries.many_statement(ids, names)).all()
+
+        return queries.many_result(accounts, ids, names)
+
+    def export(self) -> RowStream:
+        return RowStream(self._session, select(Account.id, Account.name).order_by(Account.id))
 
     def update(self, account_id: int, data: dict) -> bool:
         try:
@@ -68,8 +159,8 @@ class AccountRepository:
                 is_updated = session.query(
                     Account
                 ).filter_by(id=account_id).update(data)
-        except IntegrityError:
-            raise AlreadyExistsException('Account already exists!')
+        except IntegrityError as e:
+            raise integrity_exception(e, 'Account already exists!')
 
         return bool(is_updated)
 
@@ -81,13 +172,32 @@ class AccountRepository:
 
         return bool(is_deleted)
 
-    def get(self, account_id: int) -> Account:
-        with self._session.begin() as session:
-            account = session.query(
-                Account
-            ).options(joinedload('malls')).get(account_id)
+    def get(self, account_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        with read_only(self._session) as session:
+            account = session.execute(queries.get_statement(account_id)).first()
+            if not account:
+                raise DoesNotExistException('Account does not exist!')
 
-        if not account:
-            raise DoesNotExistException('Account does not exist!')
+            malls = session.execute(queries.children_statement(account_id, children_limit, children_cursor)).all()
 
-        return account
+        return queries.get_result(account, malls, children_limit)
+
+    def get_tree(self, account_id: int, depth: int, max_nodes: int) -> Tuple[dict, Optional[RowStream]]:
+        # The account and its hierarchy are read from one snapshot on one server: the streamed malls
+        # and units are those of the account returned, even if a write lands in between
+        snapshot = open_snapshot(self._session, info={READ_ONLY: True})
+        try:
+            account = snapshot.execute(queries.tree_account_statement(account_id)).first()
+            if not account:
+                raise DoesNotExistException('Account does not exist!')
+        except Exception:
+            snapshot.close()
+            raise
+
+        if depth == TREE_DEPTH_ACCOUNT:
+            snapshot.close()
+            return account._asdict(), None
+
+        return account._asdict(), RowStream(
+            self._session, queries.tree_statement(account_id, depth, max_nodes), snapshot
+        )
@@ -1,12 +1,28 @@
-import psycopg2.errors
-from sqlalchemy.orm import sessionmaker, joinedload
+from typing import Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
 from injector import inject
 
 from api.models.mall import Mall
+from api.queries import mall as queries
+from api.utils.bulk_edit import rename_rows, delete_rows
+from api.utils.bulk_ingest import (
+    copy_rows,
+    insert_returning,
+    upsert_returning,
+    COMMIT_ALL,
+    COMMIT_CHUNK,
+    ON_CONFLICT_ERROR,
+    ON_CONFLICT_SKIP
+)
+from api.utils.counting import count_rows, COUNT_EXACT
+from api.utils.export import RowStream
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only
 
-from werkzeug.exceptions import NotFound
 from sqlalchemy.exc import IntegrityError
-from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.exceptions import AppException, DoesNotExistException, PayloadTooLargeException, ValidationException
 
 
 class MallRepository:
@@ -27,47 +43,116 @@ class MallRepository:
             with self._session.begin() as session:
                 session.add(mall)
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.ForeignKeyViolation):
-                raise DoesNotExistException('Account does not exist!')
-            elif isinstance(e.orig, psycopg2.errors.IntegrityError):
-                raise AlreadyExistsException('Mall already exists!')
+            raise integrity_exception(e, 'Mall already exists!', 'Account does not exist!')
 
-            raise e
         return mall
 
-    def bulk_create(self, data: dict) -> None:
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        created_malls = None
+
         try:
             with self._session.begin() as session:
-                session.bulk_insert_mappings(
-                    Mall, [
-                        mall for mall in data['malls']
-                    ]
-                )
+                if return_ids or on_conflict == ON_CONFLICT_SKIP:
+                    created_malls, skipped = insert_returning(
+                        session, Mall, data['malls'], skip_conflicts=on_conflict == ON_CONFLICT_SKIP
+                    )
+                else:
+                    copy_rows(session, Mall, ('name', 'account_id'), data['malls'])
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.UniqueViolation):
-                raise AlreadyExistsException('One or more malls already exist!')
+            raise integrity_exception(e, 'One or more malls already exist!', 'Account does not exist!')
 
-            raise e
+        if created_malls is None:
+            return None
+
+        return {
+            'malls': created_malls,
+            'skipped': skipped
+        }
+
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        inserted = 0
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        Mall.query.with_session(self._session)
+        try:
+            if commit == COMMIT_CHUNK:
+                for chunk in chunks:
+                    with self._session.begin() as session:
+                        inserted += copy_rows(session, Mall, ('name', 'account_id'), chunk)
+            else:
+                # One transaction for the whole stream: nothing is kept if any chunk fails
+                with self._session.begin() as session:
+                    for chunk in chunks:
+                        inserted += copy_rows(session, Mall, ('name', 'account_id'), chunk)
+        except IntegrityError as e:
+            exception = integrity_exception(e, 'One or more malls already exist!', 'Account does not exist!')
+            raise self._committed_note(exception, commit, inserted)
+        except (ValidationException, PayloadTooLargeException) as e:
+            # The body is parsed while chunks are inserted: a bad line or the size limit may come after commits
+            raise self._committed_note(e, commit, inserted)
+
+        return {'inserted': inserted}
+
+    @staticmethod
+    def _committed_note(exception: Exception, commit: str, inserted: int) -> Exception:
+        if commit != COMMIT_CHUNK or not isinstance(exception, AppException):
+            return exception
+
+        return type(exception)(f'{exception.message} {inserted} malls were committed before the failure.')
+
+    def bulk_upsert(self, data: dict) -> dict:
         try:
             with self._session.begin() as session:
-                pagination_result = Mall.query.with_session(
-                    session=session
-                ).options(joinedload('account')).order_by(Mall.id).paginate(
-                    page=page,
-                    per_page=per_page,
-                    error_out=True,
-                    max_per_page=50
-                )
-        except NotFound:
-            raise DoesNotExistException('`page` or `per_page` specified incorrectly or malls are not found!')
+                malls = upsert_returning(session, Mall, data['malls'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more malls already exist!', 'Account does not exist!')
 
-        return {
-            'total': pagination_result.total,
-            'malls': pagination_result.items
-        }
+        return {'malls': malls}
+
+    def bulk_update(self, data: dict) -> dict:
+        try:
+            with self._session.begin() as session:
+                results = rename_rows(session, Mall, data['malls'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more malls already exist!')
+
+        return {'results': results}
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        with self._session.begin() as session:
+            results = delete_rows(session, Mall, ids)
+
+        return {'results': results}
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        account_id: int = None,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, account_id, sort, q)
+
+        with read_only(self._session) as session:
+            malls = session.execute(statement).all()
+            total, total_kind = count_rows(session, Mall, count, counter, matching)
+
+        return queries.list_result(malls, total, total_kind, page, per_page, cursor, sort, q)
+
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        with read_only(self._session) as session:
+            malls = session.execute(queries.many_statement(ids, names)).all()
+
+        return queries.many_result(malls, ids, names)
+
+    def export(self) -> RowStream:
+        return RowStream(self._session, select(Mall.id, Mall.name, Mall.account_id).order_by(Mall.id))
 
     def update(self, mall_id: int, data: dict) -> bool:
         try:
@@ -76,9 +161,7 @@ class MallRepository:
                     Mall
                 ).filter_by(id=mall_id).update(data)
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.IntegrityError):
-                raise AlreadyExistsException('Mall already exists!')
-            raise e
+            raise integrity_exception(e, 'Mall already exists!', 'Account does not exist!')
 
         return bool(is_updated)
 
@@ -90,13 +173,12 @@ class MallRepository:
 
         return bool(is_deleted)
 
-    def get(self, mall_id: int) -> Mall:
-        with self._session.begin() as session:
-            mall = session.query(
-                Mall
-            ).options(joinedload('units')).get(mall_id)
+    def get(self, mall_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        with read_only(self._session) as session:
+            mall = session.execute(queries.get_statement(mall_id)).first()
+            if not mall:
+                raise DoesNotExistException('Mall does not exist!')
 
-        if not mall:
-            raise DoesNotExistException('Mall does not exist!')
+            units = session.execute(queries.children_statement(mall_id, children_limit, children_cursor)).all()
 
-        return mall
+        return queries.get_result(mall, units, children_limit)
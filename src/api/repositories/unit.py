@@ -1,12 +1,29 @@
-import psycopg2.errors
-from sqlalchemy.orm import sessionmaker, joinedload
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import sessionmaker
 from injector import inject
 
 from api.models.unit import Unit
+from api.queries import unit as queries
+from api.utils.bulk_edit import rename_rows, delete_rows
+from api.utils.bulk_ingest import (
+    copy_rows,
+    insert_returning,
+    upsert_returning,
+    COMMIT_ALL,
+    COMMIT_CHUNK,
+    ON_CONFLICT_ERROR,
+    ON_CONFLICT_SKIP
+)
+from api.utils.counting import count_rows, COUNT_EXACT
+from api.utils.export import RowStream
+from api.utils.integrity import integrity_exception
+from api.utils.replicas import read_only
 
-from werkzeug.exceptions import NotFound
 from sqlalchemy.exc import IntegrityError
-from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.exceptions import AppException, DoesNotExistException, PayloadTooLargeException, ValidationException
 
 
 class UnitRepository:
@@ -27,48 +44,115 @@ class UnitRepository:
             with self._session.begin() as session:
                 session.add(unit)
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.ForeignKeyViolation):
-                raise DoesNotExistException('Mall does not exist!')
-            elif isinstance(e.orig, psycopg2.errors.IntegrityError):
-                raise AlreadyExistsException('Unit already exists!')
-
-            raise e
+            raise integrity_exception(e, 'Unit already exists!', 'Mall does not exist!')
 
         return unit
 
-    def bulk_create(self, data: dict) -> None:
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        created_units = None
+
         try:
             with self._session.begin() as session:
-                session.bulk_insert_mappings(
-                    Unit, [
-                        unit for unit in data['units']
-                    ]
-                )
+                if return_ids or on_conflict == ON_CONFLICT_SKIP:
+                    created_units, skipped = insert_returning(
+                        session, Unit, data['units'], skip_conflicts=on_conflict == ON_CONFLICT_SKIP
+                    )
+                else:
+                    copy_rows(session, Unit, ('name', 'mall_id'), data['units'])
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.UniqueViolation):
-                raise AlreadyExistsException('One or more units already exist!')
+            raise integrity_exception(e, 'One or more units already exist!', 'Mall does not exist!')
 
-            raise e
+        if created_units is None:
+            return None
+
+        return {
+            'units': created_units,
+            'skipped': skipped
+        }
+
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        inserted = 0
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        Unit.query.with_session(self._session)
+        try:
+            if commit == COMMIT_CHUNK:
+                for chunk in chunks:
+                    with self._session.begin() as session:
+                        inserted += copy_rows(session, Unit, ('name', 'mall_id'), chunk)
+            else:
+                # One transaction for the whole stream: nothing is kept if any chunk fails
+                with self._session.begin() as session:
+                    for chunk in chunks:
+                        inserted += copy_rows(session, Unit, ('name', 'mall_id'), chunk)
+        except IntegrityError as e:
+            exception = integrity_exception(e, 'One or more units already exist!', 'Mall does not exist!')
+            raise self._committed_note(exception, commit, inserted)
+        except (ValidationException, PayloadTooLargeException) as e:
+            # The body is parsed while chunks are inserted: a bad line or the size limit may come after commits
+            raise self._committed_note(e, commit, inserted)
+
+        return {'inserted': inserted}
+
+    @staticmethod
+    def _committed_note(exception: Exception, commit: str, inserted: int) -> Exception:
+        if commit != COMMIT_CHUNK or not isinstance(exception, AppException):
+            return exception
+
+        return type(exception)(f'{exception.message} {inserted} units were committed before the failure.')
+
+    def bulk_upsert(self, data: dict) -> dict:
         try:
             with self._session.begin() as session:
-                pagination_result = Unit.query.with_session(
-                    session=session
-                ).options(joinedload('mall')).order_by(Unit.id).paginate(
-                    page=page,
-                    per_page=per_page,
-                    error_out=True,
-                    max_per_page=50
-                )
-        except NotFound:
-            raise DoesNotExistException('`page` or `per_page` specified incorrectly or units are not found!')
+                units = upsert_returning(session, Unit, data['units'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more units already exist!', 'Mall does not exist!')
 
-        return {
-            'total': pagination_result.total,
-            'units': pagination_result.items
-        }
+        return {'units': units}
+
+    def bulk_update(self, data: dict) -> dict:
+        try:
+            with self._session.begin() as session:
+                results = rename_rows(session, Unit, data['units'])
+        except IntegrityError as e:
+            raise integrity_exception(e, 'One or more units already exist!')
+
+        return {'results': results}
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        with self._session.begin() as session:
+            results = delete_rows(session, Unit, ids)
+
+        return {'results': results}
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: int = None,
+        count: str = COUNT_EXACT,
+        mall_id: int = None,
+        q: str = None
+    ) -> dict:
+        statement, counter, matching = queries.list_statements(page, per_page, cursor, mall_id, q)
+
+        with read_only(self._session) as session:
+            units = session.execute(statement).all()
+            total, total_kind = count_rows(session, Unit, count, counter, matching)
+
+        return queries.list_result(units, total, total_kind, page, per_page, cursor, q)
+
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        with read_only(self._session) as session:
+            units = session.execute(queries.many_statement(ids, names)).all()
+
+        return queries.many_result(units, ids, names)
+
+    def export(self) -> RowStream:
+        return RowStream(self._session, select(Unit.id, Unit.name, Unit.mall_id).order_by(Unit.id))
 
     def update(self, unit_id: int, data: dict) -> bool:
         try:
@@ -77,9 +161,7 @@ class UnitRepository:
                     Unit
                 ).filter_by(id=unit_id).update(data)
         except IntegrityError as e:
-            if isinstance(e.orig, psycopg2.errors.IntegrityError):
-                raise AlreadyExistsException('Unit already exists!')
-            raise e
+            raise integrity_exception(e, 'Unit already exists!', 'Mall does not exist!')
 
         return bool(is_updated)
 
@@ -91,11 +173,9 @@ class UnitRepository:
 
         return bool(is_deleted)
 
-    def get(self, unit_id: int) -> Unit:
-        with self._session.begin() as session:
-            unit = session.query(
-                Unit
-            ).options(joinedload('mall')).get(unit_id)
+    def get(self, unit_id: int) -> Row:
+        with read_only(self._session) as session:
+            unit = session.execute(queries.get_statement(unit_id)).first()
 
         if not unit:
             raise DoesNotExistException('Unit does not exist!')
@@ -8,13 +8,33 @@ from flask_restful import Resource
 from webargs.flaskparser import use_args
 
 from api.services.account import AccountService
+from api.schemas.base import (
+    BulkCreateArgsSchema,
+    BulkDeleteSchema,
+    BulkResultSchema,
+    BulkStreamArgsSchema,
+    BulkStreamResultSchema,
+    ChildrenArgsSchema,
+    ExportArgsSchema,
+    MultiGetArgsSchema,
+    TreeArgsSchema
+)
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import export_response, EXPORT_NDJSON
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.utils.ndjson import request_chunks, NDJSON_MIMETYPE
+from api.utils.query_budget import query_budget
 from api.utils.response_serializer import serialize_response
+from api.utils.tree import encode_tree, tree_max_nodes, tree_response, TREE_DEPTH_UNITS
 from api.schemas.account import (
     AccountCreateSchema,
     AccountUpdateSchema,
     AccountRetrieveSchema,
     AccountListSchema,
-    AccountBulkCreateSchema
+    AccountMultiGetSchema,
+    AccountBulkCreateSchema,
+    AccountBulkUpdateSchema
 )
 
 
@@ -23,10 +43,52 @@ class AccountsBulkResource(Resource):
     def __init__(self, service: AccountService):
         self.account_service = service
 
+    @query_budget(1)
+    def post(self):
+        if request.mimetype == NDJSON_MIMETYPE:
+            return self.post_stream()
+
+        return self.post_json()
+
     @use_args(AccountBulkCreateSchema())
-    @serialize_response(None, HTTPStatus.NO_CONTENT)
-    def post(self, accounts):
-        return self.account_service.bulk_create(accounts)
+    @use_args(BulkCreateArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(AccountBulkCreateSchema(), HTTPStatus.CREATED, HTTPStatus.NO_CONTENT)
+    def post_json(self, accounts, return_ids=False, on_conflict=ON_CONFLICT_ERROR):
+        return self.account_service.bulk_create(accounts, return_ids, on_conflict)
+
+    @use_args(BulkStreamArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(BulkStreamResultSchema(), HTTPStatus.CREATED)
+    def post_stream(self, commit=COMMIT_ALL):
+        return self.account_service.bulk_create_stream(request_chunks(AccountCreateSchema()), commit)
+
+    @query_budget(2)
+    @use_args(AccountBulkCreateSchema())
+    @serialize_response(AccountBulkCreateSchema(), HTTPStatus.OK)
+    def put(self, accounts):
+        return self.account_service.bulk_upsert(accounts)
+
+    @query_budget(1)
+    @use_args(AccountBulkUpdateSchema())
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def patch(self, accounts):
+        return self.account_service.bulk_update(accounts)
+
+    @query_budget(1)
+    @use_args(BulkDeleteSchema(), as_kwargs=True)
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def delete(self, ids):
+        return self.account_service.bulk_delete(ids)
+
+
+class AccountsExportResource(Resource):
+    @inject
+    def __init__(self, service: AccountService):
+        self.account_service = service
+
+    @query_budget(1)
+    @use_args(ExportArgsSchema(), location='querystring', as_kwargs=True)
+    def get(self, format=EXPORT_NDJSON):
+        return export_response(self.account_service.export(), format, 'accounts')
 
 
 class AccountsResource(Resource):
@@ -34,15 +96,28 @@ class AccountsResource(Resource):
     def __init__(self, service: AccountService):
         self.account_service = service
 
+    @query_budget(1)
     @use_args(AccountCreateSchema())
     @serialize_response(AccountCreateSchema(), HTTPStatus.CREATED)
     def post(self, account):
         return self.account_service.create(account)
 
+    @query_budget(2)
+    def get(self):
+        if any(key in request.args for key in MULTI_GET_KEYS):
+            return self.get_many()
+
+        return self.get_list()
+
     @use_args(AccountListSchema(), location='querystring', as_kwargs=True)
     @serialize_response(AccountListSchema(), HTTPStatus.OK)
-    def get(self, page=1, per_page=20):
-        return self.account_service.get_list(page, per_page)
+    def get_list(self, page=1, per_page=20, cursor=None, count=COUNT_EXACT, sort=None, q=None):
+        return self.account_service.get_list(page, per_page, cursor, count, sort, q)
+
+    @use_args(MultiGetArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(AccountMultiGetSchema(), HTTPStatus.OK)
+    def get_many(self, ids=None, names=None):
+        return self.account_service.get_many(ids, names)
 
 
 class AccountResource(Resource):
@@ -50,15 +125,38 @@ class AccountResource(Resource):
     def __init__(self, service: AccountService):
         self.account_service = service
 
+    @query_budget(1)
     @use_args(AccountUpdateSchema())
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def patch(self, account: dict, account_id: int):
         self.account_service.update(account_id, account)
 
+    @query_budget(1)
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def delete(self, account_id: int):
         self.account_service.delete(account_id)
 
+    @query_budget(2)
+    @use_args(ChildrenArgsSchema(), location='querystring', as_kwargs=True)
     @serialize_response(AccountRetrieveSchema(), HTTPStatus.OK)
-    def get(self, account_id: int):
-        return self.account_service.get(account_id)
+    def get(self, account_id: int, children_limit=20, children_cursor=None):
+        return self.account_service.get(account_id, children_limit, children_cursor)
+
+
+class AccountTreeResource(Resource):
+    @inject
+    def __init__(self, service: AccountService):
+        self.account_service = service
+
+    @query_budget(2)
+    @use_args(TreeArgsSchema(), location='querystring', as_kwargs=True)
+    def get(self, account_id: int, depth=TREE_DEPTH_UNITS, max_nodes=None):
+        max_nodes = tree_max_nodes(max_nodes)
+        account, rows = self.account_service.get_tree(account_id, depth, max_nodes)
+
+        response = tree_response(encode_tree(account, rows, max_nodes))
+        if rows is not None:
+            # The snapshot opened by get_tree ends even if the client goes away before the body is sent
+            response.call_on_close(rows.close)
+
+        return response
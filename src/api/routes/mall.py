@@ -1,17 +1,36 @@
 from http import HTTPStatus
 
+from flask import request
 from injector import inject
 from flask_restful import Resource
 from webargs.flaskparser import use_args
 
 from api.services.mall import MallService
+from api.schemas.base import (
+    BulkCreateArgsSchema,
+    BulkDeleteSchema,
+    BulkResultSchema,
+    BulkStreamArgsSchema,
+    BulkStreamResultSchema,
+    ChildrenArgsSchema,
+    ExportArgsSchema,
+    MultiGetArgsSchema
+)
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import export_response, EXPORT_NDJSON
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.utils.ndjson import request_chunks, NDJSON_MIMETYPE
+from api.utils.query_budget import query_budget
 from api.utils.response_serializer import serialize_response
 from api.schemas.mall import (
     MallCreateSchema,
     MallUpdateSchema,
     MallRetrieveSchema,
     MallListSchema,
-    MallBulkCreateSchema
+    MallMultiGetSchema,
+    MallBulkCreateSchema,
+    MallBulkUpdateSchema
 )
 
 
@@ -20,10 +39,52 @@ class MallsBulkResource(Resource):
     def __init__(self, service: MallService):
         self.account_service = service
 
+    @query_budget(1)
+    def post(self):
+        if request.mimetype == NDJSON_MIMETYPE:
+            return self.post_stream()
+
+        return self.post_json()
+
+    @use_args(MallBulkCreateSchema())
+    @use_args(BulkCreateArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(MallBulkCreateSchema(), HTTPStatus.CREATED)
+    def post_json(self, malls, return_ids=False, on_conflict=ON_CONFLICT_ERROR):
+        return self.account_service.bulk_create(malls, return_ids, on_conflict)
+
+    @use_args(BulkStreamArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(BulkStreamResultSchema(), HTTPStatus.CREATED)
+    def post_stream(self, commit=COMMIT_ALL):
+        return self.account_service.bulk_create_stream(request_chunks(MallCreateSchema()), commit)
+
+    @query_budget(2)
     @use_args(MallBulkCreateSchema())
-    @serialize_response(None, HTTPStatus.CREATED)
-    def post(self, malls):
-        return self.account_service.bulk_create(malls)
+    @serialize_response(MallBulkCreateSchema(), HTTPStatus.OK)
+    def put(self, malls):
+        return self.account_service.bulk_upsert(malls)
+
+    @query_budget(1)
+    @use_args(MallBulkUpdateSchema())
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def patch(self, malls):
+        return self.account_service.bulk_update(malls)
+
+    @query_budget(1)
+    @use_args(BulkDeleteSchema(), as_kwargs=True)
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def delete(self, ids):
+        return self.account_service.bulk_delete(ids)
+
+
+class MallsExportResource(Resource):
+    @inject
+    def __init__(self, service: MallService):
+        self.mall_service = service
+
+    @query_budget(1)
+    @use_args(ExportArgsSchema(), location='querystring', as_kwargs=True)
+    def get(self, format=EXPORT_NDJSON):
+        return export_response(self.mall_service.export(), format, 'malls')
 
 
 class MallsResource(Resource):
@@ -31,15 +92,40 @@ class MallsResource(Resource):
     def __init__(self, service: MallService):
         self.mall_service = service
 
+    @query_budget(1)
     @use_args(MallCreateSchema())
     @serialize_response(MallCreateSchema(), HTTPStatus.CREATED)
     def post(self, mall):
         return self.mall_service.create(mall)
 
+    @query_budget(2)
+    def get(self):
+        if any(key in request.args for key in MULTI_GET_KEYS):
+            return self.get_many()
+
+        return self.get_list()
+
     @use_args(MallListSchema(), location='querystring', as_kwargs=True)
     @serialize_response(MallListSchema(), HTTPStatus.OK)
-    def get(self, page=1, per_page=20):
-        return self.mall_service.get_list(page, per_page)
+    def get_list(self, page=1, per_page=20, cursor=None, count=COUNT_EXACT, account_id=None, sort=None, q=None):
+        return self.mall_service.get_list(page, per_page, cursor, count, account_id, sort, q)
+
+    @use_args(MultiGetArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(MallMultiGetSchema(), HTTPStatus.OK)
+    def get_many(self, ids=None, names=None):
+        return self.mall_service.get_many(ids, names)
+
+
+class AccountMallsResource(Resource):
+    @inject
+    def __init__(self, service: MallService):
+        self.mall_service = service
+
+    @query_budget(2)
+    @use_args(MallListSchema(exclude=('account_id',)), location='querystring', as_kwargs=True)
+    @serialize_response(MallListSchema(), HTTPStatus.OK)
+    def get(self, account_id: int, page=1, per_page=20, cursor=None, count=COUNT_EXACT, sort=None, q=None):
+        return self.mall_service.get_list(page, per_page, cursor, count, account_id, sort, q)
 
 
 class MallResource(Resource):
@@ -47,15 +133,19 @@ class MallResource(Resource):
     def __init__(self, repository: MallService):
         self.mall_service = repository
 
+    @query_budget(1)
     @use_args(MallUpdateSchema())
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def patch(self, mall: dict, mall_id: int):
         self.mall_service.update(mall_id, mall)
 
+    @query_budget(1)
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def delete(self, mall_id: int):
         self.mall_service.delete(mall_id)
 
+    @query_budget(2)
+    @use_args(ChildrenArgsSchema(), location='querystring', as_kwargs=True)
     @serialize_response(MallRetrieveSchema(), HTTPStatus.OK)
-    def get(self, mall_id: int):
-        return self.mall_service.get(mall_id)
+    def get(self, mall_id: int, children_limit=20, children_cursor=None):
+        return self.mall_service.get(mall_id, children_limit, children_cursor)
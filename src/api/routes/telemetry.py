@@ -0,0 +1,25 @@
+from flask import current_app
+from flask_restful import Resource
+from injector import inject
+from sqlalchemy.orm import sessionmaker
+
+from api.utils.counting import counter_deltas
+from api.utils.query_budget import query_budget
+from api.utils.telemetry import TELEMETRY_EXTENSION
+
+
+class TelemetryResource(Resource):
+    @inject
+    def __init__(self, session: sessionmaker):
+        self._session = session
+
+    @query_budget(1)
+    def get(self):
+        # Rows `exact` totals sum until `flask compact-counters` folds them: a growing number means it is not running
+        with self._session() as session:
+            deltas = counter_deltas(session)
+
+        return {
+            **current_app.extensions[TELEMETRY_EXTENSION].snapshot(),
+            'table_counter_deltas': deltas
+        }
@@ -1,17 +1,35 @@
 from http import HTTPStatus
 
+from flask import request
 from injector import inject
 from flask_restful import Resource
 from webargs.flaskparser import use_args
 
 from api.services.unit import UnitService
+from api.schemas.base import (
+    BulkCreateArgsSchema,
+    BulkDeleteSchema,
+    BulkResultSchema,
+    BulkStreamArgsSchema,
+    BulkStreamResultSchema,
+    ExportArgsSchema,
+    MultiGetArgsSchema
+)
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import export_response, EXPORT_NDJSON
+from api.utils.multi_get import MULTI_GET_KEYS
+from api.utils.ndjson import request_chunks, NDJSON_MIMETYPE
+from api.utils.query_budget import query_budget
 from api.utils.response_serializer import serialize_response
 from api.schemas.unit import (
     UnitCreateSchema,
     UnitUpdateSchema,
     UnitRetrieveSchema,
     UnitListSchema,
-    UnitBulkCreateSchema
+    UnitMultiGetSchema,
+    UnitBulkCreateSchema,
+    UnitBulkUpdateSchema
 )
 
 
@@ -20,10 +38,52 @@ class UnitsBulkResource(Resource):
     def __init__(self, service: UnitService):
         self.account_service = service
 
+    @query_budget(1)
+    def post(self):
+        if request.mimetype == NDJSON_MIMETYPE:
+            return self.post_stream()
+
+        return self.post_json()
+
+    @use_args(UnitBulkCreateSchema())
+    @use_args(BulkCreateArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(UnitBulkCreateSchema(), HTTPStatus.CREATED)
+    def post_json(self, accounts, return_ids=False, on_conflict=ON_CONFLICT_ERROR):
+        return self.account_service.bulk_create(accounts, return_ids, on_conflict)
+
+    @use_args(BulkStreamArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(BulkStreamResultSchema(), HTTPStatus.CREATED)
+    def post_stream(self, commit=COMMIT_ALL):
+        return self.account_service.bulk_create_stream(request_chunks(UnitCreateSchema()), commit)
+
+    @query_budget(2)
     @use_args(UnitBulkCreateSchema())
-    @serialize_response(None, HTTPStatus.CREATED)
-    def post(self, accounts):
-        return self.account_service.bulk_create(accounts)
+    @serialize_response(UnitBulkCreateSchema(), HTTPStatus.OK)
+    def put(self, accounts):
+        return self.account_service.bulk_upsert(accounts)
+
+    @query_budget(1)
+    @use_args(UnitBulkUpdateSchema())
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def patch(self, accounts):
+        return self.account_service.bulk_update(accounts)
+
+    @query_budget(1)
+    @use_args(BulkDeleteSchema(), as_kwargs=True)
+    @serialize_response(BulkResultSchema(), HTTPStatus.OK)
+    def delete(self, ids):
+        return self.account_service.bulk_delete(ids)
+
+
+class UnitsExportResource(Resource):
+    @inject
+    def __init__(self, service: UnitService):
+        self.unit_service = service
+
+    @query_budget(1)
+    @use_args(ExportArgsSchema(), location='querystring', as_kwargs=True)
+    def get(self, format=EXPORT_NDJSON):
+        return export_response(self.unit_service.export(), format, 'units')
 
 
 class UnitsResource(Resource):
@@ -31,15 +91,40 @@ class UnitsResource(Resource):
     def __init__(self, service: UnitService):
         self.unit_service = service
 
+    @query_budget(1)
     @use_args(UnitCreateSchema())
     @serialize_response(UnitCreateSchema(), HTTPStatus.CREATED)
     def post(self, unit):
         return self.unit_service.create(unit)
 
+    @query_budget(2)
+    def get(self):
+        if any(key in request.args for key in MULTI_GET_KEYS):
+            return self.get_many()
+
+        return self.get_list()
+
     @use_args(UnitListSchema(), location='querystring', as_kwargs=True)
     @serialize_response(UnitListSchema(), HTTPStatus.OK)
-    def get(self, page=1, per_page=20):
-        return self.unit_service.get_list(page, per_page)
+    def get_list(self, page=1, per_page=20, cursor=None, count=COUNT_EXACT, mall_id=None, q=None):
+        return self.unit_service.get_list(page, per_page, cursor, count, mall_id, q)
+
+    @use_args(MultiGetArgsSchema(), location='querystring', as_kwargs=True)
+    @serialize_response(UnitMultiGetSchema(), HTTPStatus.OK)
+    def get_many(self, ids=None, names=None):
+        return self.unit_service.get_many(ids, names)
+
+
+class MallUnitsResource(Resource):
+    @inject
+    def __init__(self, service: UnitService):
+        self.unit_service = service
+
+    @query_budget(2)
+    @use_args(UnitListSchema(exclude=('mall_id',)), location='querystring', as_kwargs=True)
+    @serialize_response(UnitListSchema(), HTTPStatus.OK)
+    def get(self, mall_id: int, page=1, per_page=20, cursor=None, count=COUNT_EXACT, q=None):
+        return self.unit_service.get_list(page, per_page, cursor, count, mall_id, q)
 
 
 class UnitResource(Resource):
@@ -47,15 +132,18 @@ class UnitResource(Resource):
     def __init__(self, repository: UnitService):
         self.unit_service = repository
 
+    @query_budget(1)
     @use_args(UnitUpdateSchema())
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def patch(self, unit: dict, unit_id: int):
         self.unit_service.update(unit_id, unit)
 
+    @query_budget(1)
     @serialize_response(None, HTTPStatus.NO_CONTENT)
     def delete(self, unit_id: int):
         self.unit_service.delete(unit_id)
 
+    @query_budget(1)
     @serialize_response(UnitRetrieveSchema(), HTTPStatus.OK)
     def get(self, unit_id: int):
         return self.unit_service.get(unit_id)
@@ -1,7 +1,8 @@
 from marshmallow import fields, Schema, validate
 
-from api.schemas.base import BasePaginationSchema
+from api.schemas.base import Cursor, BasePaginationSchema, BaseMultiGetSchema, BaseBulkCreateSchema, BulkRenameSchema
 from api.schemas.mall import MallRetrieveSchema
+from api.utils.sorting import sort_modes
 
 
 class AccountCreateSchema(Schema):
@@ -22,15 +23,28 @@ class AccountUpdateSchema(Schema):
 class AccountRetrieveSchema(Schema):
     id = fields.Integer()
     name = fields.String(validate=validate.Length(max=255))
-    malls = fields.Nested(MallRetrieveSchema(), exclude=('units',), many=True)
+    mall_count = fields.Integer()
+    malls = fields.Nested(MallRetrieveSchema(), exclude=('units', 'next_children_cursor'), many=True)
+    next_children_cursor = Cursor()
 
 
 class AccountListSchema(BasePaginationSchema):
     class Meta:
-        dump_only = ('accounts', 'total')
+        dump_only = ('accounts', 'total', 'total_kind', 'next_cursor')
 
-    accounts = fields.Nested(AccountRetrieveSchema(), many=True, exclude=('malls',))
+    sort = fields.String(
+        validate=validate.OneOf(sort_modes('mall_count'))
+    )
+    accounts = fields.Nested(AccountRetrieveSchema(), many=True, exclude=('malls', 'next_children_cursor'))
+
+
+class AccountMultiGetSchema(BaseMultiGetSchema):
+    accounts = fields.Nested(AccountRetrieveSchema(), many=True, exclude=('malls', 'next_children_cursor'))
 
 
-class AccountBulkCreateSchema(Schema):
+class AccountBulkCreateSchema(BaseBulkCreateSchema):
     accounts = fields.List(fields.Nested(AccountCreateSchema()))
+
+
+class AccountBulkUpdateSchema(Schema):
+    accounts = fields.List(fields.Nested(BulkRenameSchema()), required=True)
@@ -1,15 +1,72 @@
-from marshmallow import fields, Schema, validate, validates, ValidationError
+import base64
+import binascii
+import json
+
+from marshmallow import fields, Schema, validate, validates, validates_schema, ValidationError
+from webargs.fields import DelimitedList
+
+from api.utils.bulk_ingest import COMMIT_MODES, ON_CONFLICT_MODES
+from api.utils.counting import COUNT_MODES
+from api.utils.export import EXPORT_FORMATS
+from api.utils.multi_get import MULTI_GET_MAX_KEYS
+from api.utils.search import SEARCH_MAX_LENGTH, SEARCH_MIN_LENGTH
+from api.utils.tree import TREE_DEPTH_ACCOUNT, TREE_DEPTH_UNITS
+
+
+class Cursor(fields.Field):
+    """Opaque keyset pagination token wrapping the last seen id
+
+    Sorted lists seek on `(sort key, id)`: their tokens wrap the last seen
+    sort key as well and are only accepted where `sortable` is set.
+    """
+
+    def __init__(self, sortable: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.sortable = sortable
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+
+        payload = {'key': value[0], 'id': value[1]} if isinstance(value, tuple) else {'id': value}
+        token = base64.urlsafe_b64encode(json.dumps(payload).encode())
+        return token.decode().rstrip('=')
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+            last_id = payload['id']
+            last_key = payload.get('key')
+        except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+            raise ValidationError('Invalid cursor!')
+
+        if not self._is_int(last_id) or 'key' in payload and not (self.sortable and self._is_int(last_key)):
+            raise ValidationError('Invalid cursor!')
+
+        return last_id if last_key is None else (last_key, last_id)
+
+    @staticmethod
+    def _is_int(value) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
 
 
 class BasePaginationSchema(Schema):
     class Meta:
-        load_only = ('page', 'per_page')
-        dump_only = ('total',)
+        load_only = ('page', 'per_page', 'cursor', 'count', 'q')
+        dump_only = ('total', 'total_kind', 'next_cursor')
 
     page = fields.Integer()
     per_page = fields.Integer(
         validate=validate.Range(1, 50)
     )
+    cursor = Cursor(sortable=True)
+    count = fields.String(
+        validate=validate.OneOf(COUNT_MODES)
+    )
+    # Shorter strings have no trigram to look up in the index
+    q = fields.String(
+        validate=validate.Length(SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH)
+    )
 
     @validates('page')
     def validate_page(self, value):
@@ -17,4 +74,122 @@ class BasePaginationSchema(Schema):
             raise ValidationError('Wrong page value! Try value > 1.')
         return value
 
+    @validates_schema
+    def validate_pagination_mode(self, data, **kwargs):
+        if 'page' in data and 'cursor' in data:
+            raise ValidationError('Specify either `page` or `cursor`, not both.', 'cursor')
+
+        # Search results are ranked by similarity: every match is ranked anyway, so they are paged with `page`
+        if 'q' in data and 'cursor' in data:
+            raise ValidationError('Search results are paged with `page`, not `cursor`.', 'cursor')
+
+        if 'q' in data and 'sort' in data:
+            raise ValidationError('Search results are ranked by similarity and cannot be sorted.', 'sort')
+
+        # A sorted list's cursor carries the sort key, it cannot continue an unsorted list or the other way round
+        if 'cursor' in data and isinstance(data['cursor'], tuple) != ('sort' in data):
+            raise ValidationError('The cursor belongs to a list with another `sort`.', 'cursor')
+
     total = fields.Integer()
+    total_kind = fields.String()
+    next_cursor = Cursor()
+
+
+class MultiGetArgsSchema(Schema):
+    """`?ids=1,2,3` or `?names=a,b,c`: names containing a comma cannot be requested this way"""
+
+    ids = DelimitedList(
+        fields.Integer(),
+        validate=validate.Length(1, MULTI_GET_MAX_KEYS)
+    )
+    names = DelimitedList(
+        fields.String(validate=validate.Length(max=255)),
+        validate=validate.Length(1, MULTI_GET_MAX_KEYS)
+    )
+
+    @validates_schema
+    def validate_keys(self, data, **kwargs):
+        if ('ids' in data) == ('names' in data):
+            raise ValidationError('Specify either `ids` or `names`.', 'ids')
+
+
+class BaseMultiGetSchema(Schema):
+    # Requested ids or names that match no row
+    missing = fields.List(fields.Raw())
+
+
+class ChildrenArgsSchema(Schema):
+    children_limit = fields.Integer(
+        validate=validate.Range(1, 100)
+    )
+    children_cursor = Cursor()
+
+
+class TreeArgsSchema(Schema):
+    depth = fields.Integer(
+        validate=validate.Range(TREE_DEPTH_ACCOUNT, TREE_DEPTH_UNITS)
+    )
+    max_nodes = fields.Integer(
+        validate=validate.Range(min=1)
+    )
+
+
+class BulkCreateArgsSchema(Schema):
+    return_ids = fields.Boolean()
+    on_conflict = fields.String(
+        validate=validate.OneOf(ON_CONFLICT_MODES)
+    )
+
+
+class BulkStreamArgsSchema(Schema):
+    commit = fields.String(
+        validate=validate.OneOf(COMMIT_MODES)
+    )
+
+
+class BulkStreamResultSchema(Schema):
+    class Meta:
+        dump_only = ('inserted',)
+
+    inserted = fields.Integer()
+
+
+class ExportArgsSchema(Schema):
+    format = fields.String(
+        validate=validate.OneOf(EXPORT_FORMATS)
+    )
+
+
+class BaseBulkCreateSchema(Schema):
+    class Meta:
+        dump_only = ('skipped',)
+
+    skipped = fields.List(fields.Integer())
+
+
+class BulkRenameSchema(Schema):
+    id = fields.Integer(required=True)
+    name = fields.String(
+        validate=validate.Length(max=255),
+        required=True
+    )
+
+
+class BulkDeleteSchema(Schema):
+    ids = fields.List(
+        fields.Integer(),
+        validate=validate.Length(min=1),
+        required=True
+    )
+
+
+class BulkResultItemSchema(Schema):
+    id = fields.Integer()
+    affected = fields.Boolean()
+
+
+class BulkResultSchema(Schema):
+    class Meta:
+        dump_only = ('results',)
+
+    results = fields.List(fields.Nested(BulkResultItemSchema()))
@@ -1,7 +1,8 @@
 from marshmallow import fields, Schema, validate
 
 from api.schemas.unit import UnitRetrieveSchema
-from api.schemas.base import BasePaginationSchema
+from api.schemas.base import Cursor, BasePaginationSchema, BaseMultiGetSchema, BaseBulkCreateSchema, BulkRenameSchema
+from api.utils.sorting import sort_modes
 
 
 class MallCreateSchema(Schema):
@@ -23,16 +24,30 @@ class MallUpdateSchema(Schema):
 class MallRetrieveSchema(Schema):
     id = fields.Integer()
     name = fields.String(validate=validate.Length(max=255))
+    unit_count = fields.Integer()
     units = fields.Nested(UnitRetrieveSchema(), many=True)
     account_id = fields.Integer()
+    next_children_cursor = Cursor()
 
 
 class MallListSchema(BasePaginationSchema):
     class Meta:
-        dump_only = ('malls', 'total')
+        dump_only = ('malls', 'total', 'total_kind', 'next_cursor')
+
+    account_id = fields.Integer()
+    sort = fields.String(
+        validate=validate.OneOf(sort_modes('unit_count'))
+    )
+    malls = fields.Nested(MallRetrieveSchema(), many=True, exclude=('units', 'next_children_cursor'))
 
-    malls = fields.Nested(MallRetrieveSchema(), many=True, exclude=('units',))
 
+class MallMultiGetSchema(BaseMultiGetSchema):
+    malls = fields.Nested(MallRetrieveSchema(), many=True, exclude=('units', 'next_children_cursor'))
 
-class MallBulkCreateSchema(Schema):
+
+class MallBulkCreateSchema(BaseBulkCreateSchema):
     malls = fields.List(fields.Nested(MallCreateSchema()))
+
+
+class MallBulkUpdateSchema(Schema):
+    malls = fields.List(fields.Nested(BulkRenameSchema()), required=True)
@@ -1,6 +1,6 @@
 from marshmallow import fields, Schema, validate
 
-from api.schemas.base import BasePaginationSchema
+from api.schemas.base import BasePaginationSchema, BaseMultiGetSchema, BaseBulkCreateSchema, BulkRenameSchema
 
 
 class UnitCreateSchema(Schema):
@@ -27,10 +27,19 @@ class UnitRetrieveSchema(Schema):
 
 class UnitListSchema(BasePaginationSchema):
     class Meta:
-        dump_only = ('units', 'total')
+        dump_only = ('units', 'total', 'total_kind', 'next_cursor')
 
+    mall_id = fields.Integer()
+    units = fields.Nested(UnitRetrieveSchema(), many=True)
+
+
+class UnitMultiGetSchema(BaseMultiGetSchema):
     units = fields.Nested(UnitRetrieveSchema(), many=True)
 
 
-class UnitBulkCreateSchema(Schema):
+class UnitBulkCreateSchema(BaseBulkCreateSchema):
     units = fields.List(fields.Nested(UnitCreateSchema()))
+
+
+class UnitBulkUpdateSchema(Schema):
+    units = fields.List(fields.Nested(BulkRenameSchema()), required=True)
@@ -1,6 +1,11 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
 from injector import inject
 
 from api.repositories.account import AccountRepository
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import RowStream
 from api.models.account import Account
 
 
@@ -15,14 +20,48 @@ class AccountService:
     def create(self, data: dict) -> Account:
         return self._account_repository.create(data)
 
-    def bulk_create(self, data: dict) -> None:
-        return self._account_repository.bulk_create(data)
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        return self._account_repository.bulk_create(data, return_ids, on_conflict)
+
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        return self._account_repository.bulk_create_stream(chunks, commit)
+
+    def bulk_upsert(self, data: dict) -> dict:
+        return self._account_repository.bulk_upsert(data)
+
+    def bulk_update(self, data: dict) -> dict:
+        return self._account_repository.bulk_update(data)
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        return self._account_repository.bulk_delete(ids)
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        return self._account_repository.get_list(page, per_page, cursor, count, sort, q)
+
+    def export(self) -> RowStream:
+        return self._account_repository.export()
+
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return self._account_repository.get_many(ids, names)
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        return self._account_repository.get_list(page, per_page)
+    def get(self, account_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        return self._account_repository.get(account_id, children_limit, children_cursor)
 
-    def get(self, account_id: int) -> Account:
-        return self._account_repository.get(account_id)
+    def get_tree(self, account_id: int, depth: int, max_nodes: int) -> Tuple[dict, Optional[RowStream]]:
+        return self._account_repository.get_tree(account_id, depth, max_nodes)
 
     def update(self, account_id: int, data: dict) -> bool:
         return self._account_repository.update(account_id, data)
@@ -1,6 +1,11 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
 from injector import inject
 
 from api.repositories.mall import MallRepository
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import RowStream
 from api.models.mall import Mall
 
 
@@ -15,14 +20,46 @@ class MallService:
     def create(self, data: dict) -> Mall:
         return self._mall_repository.create(data)
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        return self._mall_repository.get_list(page, per_page)
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        return self._mall_repository.bulk_create_stream(chunks, commit)
+
+    def bulk_upsert(self, data: dict) -> dict:
+        return self._mall_repository.bulk_upsert(data)
+
+    def bulk_update(self, data: dict) -> dict:
+        return self._mall_repository.bulk_update(data)
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        return self._mall_repository.bulk_delete(ids)
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: Union[int, Tuple[int, int]] = None,
+        count: str = COUNT_EXACT,
+        account_id: int = None,
+        sort: str = None,
+        q: str = None
+    ) -> dict:
+        return self._mall_repository.get_list(page, per_page, cursor, count, account_id, sort, q)
+
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        return self._mall_repository.bulk_create(data, return_ids, on_conflict)
+
+    def export(self) -> RowStream:
+        return self._mall_repository.export()
 
-    def bulk_create(self, data: dict) -> None:
-        return self._mall_repository.bulk_create(data)
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return self._mall_repository.get_many(ids, names)
 
-    def get(self, mall_id: int) -> Mall:
-        return self._mall_repository.get(mall_id)
+    def get(self, mall_id: int, children_limit: int = 20, children_cursor: int = None) -> dict:
+        return self._mall_repository.get(mall_id, children_limit, children_cursor)
 
     def update(self, mall_id: int, data: dict) -> bool:
         return self._mall_repository.update(mall_id, data)
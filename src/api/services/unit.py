@@ -1,6 +1,12 @@
+from typing import Iterable, List, Optional
+
 from injector import inject
+from sqlalchemy.engine import Row
 
 from api.repositories.unit import UnitRepository
+from api.utils.bulk_ingest import COMMIT_ALL, ON_CONFLICT_ERROR
+from api.utils.counting import COUNT_EXACT
+from api.utils.export import RowStream
 from api.models.unit import Unit
 
 
@@ -15,13 +21,44 @@ class UnitService:
     def create(self, data: dict) -> Unit:
         return self._unit_repository.create(data)
 
-    def bulk_create(self, data: dict) -> None:
-        return self._unit_repository.bulk_create(data)
+    def bulk_create(
+        self,
+        data: dict,
+        return_ids: bool = False,
+        on_conflict: str = ON_CONFLICT_ERROR
+    ) -> Optional[dict]:
+        return self._unit_repository.bulk_create(data, return_ids, on_conflict)
+
+    def bulk_create_stream(self, chunks: Iterable[List[dict]], commit: str = COMMIT_ALL) -> dict:
+        return self._unit_repository.bulk_create_stream(chunks, commit)
+
+    def bulk_upsert(self, data: dict) -> dict:
+        return self._unit_repository.bulk_upsert(data)
+
+    def bulk_update(self, data: dict) -> dict:
+        return self._unit_repository.bulk_update(data)
+
+    def bulk_delete(self, ids: List[int]) -> dict:
+        return self._unit_repository.bulk_delete(ids)
+
+    def get_list(
+        self,
+        page: int,
+        per_page: int,
+        cursor: int = None,
+        count: str = COUNT_EXACT,
+        mall_id: int = None,
+        q: str = None
+    ) -> dict:
+        return self._unit_repository.get_list(page, per_page, cursor, count, mall_id, q)
+
+    def export(self) -> RowStream:
+        return self._unit_repository.export()
 
-    def get_list(self, page: int, per_page: int) -> dict:
-        return self._unit_repository.get_list(page, per_page)
+    def get_many(self, ids: List[int] = None, names: List[str] = None) -> dict:
+        return self._unit_repository.get_many(ids, names)
 
-    def get(self, unit_id: int) -> Unit:
+    def get(self, unit_id: int) -> Row:
         return self._unit_repository.get(unit_id)
 
     def update(self, unit_id: int, data: dict) -> bool:
@@ -0,0 +1,50 @@
+from typing import List, Sequence
+
+from sqlalchemy import any_, bindparam, column, delete, update, values, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from api.config import get_setting
+from api.utils.bulk_ingest import DEFAULT_RETURNING_CHUNK_SIZE
+from api.utils.query_budget import budget_chunks
+
+
+def rename_rows(session: Session, model, rows: Sequence[dict]) -> List[dict]:
+    """Renames rows by id with UPDATE ... FROM (VALUES ...), BULK_RETURNING_CHUNK_SIZE rows per statement
+
+    Returns `{id, affected}` records in input order.
+    """
+    table = model.__table__
+    chunk_size = int(get_setting('BULK_RETURNING_CHUNK_SIZE', DEFAULT_RETURNING_CHUNK_SIZE))
+
+    # UPDATE ... FROM applies only one of several matching source rows, make it the last one
+    latest_names = {row['id']: row['name'] for row in rows}
+    latest_rows = list(latest_names.items())
+
+    updated_ids = set()
+    for start in budget_chunks(range(0, len(latest_rows), chunk_size)):
+        data = values(
+            column('id', Integer), column('name', String), name='data'
+        ).data(latest_rows[start:start + chunk_size])
+
+        updated_ids.update(session.execute(
+            update(table).where(table.c.id == data.c.id).values(name=data.c.name).returning(table.c.id)
+        ).scalars())
+
+    return [{'id': row['id'], 'affected': row['id'] in updated_ids} for row in rows]
+
+
+def delete_rows(session: Session, model, ids: Sequence[int]) -> List[dict]:
+    """Deletes rows with a single DELETE ... WHERE id = ANY(:ids)
+
+    Returns `{id, affected}` records in input order.
+    """
+    table = model.__table__
+
+    deleted_ids = set(session.execute(
+        delete(table).where(
+            table.c.id == any_(bindparam('ids', list(ids), type_=ARRAY(Integer)))
+        ).returning(table.c.id)
+    ).scalars())
+
+    return [{'id': row_id, 'affected': row_id in deleted_ids} for row_id in ids]
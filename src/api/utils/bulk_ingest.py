@@ -0,0 +1,161 @@
+import csv
+import io
+from typing import Iterable, List, Sequence, Tuple
+
+import psycopg2
+from psycopg2 import sql
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.config import get_setting
+from api.utils.query_budget import budget_chunks
+
+
+DEFAULT_ANALYZE_THRESHOLD = 100000
+DEFAULT_RETURNING_CHUNK_SIZE = 1000
+
+ON_CONFLICT_ERROR = 'error'
+ON_CONFLICT_SKIP = 'skip'
+
+ON_CONFLICT_MODES = (ON_CONFLICT_ERROR, ON_CONFLICT_SKIP)
+
+COMMIT_ALL = 'all'
+COMMIT_CHUNK = 'chunk'
+
+COMMIT_MODES = (COMMIT_ALL, COMMIT_CHUNK)
+
+
+class CopyStream:
+    """File-like object that encodes rows to CSV lazily, as COPY reads them"""
+
+    def __init__(self, rows: Iterable[dict], columns: Sequence[str]):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        # Strings are always quoted so that an empty name is not read back as NULL
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+        self._pending = ''
+        self.row_count = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+
+            self._writer.writerow([row[column] for column in self._columns])
+            self.row_count += 1
+
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0:
+            size = len(self._pending)
+
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def copy_rows(session: Session, model, columns: Sequence[str], rows: Iterable[dict]) -> int:
+    """Streams `rows` into `model`'s table with COPY ... FROM STDIN inside the session's transaction
+
+    Constraint violations are raised as SQLAlchemy's IntegrityError, as they
+    are from any other statement. Tables that grew by at least
+    BULK_ANALYZE_THRESHOLD rows are analyzed so the planner sees the new data.
+    """
+    table = model.__tablename__
+    stream = CopyStream(rows, columns)
+    copy = sql.SQL('COPY {} ({}) FROM STDIN WITH (FORMAT csv)').format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(map(sql.Identifier, columns))
+    )
+
+    with session.connection().connection.cursor() as cursor:
+        try:
+            cursor.copy_expert(copy, stream)
+        except psycopg2.IntegrityError as e:
+            # COPY runs on the driver's cursor, outside SQLAlchemy's error wrapping
+            raise IntegrityError(copy.as_string(cursor), None, e) from e
+
+        if stream.row_count >= int(get_setting('BULK_ANALYZE_THRESHOLD', DEFAULT_ANALYZE_THRESHOLD)):
+            cursor.execute(sql.SQL('ANALYZE {}').format(sql.Identifier(table)))
+
+    return stream.row_count
+
+
+def insert_returning(
+    session: Session,
+    model,
+    rows: Sequence[dict],
+    skip_conflicts: bool = False
+) -> Tuple[List[dict], List[int]]:
+    """Inserts `rows` with multi-row INSERT ... RETURNING, BULK_RETURNING_CHUNK_SIZE rows per statement
+
+    With `skip_conflicts` rows whose name is already taken are left out by
+    ON CONFLICT (name) DO NOTHING instead of failing the batch.
+    Returns the inserted `{id, name}` records in input order and the input indices that were skipped.
+    """
+    table = model.__table__
+    chunk_size = int(get_setting('BULK_RETURNING_CHUNK_SIZE', DEFAULT_RETURNING_CHUNK_SIZE))
+
+    ids = {}
+    for start in budget_chunks(range(0, len(rows), chunk_size)):
+        statement = insert(table).values(rows[start:start + chunk_size])
+        if skip_conflicts:
+            statement = statement.on_conflict_do_nothing(index_elements=[table.c.name])
+
+        # RETURNING order is not guaranteed to follow VALUES, but names are unique
+        ids.update(session.execute(statement.returning(table.c.name, table.c.id)).all())
+
+    created, skipped = [], []
+    for index, row in enumerate(rows):
+        # Only the first occurrence of a name can have been inserted, later ones conflicted with it
+        if row['name'] in ids:
+            created.append({'id': ids.pop(row['name']), 'name': row['name']})
+        else:
+            skipped.append(index)
+
+    return created, skipped
+
+
+def upsert_returning(session: Session, model, rows: Sequence[dict]) -> List[dict]:
+    """Inserts or updates `rows` keyed on the unique name, BULK_RETURNING_CHUNK_SIZE rows per statement
+
+    Rows that already hold the same values are not rewritten; their ids are
+    looked up with one extra SELECT per chunk. Returns `{id, name}` records in input order.
+    """
+    table = model.__table__
+    chunk_size = int(get_setting('BULK_RETURNING_CHUNK_SIZE', DEFAULT_RETURNING_CHUNK_SIZE))
+
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement, the last occurrence wins
+    latest_rows = list({row['name']: row for row in rows}.values())
+
+    ids = {}
+    for start in budget_chunks(range(0, len(latest_rows), chunk_size)):
+        chunk = latest_rows[start:start + chunk_size]
+        statement = insert(table).values(chunk)
+
+        update_columns = [column for column in chunk[0] if column != 'name']
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={column: statement.excluded[column] for column in update_columns},
+                where=or_(*[
+                    table.c[column].is_distinct_from(statement.excluded[column]) for column in update_columns
+                ])
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[table.c.name])
+
+        ids.update(session.execute(statement.returning(table.c.name, table.c.id)).all())
+
+        unchanged_names = [row['name'] for row in chunk if row['name'] not in ids]
+        if unchanged_names:
+            ids.update(session.execute(
+                select(table.c.name, table.c.id).where(table.c.name.in_(unchanged_names))
+            ).all())
+
+    return [{'id': ids[row['name']], 'name': row['name']} for row in rows]
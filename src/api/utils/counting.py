@@ -0,0 +1,112 @@
+import json
+from typing import Dict, Optional, Tuple, Union
+
+from sqlalchemy import BigInteger, cast, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable, Select
+
+from api.models.counter import TableCounter
+
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATED = 'estimated'
+COUNT_NONE = 'none'
+
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+
+
+def count_statement(
+    model, mode: str = COUNT_EXACT, counter: Select = None, matching: Select = None
+) -> Tuple[Optional[Executable], str]:
+    """Statement producing the total of a list response without running COUNT(*) over the table, and its kind
+
+    `exact` sums the trigger-appended `table_counter` deltas,
+    `estimated` reads the planner statistics and `none` skips counting.
+    A parent's children pass the parent's trigger-maintained child count
+    as `counter`, a single row read always reported `exact`; search results
+    pass the select of their `matching` rows, counted for `exact` and
+    left to `explain_statement` for `estimated`.
+    """
+    if mode == COUNT_NONE:
+        return None, COUNT_NONE
+
+    if counter is not None:
+        return counter, COUNT_EXACT
+
+    if matching is not None:
+        return select(func.count()).select_from(matching.subquery()), COUNT_EXACT
+
+    if mode == COUNT_ESTIMATED:
+        return text(
+            'SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)'
+        ).bindparams(table=model.__tablename__), COUNT_ESTIMATED
+
+    return select(cast(func.sum(TableCounter.row_count), BigInteger)).where(
+        TableCounter.table_name == model.__tablename__
+    ), COUNT_EXACT
+
+
+def explain_statement(matching: Select, dialect) -> Tuple[str, Union[dict, tuple]]:
+    """`EXPLAIN` of the matches and its parameters in the driver's own style: the planner's estimate, nothing scanned"""
+    compiled = matching.compile(dialect=dialect)
+    parameters = compiled.params
+    if compiled.positional:
+        parameters = tuple(parameters[name] for name in compiled.positiontup)
+
+    return f'EXPLAIN (FORMAT JSON) {compiled}', parameters
+
+
+def planned_rows(plan) -> int:
+    # psycopg2 decodes the json column, asyncpg returns its text
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_rows(
+    session: Session, model, mode: str = COUNT_EXACT, counter: Select = None, matching: Select = None
+) -> Tuple[Optional[int], str]:
+    """The total of a list response and the kind of total it actually is"""
+    if mode == COUNT_ESTIMATED and counter is None and matching is not None:
+        connection = session.connection()
+        plan = connection.exec_driver_sql(*explain_statement(matching, connection.dialect)).scalar()
+        return planned_rows(plan), COUNT_ESTIMATED
+
+    statement, kind = count_statement(model, mode, counter, matching)
+    if statement is None:
+        return None, kind
+
+    row_count = session.execute(statement).scalar()
+
+    return row_count if kind == COUNT_ESTIMATED else row_count or 0, kind
+
+
+async def count_rows_async(
+    session: AsyncSession, model, mode: str = COUNT_EXACT, counter: Select = None, matching: Select = None
+) -> Tuple[Optional[int], str]:
+    if mode == COUNT_ESTIMATED and counter is None and matching is not None:
+        connection = await session.connection()
+        plan = (await connection.exec_driver_sql(*explain_statement(matching, connection.dialect))).scalar()
+        return planned_rows(plan), COUNT_ESTIMATED
+
+    statement, kind = count_statement(model, mode, counter, matching)
+    if statement is None:
+        return None, kind
+
+    row_count = (await session.execute(statement)).scalar()
+
+    return row_count if kind == COUNT_ESTIMATED else row_count or 0, kind
+
+
+def compact_row_counts(session: Session):
+    """Folds the `table_counter` deltas into one row per table, keeping the sums `exact` totals read short"""
+    session.execute(select(func.table_counter_compact()))
+
+
+def counter_deltas(session: Session) -> Dict[str, int]:
+    """The `table_counter` rows per table: one after `compact_row_counts`, then one more per writing statement"""
+    return dict(session.execute(
+        select(TableCounter.table_name, func.count()).group_by(TableCounter.table_name)
+    ).all())
@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+from typing import Iterator, List
+
+from flask import Response, stream_with_context
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
+
+from api.config import get_setting
+from api.utils.ndjson import NDJSON_MIMETYPE
+
+
+DEFAULT_EXPORT_CHUNK_SIZE = 10000
+
+EXPORT_NDJSON = 'ndjson'
+EXPORT_CSV = 'csv'
+
+EXPORT_FORMATS = (EXPORT_NDJSON, EXPORT_CSV)
+
+
+class RowStream:
+    """Lazily runs `statement` through a named server-side cursor in one REPEATABLE READ read-only snapshot
+
+    Iterating yields lists of at most EXPORT_CHUNK_SIZE rows; the session
+    stays open until the last one has been consumed. A `snapshot` opened
+    with `open_snapshot` that has already served other statements is
+    continued instead of starting a new one.
+    """
+
+    def __init__(self, session: sessionmaker, statement: Select, snapshot: Session = None):
+        self._session = session
+        self._snapshot = snapshot
+        self.statement = statement
+        self.columns = [column.key for column in statement.selected_columns]
+
+    def __iter__(self) -> Iterator[List[Row]]:
+        chunk_size = int(get_setting('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE))
+
+        session = self._snapshot or open_snapshot(self._session)
+        self._snapshot = None
+
+        with session:
+            yield from stream_chunks(session, self.statement, chunk_size)
+
+    def close(self):
+        """Ends the snapshot of a stream that will not be iterated"""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+
+def open_snapshot(session_factory: sessionmaker, **kwargs) -> Session:
+    """Begins a session on a REPEATABLE READ read-only snapshot, `kwargs` go to `session_factory`
+
+    The snapshot is taken by the first statement, so every statement of the
+    session sees the same data. Closing the session ends it.
+    """
+    session = session_factory(**kwargs)
+    session.begin()
+    # Isolation has to be set before the transaction issues its first statement
+    session.connection(execution_options={
+        'isolation_level': 'REPEATABLE READ',
+        'postgresql_readonly': True
+    })
+
+    return session
+
+
+def stream_chunks(session: Session, statement: Select, chunk_size: int) -> Iterator[List[Row]]:
+    """Runs `statement` through a server-side cursor, fetching and yielding `chunk_size` rows at a time"""
+    # `yield_per` only applies to ORM entities before SQLAlchemy 1.4.40, Core rows
+    # would be fetched one by one after psycopg2 had buffered the whole result
+    result = session.execute(statement.execution_options(stream_results=True, max_row_buffer=chunk_size))
+
+    return result.partitions(chunk_size)
+
+
+def encode_ndjson(rows: RowStream) -> Iterator[str]:
+    for chunk in rows:
+        yield ''.join(json.dumps(row._asdict()) + '\n' for row in chunk)
+
+
+def encode_csv(rows: RowStream) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    writer.writerow(rows.columns)
+    for chunk in rows:
+        writer.writerows(chunk)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Only the header is left over when there were no rows at all
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+ENCODERS = {
+    EXPORT_NDJSON: (encode_ndjson, NDJSON_MIMETYPE),
+    EXPORT_CSV: (encode_csv, 'text/csv'),
+}
+
+
+def export_response(rows: RowStream, export_format: str, filename: str) -> Response:
+    """Streams `rows` to the client in `export_format` without buffering the whole result"""
+    encode, mimetype = ENCODERS[export_format]
+
+    return Response(
+        stream_with_context(encode(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
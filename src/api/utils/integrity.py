@@ -0,0 +1,20 @@
+from psycopg2 import errorcodes
+from sqlalchemy.exc import IntegrityError
+
+from api.exceptions import AlreadyExistsException, DoesNotExistException
+
+
+def integrity_exception(e: IntegrityError, already_exists: str, missing_parent: str = None) -> Exception:
+    """The AppException a failed create or update answers with, `e` itself for any other violation
+
+    The SQLSTATE is read from `pgcode`, which psycopg2 errors and SQLAlchemy's
+    asyncpg adapter errors both carry, so both stacks map violations alike.
+    """
+    pgcode = getattr(e.orig, 'pgcode', None)
+
+    if pgcode == errorcodes.UNIQUE_VIOLATION:
+        return AlreadyExistsException(already_exists)
+    if pgcode == errorcodes.FOREIGN_KEY_VIOLATION and missing_parent is not None:
+        return DoesNotExistException(missing_parent)
+
+    return e
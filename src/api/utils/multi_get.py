@@ -0,0 +1,20 @@
+from typing import Hashable, List, Sequence, Tuple
+
+from sqlalchemy.engine import Row
+
+
+MULTI_GET_MAX_KEYS = 100
+
+# Query string arguments turning a list GET into a multi-get
+MULTI_GET_KEYS = ('ids', 'names')
+
+
+def in_requested_order(rows: Sequence[Row], keys: Sequence[Hashable], key: str) -> Tuple[List[Row], list]:
+    """`rows` in the order their keys were requested, and the requested keys that no row matched
+
+    Keys requested more than once are answered once, at their first position.
+    """
+    found = {getattr(row, key): row for row in rows}
+    keys = dict.fromkeys(keys)
+
+    return [found[value] for value in keys if value in found], [value for value in keys if value not in found]
@@ -0,0 +1,104 @@
+import json
+from typing import IO, Iterable, Iterator, List, Tuple
+
+from flask import request
+from marshmallow import Schema, ValidationError
+
+from api.config import get_setting
+from api.exceptions import PayloadTooLargeException, ValidationException
+
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+READ_SIZE = 64 * 1024
+
+DEFAULT_MAX_BODY_SIZE = 1024 ** 3
+DEFAULT_MAX_LINE_SIZE = 1024 ** 2
+DEFAULT_STREAM_CHUNK_SIZE = 10000
+
+
+def iter_ndjson(
+    stream: IO[bytes], max_size: int, max_line_size: int = DEFAULT_MAX_LINE_SIZE
+) -> Iterator[Tuple[int, dict]]:
+    """Parses newline-delimited JSON incrementally, yielding `(line_number, record)` pairs
+
+    Only the current read buffer and one partial line, at most `max_line_size`
+    bytes, are held in memory.
+    """
+    read_size = 0
+    line_number = 0
+    # The unfinished line grows in place instead of being copied again with every read
+    tail = bytearray()
+
+    while True:
+        chunk = stream.read(READ_SIZE)
+        read_size += len(chunk)
+        if read_size > max_size:
+            raise PayloadTooLargeException(f'Request body is larger than {max_size} bytes!')
+
+        first, *rest = chunk.split(b'\n')
+        tail += first
+        if len(tail) > max_line_size:
+            raise PayloadTooLargeException(f'Line {line_number + 1}: longer than {max_line_size} bytes!')
+
+        lines = []
+        # A newline completes the unfinished line, and so does the end of the stream
+        if rest or not chunk:
+            lines = [bytes(tail), *rest[:-1]]
+            tail = bytearray(rest[-1] if rest else b'')
+
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_size:
+                raise PayloadTooLargeException(f'Line {line_number}: longer than {max_line_size} bytes!')
+
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValidationException(f'Line {line_number}: invalid JSON!')
+
+            if not isinstance(record, dict):
+                raise ValidationException(f'Line {line_number}: expected a JSON object!')
+
+            yield line_number, record
+
+        if not chunk:
+            return
+
+
+def load_in_chunks(records: Iterable[Tuple[int, dict]], schema: Schema, chunk_size: int) -> Iterator[List[dict]]:
+    """Validates `records` with `schema` `chunk_size` at a time, yielding lists of loaded rows"""
+    chunk = []
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield _load_chunk(chunk, schema)
+            chunk = []
+
+    if chunk:
+        yield _load_chunk(chunk, schema)
+
+
+def _load_chunk(chunk: List[Tuple[int, dict]], schema: Schema) -> List[dict]:
+    try:
+        return schema.load([record for _, record in chunk], many=True)
+    except ValidationError as e:
+        index, messages = next(iter(e.messages.items()))
+        raise ValidationException(f'Line {chunk[index][0]}: {messages}')
+
+
+def request_chunks(schema: Schema) -> Iterator[List[dict]]:
+    """Streams the current request's NDJSON body as validated chunks of BULK_STREAM_CHUNK_SIZE rows"""
+    max_size = int(get_setting('BULK_MAX_BODY_SIZE', DEFAULT_MAX_BODY_SIZE))
+    max_line_size = int(get_setting('BULK_MAX_LINE_SIZE', DEFAULT_MAX_LINE_SIZE))
+    chunk_size = int(get_setting('BULK_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE))
+
+    # Declared sizes are rejected before anything is read, chunked bodies are counted while parsing
+    if request.content_length is not None and request.content_length > max_size:
+        raise PayloadTooLargeException(f'Request body is larger than {max_size} bytes!')
+
+    return load_in_chunks(iter_ndjson(request.stream, max_size, max_line_size), schema, chunk_size)
@@ -0,0 +1,136 @@
+from collections import Counter
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.config import get_setting
+
+
+QUERY_BUDGET_OFF = 'off'
+QUERY_BUDGET_WARN = 'warn'
+QUERY_BUDGET_RAISE = 'raise'
+
+QUERY_BUDGET_MODES = (QUERY_BUDGET_OFF, QUERY_BUDGET_WARN, QUERY_BUDGET_RAISE)
+
+DEFAULT_REPEAT_THRESHOLD = 3
+
+T = TypeVar('T')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more statements than its endpoint allows, or repeated one N+1 style"""
+
+
+def query_budget(max_queries: int):
+    """Declares how many statements a resource method may run per request
+
+    Must be the outermost decorator so the budget is visible on the method the resource exposes.
+    """
+    def outer(f):
+        f.query_budget = max_queries
+        return f
+    return outer
+
+
+def budget_chunks(chunks: Iterable[T]) -> Iterator[T]:
+    """Iterates the chunks of a loop that runs the same statements for every chunk
+
+    Only the first chunk's statements count against the endpoint's budget and
+    go through the repeat detector: the extra rounds grow with the size of a
+    bulk request, they are no N+1. They are still counted in X-Query-Count.
+    """
+    recording = has_request_context() and 'statements' in g
+
+    try:
+        for index, chunk in enumerate(chunks):
+            if recording:
+                g.query_chunk = index > 0
+            yield chunk
+    finally:
+        if recording:
+            g.query_chunk = False
+
+
+def track_query_budgets(app: Flask, engines: Iterable[Engine]):
+    """Counts the statements of every request and checks them against the endpoint's `query_budget`"""
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _record_statement)
+
+    app.before_request(_start_recording)
+    app.after_request(_check_budget)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'statements' in g:
+        if g.query_chunk:
+            g.chunk_statements += 1
+        else:
+            g.statements.append(statement)
+
+
+def _start_recording():
+    g.statements = []
+    g.chunk_statements = 0
+    g.query_chunk = False
+
+
+def _check_budget(response: Response) -> Response:
+    check = _budget_check()
+
+    if response.is_streamed:
+        # Streamed bodies run their statements after this hook: they are checked once the body has been sent
+        response.response = _checked_stream(response.response, g.statements, check)
+        return response
+
+    statements = g.pop('statements', [])
+    response.headers['X-Query-Count'] = str(len(statements) + g.pop('chunk_statements', 0))
+
+    check(statements)
+
+    return response
+
+
+def _checked_stream(body: Iterable, statements: List[str], check: Callable[[List[str]], None]) -> Iterator:
+    yield from body
+
+    check(statements)
+
+
+def _budget_check() -> Callable[[List[str]], None]:
+    # Everything is read now: a streamed body is checked once the request's contexts are gone
+    where = f'{request.method} {request.path}'
+    budget = _endpoint_budget()
+    threshold = int(get_setting('QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD))
+    mode = get_setting('QUERY_BUDGET_MODE')
+    logger = current_app.logger
+
+    def check(statements: List[str]):
+        problems = []
+
+        if budget is not None and len(statements) > budget:
+            problems.append(f'{len(statements)} queries, the budget is {budget}')
+
+        # Statements are compiled with placeholders, so equal strings are the same query shape
+        for statement, count in Counter(statements).items():
+            if count >= threshold:
+                problems.append(f'N+1: {count} x {statement}')
+
+        if not problems:
+            return
+
+        message = f'{where}: ' + '; '.join(problems)
+        if mode == QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message)
+
+    return check
+
+
+def _endpoint_budget() -> Optional[int]:
+    view = current_app.view_functions.get(request.endpoint)
+    method = getattr(getattr(view, 'view_class', None), request.method.lower(), None)
+
+    return getattr(method, 'query_budget', None)
@@ -0,0 +1,80 @@
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator, Sequence
+
+from flask import Response, has_request_context, request
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.config import get_setting
+
+
+DEFAULT_STICKY_SECONDS = 5
+
+READ_ONLY = 'read_only'
+STICKY_COOKIE = 'primary_until'
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# The ASGI stack has no Flask request: its middleware records the client's sticky window here
+sticky_until: ContextVar[float] = ContextVar('sticky_until', default=0.0)
+
+
+class RoutingSession(Session):
+    """Session that sends sessions opened with `read_only` to a replica and everything else to the primary"""
+
+    def __init__(self, *args, replicas: Sequence[Engine] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self._replicas = replicas
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._replicas and self.info.get(READ_ONLY) and not is_sticky_to_primary():
+            # Keep every statement of the session on the same replica
+            if self._replica is None:
+                self._replica = random.choice(self._replicas)
+            return self._replica
+
+        return super().get_bind(mapper, clause, **kwargs)
+
+
+@contextmanager
+def read_only(session_factory: sessionmaker) -> Iterator[Session]:
+    """Works like `session_factory.begin()` for sessions that only read and may be served by a replica"""
+    with session_factory(info={READ_ONLY: True}) as session, session.begin():
+        yield session
+
+
+@asynccontextmanager
+async def read_only_async(session_factory: sessionmaker) -> AsyncIterator[AsyncSession]:
+    """`read_only` for AsyncSession factories built with `sync_session_class=RoutingSession`"""
+    async with session_factory(info={READ_ONLY: True}) as session, session.begin():
+        yield session
+
+
+def parse_sticky_cookie(value: str) -> float:
+    """The time the STICKY_COOKIE `value` keeps its client on the primary until, 0 when it is malformed"""
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+
+def is_sticky_to_primary() -> bool:
+    """Tells whether the current client wrote recently enough that a lagging replica could miss it"""
+    if has_request_context():
+        return parse_sticky_cookie(request.cookies.get(STICKY_COOKIE)) > time.time()
+
+    return sticky_until.get() > time.time()
+
+
+def stick_to_primary(response: Response) -> Response:
+    """`after_request` hook that pins the client to the primary for REPLICA_STICKY_SECONDS after a write"""
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        seconds = int(get_setting('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS))
+        response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True)
+
+    return response
@@ -1,10 +1,10 @@
-def serialize_response(schema, code):
+def serialize_response(schema, code, empty_code=None):
     def outer(f):
         def inner(*args, **kwargs):
             result = f(*args, **kwargs)
-            if schema is not None:
+            if schema is not None and result is not None:
                 serialized_response = schema.dump(result)
                 return serialized_response, code
-            return '', code
+            return '', empty_code or code
         return inner
     return outer
@@ -0,0 +1,25 @@
+from sqlalchemy import func
+from sqlalchemy.sql import ColumnElement
+
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_LENGTH = 255
+
+LIKE_ESCAPE = '/'
+
+
+def like_pattern(q: str) -> str:
+    """`ILIKE` pattern matching names that contain `q`, with LIKE wildcards in `q` taken literally"""
+    for character in (LIKE_ESCAPE, '%', '_'):
+        q = q.replace(character, LIKE_ESCAPE + character)
+
+    return f'%{q}%'
+
+
+def name_matches(column: ColumnElement, q: str) -> ColumnElement:
+    """Names containing `q`, case-insensitively: a lookup of `q`'s trigrams in the column's GIN index"""
+    return column.ilike(like_pattern(q), escape=LIKE_ESCAPE)
+
+
+def similarity(column: ColumnElement, q: str) -> ColumnElement:
+    return func.similarity(column, q)
@@ -0,0 +1,13 @@
+from typing import Tuple
+
+
+SORT_DESCENDING_PREFIX = '-'
+
+
+def sort_modes(*columns: str) -> Tuple[str, ...]:
+    """`?sort=` values for `columns`: the column name sorts ascending, prefixed with `-` descending"""
+    return tuple(columns) + tuple(SORT_DESCENDING_PREFIX + column for column in columns)
+
+
+def is_descending(sort: str) -> bool:
+    return sort.startswith(SORT_DESCENDING_PREFIX)
@@ -0,0 +1,40 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+
+class StatementCacheStats:
+    """Counts how many executed statements were found in the engine's compiled cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, 'cache_hit', None)
+
+        with self._lock:
+            if cache_hit is CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CACHE_MISS:
+                self.misses += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def track_statement_cache(engine: Engine, stats: StatementCacheStats = statement_cache_stats):
+    event.listen(engine, 'after_cursor_execute', stats.record)
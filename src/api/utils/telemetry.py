@@ -0,0 +1,166 @@
+import bisect
+import logging
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterable
+
+from flask import Flask, Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DEFAULT_SLOW_THRESHOLD_MS = 200
+DEFAULT_SAMPLE_RATE = 0.05
+
+# Upper bounds of the request duration histogram buckets, the last bucket is unbounded
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+MAX_FINGERPRINTS = 1000
+OTHER_FINGERPRINT = 'other'
+
+TELEMETRY_EXTENSION = 'query_telemetry'
+
+# A context variable rather than `g`: the statement listeners check it on every statement
+_request_sampled_at = ContextVar('request_sampled_at', default=None)
+
+_WHITESPACE = re.compile(r'\s+')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\$\d+|\?|\b\d+(?:\.\d+)?\b")
+_REPEATED_ROWS = re.compile(r'(\(\?(?:, \?)*\))(?:, \1)+')
+_REPEATED_VALUES = re.compile(r'\?(?:, \?)+')
+
+
+@lru_cache(maxsize=MAX_FINGERPRINTS)
+def fingerprint(statement: str) -> str:
+    """Shape of `statement`: literals and placeholders become `?`, repeated rows and lists collapse to `...`"""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _LITERALS.sub('?', statement)
+    statement = _REPEATED_ROWS.sub(r'\1, ...', statement)
+
+    return _REPEATED_VALUES.sub('?, ...', statement)
+
+
+class QueryTelemetry:
+    """Logs slow statements and aggregates sampled statement timings by fingerprint and request durations by endpoint
+
+    Every statement is timed, which costs two clock reads. Fingerprints and the
+    per-endpoint histograms are only recorded for a `sample_rate` share of requests.
+    """
+
+    def __init__(
+        self,
+        slow_threshold_ms: float = DEFAULT_SLOW_THRESHOLD_MS,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        logger: logging.Logger = None
+    ):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self._logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._endpoints = {}
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # The execution context lives exactly as long as the statement, unlike `conn.info` it needs no cleanup
+        if context is not None:
+            context.query_started_at = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, 'query_started_at', None)
+        if started_at is None:
+            return
+
+        duration_ms = (time.perf_counter() - started_at) * 1000
+
+        if duration_ms >= self.slow_threshold_ms:
+            # Parameters are left out: they may hold user data and bulk payloads are huge
+            self._logger.warning('Slow query (%.1f ms): %s', duration_ms, fingerprint(statement))
+
+        if _request_sampled_at.get() is not None:
+            self.record_statement(statement, duration_ms)
+
+    def before_request(self):
+        # Always reset: a request that failed before `after_request` leaves its value behind in the thread
+        _request_sampled_at.set(time.perf_counter() if random.random() < self.sample_rate else None)
+
+    def after_request(self, response: Response) -> Response:
+        started_at = _request_sampled_at.get()
+        if started_at is not None:
+            _request_sampled_at.set(None)
+            self.record_request(f'{request.method} {request.endpoint}', (time.perf_counter() - started_at) * 1000)
+
+        return response
+
+    def record_statement(self, statement: str, duration_ms: float):
+        key = fingerprint(statement)
+
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= MAX_FINGERPRINTS:
+                    key = OTHER_FINGERPRINT
+                stats = self._statements.setdefault(key, [0, 0.0, 0.0])
+
+            stats[0] += 1
+            stats[1] += duration_ms
+            stats[2] = max(stats[2], duration_ms)
+
+    def record_request(self, endpoint: str, duration_ms: float):
+        bucket = bisect.bisect_left(HISTOGRAM_BUCKETS_MS, duration_ms)
+
+        with self._lock:
+            buckets = self._endpoints.setdefault(endpoint, [0] * (len(HISTOGRAM_BUCKETS_MS) + 1))
+            buckets[bucket] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)
+            endpoints = {endpoint: list(buckets) for endpoint, buckets in self._endpoints.items()}
+
+        bounds = [str(bound) for bound in HISTOGRAM_BUCKETS_MS] + ['inf']
+
+        return {
+            'statements': [
+                {'fingerprint': key, 'count': count, 'total_ms': round(total, 3), 'max_ms': round(longest, 3)}
+                for key, (count, total, longest) in statements
+            ],
+            'endpoints': {
+                endpoint: {'count': sum(buckets), 'buckets_ms': dict(zip(bounds, buckets))}
+                for endpoint, buckets in endpoints.items()
+            }
+        }
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._endpoints = {}
+
+
+def track_query_telemetry(app: Flask, engines: Iterable[Engine]) -> QueryTelemetry:
+    """Attaches a QueryTelemetry configured by QUERY_SLOW_THRESHOLD_MS and QUERY_SAMPLE_RATE to the app and engines
+
+    The settings are read once here: the listeners run for every statement and stay clear of config lookups.
+    """
+    def setting(key, default):
+        value = app.config.get(key)
+        return float(default if value is None else value)
+
+    telemetry = QueryTelemetry(
+        setting('QUERY_SLOW_THRESHOLD_MS', DEFAULT_SLOW_THRESHOLD_MS),
+        setting('QUERY_SAMPLE_RATE', DEFAULT_SAMPLE_RATE),
+        app.logger
+    )
+    app.extensions[TELEMETRY_EXTENSION] = telemetry
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', telemetry.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', telemetry.after_cursor_execute)
+
+    app.before_request(telemetry.before_request)
+    app.after_request(telemetry.after_request)
+
+    return telemetry
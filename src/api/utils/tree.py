@@ -0,0 +1,94 @@
+import json
+from typing import Iterable, Iterator, List, Optional
+
+from flask import Response, stream_with_context
+from sqlalchemy.engine import Row
+
+from api.config import get_setting
+
+
+DEFAULT_TREE_MAX_NODES = 100000
+
+TREE_DEPTH_ACCOUNT = 0
+TREE_DEPTH_MALLS = 1
+TREE_DEPTH_UNITS = 2
+
+
+def tree_max_nodes(max_nodes: Optional[int] = None) -> int:
+    """`max_nodes` asked for by the client, capped by the TREE_MAX_NODES setting"""
+    ceiling = int(get_setting('TREE_MAX_NODES', DEFAULT_TREE_MAX_NODES))
+
+    return ceiling if max_nodes is None else min(max_nodes, ceiling)
+
+
+def _node(node_id: int, name: str) -> str:
+    # Same output as dumping the dict, without walking a dict for every one of possibly 100k nodes
+    return f'{{"id": {node_id}, "name": {json.dumps(name)}}}'
+
+
+def encode_tree(account: dict, rows: Optional[Iterable[List[Row]]], max_nodes: int) -> Iterator[str]:
+    """Streams the account as one JSON object with its malls and, nested in them, their units
+
+    `rows` are chunks of `(mall_id, mall_name)` or, for units, of
+    `(mall_id, mall_name, unit_id, unit_name)` rows ordered by mall and unit
+    id, as returned by a LEFT OUTER JOIN of malls to units. No `rows` means
+    the malls were not asked for. At most `max_nodes` malls and units are
+    emitted; `truncated` at the end of the object tells whether some were left out.
+    """
+    head = json.dumps(account)[:-1]
+    if rows is None:
+        yield head + ', "truncated": false}'
+        return
+
+    yield head + ', "malls": ['
+
+    nodes = 0
+    truncated = False
+    mall_id = None
+    with_units = False
+
+    for chunk in rows:
+        parts = []
+
+        for row in chunk:
+            if row.mall_id != mall_id:
+                if nodes == max_nodes:
+                    truncated = True
+                    break
+
+                if mall_id is not None:
+                    parts.append(']}, ' if with_units else '}, ')
+
+                with_units = 'unit_id' in row._fields
+                mall_id = row.mall_id
+                nodes += 1
+
+                parts.append(_node(row.mall_id, row.mall_name)[:-1])
+                if with_units:
+                    parts.append(', "units": [')
+                    first_unit = True
+
+            # Malls without units are joined to a single row of NULLs
+            if with_units and row.unit_id is not None:
+                if nodes == max_nodes:
+                    truncated = True
+                    break
+
+                nodes += 1
+
+                parts.append(('' if first_unit else ', ') + _node(row.unit_id, row.unit_name))
+                first_unit = False
+
+        if parts:
+            yield ''.join(parts)
+
+        if truncated:
+            break
+
+    tail = '' if mall_id is None else (']}' if with_units else '}')
+
+    yield tail + '], "truncated": ' + json.dumps(truncated) + '}'
+
+
+def tree_response(chunks: Iterator[str]) -> Response:
+    return Response(stream_with_context(chunks), mimetype='application/json')
@@ -0,0 +1,6 @@
+from api.aio.app import create_asgi_app
+from api.config import get_config_class
+
+
+config_class = get_config_class('../.env')
+app = create_asgi_app(config_class)
@@ -0,0 +1,132 @@
+"""Reading an account with 1k malls and 100k units: one request per node vs the streamed tree
+
+The per-node baseline is what a client had to do before `GET /api/accounts/<id>/tree`:
+page through the account's malls, then fetch every mall with its units. The
+tree runs the account lookup and one joined statement whose rows are encoded
+as they arrive. SQLite has no REPEATABLE READ, so both statements of the tree
+run in a plain transaction here rather than in get_tree's snapshot.
+Usage from src/: python -m benchmarks.account_tree
+"""
+import json
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.queries.account import tree_account_statement, tree_statement
+from api.repositories.account import AccountRepository
+from api.repositories.mall import MallRepository
+from api.utils.export import stream_chunks, DEFAULT_EXPORT_CHUNK_SIZE
+from api.utils.tree import encode_tree, TREE_DEPTH_UNITS
+
+
+MALLS = 1000
+UNITS_PER_MALL = 100
+CHILDREN_LIMIT = 100
+MAX_NODES = MALLS * (UNITS_PER_MALL + 1)
+
+
+def populate(session_factory) -> int:
+    with session_factory.begin() as session:
+        account = Account(name='account')
+        session.add(account)
+        session.flush()
+
+        session.execute(insert(Mall), [{'name': f'mall_{i}', 'account_id': account.id} for i in range(MALLS)])
+        mall_ids = [mall_id for mall_id, in session.query(Mall.id).order_by(Mall.id)]
+        session.execute(insert(Unit), [
+            {'name': f'unit_{mall_id}_{i}', 'mall_id': mall_id} for mall_id in mall_ids for i in range(UNITS_PER_MALL)
+        ])
+
+    return account.id
+
+
+def per_node(account_repository, mall_repository, account_id) -> str:
+    account = account_repository.get(account_id, CHILDREN_LIMIT)
+    malls = list(account['malls'])
+
+    while account['next_children_cursor'] is not None:
+        account = account_repository.get(account_id, CHILDREN_LIMIT, account['next_children_cursor'])
+        malls.extend(account['malls'])
+
+    tree = {'id': account['id'], 'name': account['name'], 'malls': []}
+    for mall in malls:
+        mall = mall_repository.get(mall.id, CHILDREN_LIMIT)
+        units = list(mall['units'])
+
+        while mall['next_children_cursor'] is not None:
+            mall = mall_repository.get(mall['id'], CHILDREN_LIMIT, mall['next_children_cursor'])
+            units.extend(mall['units'])
+
+        tree['malls'].append({
+            'id': mall['id'],
+            'name': mall['name'],
+            'units': [{'id': unit.id, 'name': unit.name} for unit in units]
+        })
+
+    return json.dumps(tree)
+
+
+def streamed(session_factory, account_id) -> str:
+    with session_factory.begin() as session:
+        account = session.execute(tree_account_statement(account_id)).first()
+        rows = tree_statement(account_id, TREE_DEPTH_UNITS, MAX_NODES)
+        chunks = stream_chunks(session, rows, DEFAULT_EXPORT_CHUNK_SIZE)
+
+        return ''.join(encode_tree(account._asdict(), chunks, MAX_NODES))
+
+
+def measure(call):
+    started_at = time.perf_counter()
+    body = call()
+    seconds = time.perf_counter() - started_at
+
+    # A second run for the memory peak: tracing allocations slows everything down
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return body, seconds, peak
+
+
+def main():
+    engine = create_engine('sqlite://')
+    db.Model.metadata.create_all(engine)
+    session_factory = sessionmaker(engine, expire_on_commit=False)
+    account_id = populate(session_factory)
+
+    account_repository = AccountRepository(session=session_factory)
+    mall_repository = MallRepository(session=session_factory)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'after_cursor_execute', count)
+
+    bodies = []
+    for name, call in (
+        ('per node', lambda: per_node(account_repository, mall_repository, account_id)),
+        ('tree', lambda: streamed(session_factory, account_id)),
+    ):
+        statements.clear()
+        body, seconds, peak = measure(call)
+        # `measure` made the calls twice
+        del statements[len(statements) // 2:]
+        bodies.append(json.loads(body))
+        print(f'{name:9} {seconds * 1000:9.1f} ms  {len(statements):5} statements  peak {peak / 2 ** 20:6.1f} MiB')
+
+    # Both read the same hierarchy
+    bodies[1].pop('truncated')
+    assert bodies[0] == bodies[1]
+
+
+if __name__ == '__main__':
+    main()
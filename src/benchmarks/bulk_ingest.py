@@ -0,0 +1,72 @@
+"""Rows per second of a bulk unit create: bulk_insert_mappings vs INSERT ... RETURNING vs COPY
+
+Needs PostgreSQL, COPY FROM STDIN is psycopg2's; point it at a scratch
+database, e.g. from src/:
+    python -m benchmarks.bulk_ingest postgresql://user@localhost/bench --rows 100000
+Every method inserts the same rows into the unit table inside a transaction
+that is rolled back afterwards, so runs do not grow the table. Counter
+triggers fire as they do in production.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.utils.bulk_ingest import copy_rows, insert_returning
+
+
+DEFAULT_ROWS = 100_000
+DEFAULT_REPEAT = 3
+
+
+def populate(engine) -> int:
+    db.Model.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        mall_id = connection.execute(select(Mall.id).limit(1)).scalar()
+        if mall_id is not None:
+            return mall_id
+
+        account_id = connection.execute(insert(Account).values(name='account').returning(Account.id)).scalar()
+        return connection.execute(insert(Mall).values(name='mall', account_id=account_id).returning(Mall.id)).scalar()
+
+
+def measure(session_factory, insert_rows, rows) -> float:
+    with session_factory() as session:
+        started_at = time.perf_counter()
+        insert_rows(session, rows)
+        session.flush()
+        seconds = time.perf_counter() - started_at
+        session.rollback()
+
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    mall_id = populate(engine)
+    session_factory = sessionmaker(engine)
+    rows = [{'name': f'bench_unit_{i}', 'mall_id': mall_id} for i in range(args.rows)]
+
+    for name, insert_rows in (
+        ('bulk_insert_mappings', lambda session, rows: session.bulk_insert_mappings(Unit, rows)),
+        ('INSERT ... RETURNING', lambda session, rows: insert_returning(session, Unit, rows)),
+        ('COPY', lambda session, rows: copy_rows(session, Unit, ('name', 'mall_id'), rows)),
+    ):
+        seconds = min(measure(session_factory, insert_rows, rows) for _ in range(args.repeat))
+        print(f'{name:21} {args.rows / seconds:10.0f} rows/s  {seconds:7.2f} s for {args.rows} rows')
+
+
+if __name__ == '__main__':
+    main()
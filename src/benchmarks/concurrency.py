@@ -0,0 +1,74 @@
+"""Throughput and latency of a server under a fixed number of in-flight requests
+
+Point it at the WSGI deployment (main.py behind a WSGI server) and at the ASGI
+one (`uvicorn asgi:app`) started against the same database, e.g. from src/:
+
+    python -m benchmarks.concurrency http://localhost:5000 http://localhost:8000 --path /api/units/1
+
+Each base URL is driven by --concurrency workers that issue the next request as
+soon as their previous one completes, until --requests have been sent.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+DEFAULT_CONCURRENCY = 1000
+DEFAULT_REQUESTS = 20000
+TIMEOUT_SECONDS = 60
+
+
+async def run(base_url: str, path: str, concurrency: int, requests: int) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=TIMEOUT_SECONDS) as client:
+        async def worker():
+            nonlocal errors
+
+            for _ in remaining:
+                started_at = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        seconds = time.perf_counter() - started_at
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float('nan')] * 99
+
+    return {
+        'requests_per_second': len(latencies) / seconds,
+        'p50_ms': quantiles[49] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base_urls', nargs='+')
+    parser.add_argument('--path', default='/api/accounts/?per_page=20&count=none')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    args = parser.parse_args()
+
+    for base_url in args.base_urls:
+        result = asyncio.run(run(base_url, args.path, args.concurrency, args.requests))
+        print(
+            f'{base_url:28} {result["requests_per_second"]:8.0f} req/s  p50 {result["p50_ms"]:8.1f} ms'
+            f'  p99 {result["p99_ms"]:8.1f} ms  errors {result["errors"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Microbenchmark of the get-by-id repository path: legacy Query vs cached lambda statement
+
+Runs against in-memory SQLite so that statement construction and compilation,
+not the database round trip, dominate. Usage from src/: python -m benchmarks.get_by_id
+"""
+import timeit
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.repositories.mall import MallRepository
+from api.utils.statement_cache import StatementCacheStats, track_statement_cache
+
+
+NUMBER = 5000
+
+
+def query_get(session_factory, mall_id):
+    # The statement building that MallRepository.get did before lambda statements
+    with session_factory.begin() as session:
+        return session.query(Mall).options(joinedload('units')).get(mall_id)
+
+
+def main():
+    engine = create_engine('sqlite://')
+    db.Model.metadata.create_all(engine)
+    session_factory = sessionmaker(engine, expire_on_commit=False)
+
+    with session_factory.begin() as session:
+        account = Account(name='account')
+        mall = Mall(name='mall', account=account)
+        session.add_all([account, mall, Unit(name='unit', mall=mall)])
+    mall_id = mall.id
+
+    repository = MallRepository(session=session_factory)
+    stats = StatementCacheStats()
+    track_statement_cache(engine, stats)
+
+    for name, call in (
+        ('Query.get', lambda: query_get(session_factory, mall_id)),
+        ('lambda_stmt', lambda: repository.get(mall_id)),
+    ):
+        stats.reset()
+        seconds = min(timeit.repeat(call, number=NUMBER, repeat=3))
+        print(f'{name:12} {seconds / NUMBER * 1e6:8.1f} us/call  cache hits {stats.hits} misses {stats.misses}')
+
+
+if __name__ == '__main__':
+    main()
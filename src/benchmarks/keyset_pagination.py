@@ -0,0 +1,107 @@
+"""Latency of unit list page 1 vs page 10,000: OFFSET pages vs keyset cursors
+
+Times UnitRepository.get_list at both depths, once with `page` (OFFSET) and
+once with the `cursor` that leads to the same page (`id > last_id`). Runs
+against in-memory SQLite by default; pass a PostgreSQL URL for numbers that
+match production, e.g. from src/:
+    python -m benchmarks.keyset_pagination postgresql://user@localhost/bench --units 10000000
+The first run against a database creates the schema and seeds the units;
+later runs reuse them.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.repositories.unit import UnitRepository
+from api.utils.counting import COUNT_NONE
+
+
+DEFAULT_UNITS = 1_000_000
+DEFAULT_REPEAT = 50
+DEPTHS = (1, 10_000)
+UNITS_PER_MALL = 1000
+INSERT_CHUNK_SIZE = 10_000
+PER_PAGE = 20
+
+
+def populate(engine, units: int):
+    db.Model.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(Unit)).scalar():
+            return
+
+        account_id = connection.execute(insert(Account).values(name='account')).inserted_primary_key[0]
+        malls = max(units // UNITS_PER_MALL, 1)
+        connection.execute(insert(Mall), [{'name': f'mall_{i}', 'account_id': account_id} for i in range(malls)])
+        mall_id = connection.execute(select(func.min(Mall.id))).scalar()
+
+        for start in range(0, units, INSERT_CHUNK_SIZE):
+            connection.execute(insert(Unit), [
+                {'name': f'unit_{i}', 'mall_id': mall_id + i % malls}
+                for i in range(start, min(start + INSERT_CHUNK_SIZE, units))
+            ])
+
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM ANALYZE unit'))
+
+
+def cursor_before(engine, page: int):
+    # The `next_cursor` a client walking the pages would hold when asking for `page`
+    if page == 1:
+        return None
+
+    with engine.connect() as connection:
+        return connection.execute(
+            select(Unit.id).order_by(Unit.id).offset((page - 1) * PER_PAGE - 1).limit(1)
+        ).scalar()
+
+
+def measure(call, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        page = call()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return page, quantiles[49], quantiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url', nargs='?', default='sqlite://')
+    parser.add_argument('--units', type=int, default=DEFAULT_UNITS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    populate(engine, args.units)
+    repository = UnitRepository(session=sessionmaker(engine))
+
+    for page in DEPTHS:
+        cursor = cursor_before(engine, page)
+
+        pages = []
+        for name, call in (
+            ('offset', lambda: repository.get_list(page, PER_PAGE, count=COUNT_NONE)),
+            ('cursor', lambda: repository.get_list(1, PER_PAGE, cursor, count=COUNT_NONE)),
+        ):
+            result, p50, p99 = measure(call, args.repeat)
+            pages.append([unit.id for unit in result['units']])
+            print(f'page {page:6}  {name}  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms')
+
+        # Both modes read the same page
+        assert pages[0] == pages[1]
+
+
+if __name__ == '__main__':
+    main()
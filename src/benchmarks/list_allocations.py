@@ -0,0 +1,63 @@
+"""Allocations and time of one mall list page: ORM entities vs Core rows
+
+Runs against in-memory SQLite and dumps the page with MallListSchema, as the
+endpoint does. Usage from src/: python -m benchmarks.list_allocations
+"""
+import timeit
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.repositories.mall import MallRepository
+from api.schemas.mall import MallListSchema
+from api.utils.counting import COUNT_NONE
+
+
+PER_PAGE = 50
+NUMBER = 1000
+
+
+def orm_page(session_factory):
+    # What MallRepository.get_list loaded before it switched to Core rows
+    with session_factory.begin() as session:
+        return session.query(Mall).options(joinedload('account')).order_by(Mall.id).limit(PER_PAGE + 1).all()
+
+
+def peak_allocated(call) -> int:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak - baseline
+
+
+def main():
+    engine = create_engine('sqlite://')
+    db.Model.metadata.create_all(engine)
+    session_factory = sessionmaker(engine, expire_on_commit=False)
+
+    with session_factory.begin() as session:
+        account = Account(name='account')
+        session.add_all([account] + [Mall(name=f'mall_{i}', account=account) for i in range(PER_PAGE * 2)])
+
+    repository = MallRepository(session=session_factory)
+    schema = MallListSchema()
+
+    for name, call in (
+        ('ORM entities', lambda: schema.dump({'malls': orm_page(session_factory)[:PER_PAGE]})),
+        ('Core rows', lambda: schema.dump(repository.get_list(1, PER_PAGE, count=COUNT_NONE))),
+    ):
+        call()
+        seconds = min(timeit.repeat(call, number=NUMBER, repeat=3))
+        print(f'{name:13} {seconds / NUMBER * 1e6:8.1f} us/page  peak {peak_allocated(call) / 1024:6.1f} KiB/page')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Latency of `?q=` name search over a 10M-row unit table, with and without the trigram index
+
+Needs PostgreSQL with pg_trgm; point it at a scratch database, e.g. from src/:
+    python -m benchmarks.name_search postgresql://user@localhost/bench --units 10000000
+The first run creates the schema and seeds the units server-side with
+generate_series, which takes minutes at 10M rows; later runs reuse them.
+Every search is timed through UnitRepository.get_list, then its statement is
+run once more with index scans disabled: what the same ILIKE costs without
+the index.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.repositories.unit import UnitRepository
+from api.utils.counting import COUNT_EXACT, COUNT_NONE
+
+
+DEFAULT_UNITS = 10_000_000
+DEFAULT_REPEAT = 20
+UNITS_PER_MALL = 1000
+PER_PAGE = 20
+
+
+def populate(engine, units: int):
+    db.Model.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        if connection.execute(text('SELECT EXISTS (SELECT FROM unit)')).scalar():
+            return
+
+        malls = max(units // UNITS_PER_MALL, 1)
+        account_id = connection.execute(insert(Account).values(name='account').returning(Account.id)).scalar()
+        connection.execute(text(
+            "INSERT INTO mall (name, account_id) SELECT 'mall ' || i, :account_id FROM generate_series(1, :malls) i"
+        ), {'account_id': account_id, 'malls': malls})
+        # md5 names spread the trigrams like free-form names would, instead of sharing one prefix
+        connection.execute(text(
+            "INSERT INTO unit (name, mall_id) "
+            "SELECT 'unit ' || md5(i::text), (SELECT min(id) FROM mall) + i % :malls FROM generate_series(1, :units) i"
+        ), {'malls': malls, 'units': units})
+
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM ANALYZE unit'))
+
+
+def searches(engine, units: int) -> list:
+    with engine.connect() as connection:
+        name = connection.execute(text('SELECT name FROM unit WHERE id >= :id ORDER BY id LIMIT 1'), {
+            'id': units // 2
+        }).scalar()
+
+    digest = name.split()[1]
+    # A common trigram, a rarer substring, a single row and a miss: md5 digests have no 'z'
+    return [digest[:3], digest[:6], digest, 'zzzzzz']
+
+
+def seq_scan_ms(engine, statement: str, parameters: dict) -> float:
+    with engine.begin() as connection:
+        connection.exec_driver_sql('SET LOCAL enable_bitmapscan = off')
+        connection.exec_driver_sql('SET LOCAL enable_indexscan = off')
+
+        started_at = time.perf_counter()
+        connection.exec_driver_sql(statement, parameters).all()
+        return (time.perf_counter() - started_at) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--units', type=int, default=DEFAULT_UNITS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    populate(engine, args.units)
+    repository = UnitRepository(session=sessionmaker(engine))
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT unit.id'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+
+    for q in searches(engine, args.units):
+        for count in (COUNT_NONE, COUNT_EXACT):
+            latencies = []
+            for _ in range(args.repeat):
+                started_at = time.perf_counter()
+                page = repository.get_list(1, PER_PAGE, count=count, q=q)
+                latencies.append((time.perf_counter() - started_at) * 1000)
+
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            print(
+                f'q={q:38} count={count:5}  p50 {quantiles[49]:8.1f} ms  p99 {quantiles[98]:8.1f} ms'
+                f'  {len(page["units"]):2} rows  total {page["total"]}'
+            )
+
+        print(f'{"":40} without index   {seq_scan_ms(engine, *statements[-1]):8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
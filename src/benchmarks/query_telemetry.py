@@ -0,0 +1,167 @@
+"""Overhead of the query telemetry recorder on a request that reads a mall with its units
+
+End-to-end timings of a few hundred microseconds are too noisy to resolve a
+sub-1% difference, so the recorder's cost is measured in parts, separately for
+unsampled and sampled requests: per statement (the listeners run through the
+engine's dispatch lists on a captured execution context, as Connection runs
+them around every cursor execute) and per request (the Flask hooks). Both are
+timed directly rather than as the difference of two noisy latencies, and every
+figure is a median over many rounds, with its interquartile range. The parts
+are weighted by the sample rate and compared with the median latency
+of the same request without the recorder. SQLite answers in microseconds,
+which makes this a worst case: against PostgreSQL the round trip dwarfs the
+recorder. Usage from src/: python -m benchmarks.query_telemetry
+"""
+import statistics
+import timeit
+
+from flask import Flask, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from api.extensions import db
+from api.models.account import Account
+from api.models.mall import Mall
+from api.models.unit import Unit
+from api.repositories.mall import MallRepository
+from api.utils.telemetry import DEFAULT_SAMPLE_RATE, QueryTelemetry
+
+
+NUMBER = 5000
+REQUESTS = 500
+ROUNDS = 41
+
+
+def set_listeners(engine, telemetry, enabled):
+    for name, listener in (
+        ('before_cursor_execute', telemetry.before_cursor_execute),
+        ('after_cursor_execute', telemetry.after_cursor_execute),
+    ):
+        if enabled:
+            event.listen(engine, name, listener)
+        else:
+            event.remove(engine, name, listener)
+
+
+def summary(samples) -> tuple:
+    """Median and interquartile range"""
+    q1, median, q3 = statistics.quantiles(samples, n=4)
+    return median, q1, q3
+
+
+def captured_execution(engine) -> tuple:
+    """The arguments Connection passes to the cursor listeners for one real statement"""
+    captured = []
+
+    def capture(*args):
+        captured.append(args)
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    event.remove(engine, 'before_cursor_execute', capture)
+
+    return captured[0]
+
+
+def per_statement(app, engine, telemetry) -> tuple:
+    arguments = captured_execution(engine)
+    set_listeners(engine, telemetry, True)
+
+    def around_cursor_execute():
+        # What Connection runs around every cursor execute once listeners are attached
+        for listener in engine.dispatch.before_cursor_execute:
+            listener(*arguments)
+        for listener in engine.dispatch.after_cursor_execute:
+            listener(*arguments)
+
+    # Inside a request, so that sampled requests also pay for the fingerprint aggregation
+    try:
+        with app.test_request_context('/mall'):
+            telemetry.before_request()
+            samples = timeit.repeat(around_cursor_execute, number=NUMBER, repeat=ROUNDS)
+    finally:
+        set_listeners(engine, telemetry, False)
+
+    return summary([seconds / NUMBER for seconds in samples])
+
+
+def per_request(app, telemetry) -> tuple:
+    response = Response()
+
+    def hooks():
+        telemetry.before_request()
+        telemetry.after_request(response)
+
+    with app.test_request_context('/mall'):
+        return summary([seconds / NUMBER for seconds in timeit.repeat(hooks, number=NUMBER, repeat=ROUNDS)])
+
+
+def main():
+    engine = create_engine('sqlite://')
+    db.Model.metadata.create_all(engine)
+    session_factory = sessionmaker(engine, expire_on_commit=False)
+
+    with session_factory.begin() as session:
+        account = Account(name='account')
+        mall = Mall(name='mall', account=account)
+        session.add_all([account, mall] + [Unit(name=f'unit_{i}', mall=mall) for i in range(20)])
+    mall_id = mall.id
+
+    repository = MallRepository(session=session_factory)
+
+    app = Flask(__name__)
+
+    @app.route('/mall')
+    def get_mall():
+        repository.get(mall_id)
+        return {}
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = app.test_client()
+
+    event.listen(engine, 'after_cursor_execute', count)
+    client.get('/mall')
+    event.remove(engine, 'after_cursor_execute', count)
+    statements_per_request = len(statements)
+
+    request_seconds, _, _ = summary([
+        seconds / REQUESTS for seconds in timeit.repeat(lambda: client.get('/mall'), number=REQUESTS, repeat=ROUNDS)
+    ])
+    print(f'request without recorder {request_seconds * 1e6:8.1f} us, {statements_per_request} statements')
+
+    # A sample rate of 0 or 1 pins every request to the unsampled or the sampled path
+    costs = {}
+    for sampled in (False, True):
+        telemetry = QueryTelemetry(sample_rate=float(sampled))
+        statement_cost, hook_cost = per_statement(app, engine, telemetry), per_request(app, telemetry)
+        costs[sampled] = statement_cost, hook_cost
+
+        print(
+            f'{"sampled" if sampled else "unsampled":9} requests  {statement_cost[0] * 1e6:5.2f} us/statement'
+            f' (IQR {statement_cost[1] * 1e6:5.2f}..{statement_cost[2] * 1e6:5.2f})'
+            f' + {hook_cost[0] * 1e6:5.2f} us/request (IQR {hook_cost[1] * 1e6:5.2f}..{hook_cost[2] * 1e6:5.2f})'
+        )
+
+    for sample_rate in (DEFAULT_SAMPLE_RATE, 1.0):
+        # Median, then the upper quartiles of every part as a pessimistic bound
+        overheads = [
+            sum(
+                weight * (statement_cost[part] * statements_per_request + hook_cost[part])
+                for weight, (statement_cost, hook_cost) in ((1 - sample_rate, costs[False]), (sample_rate, costs[True]))
+            )
+            for part in (0, 2)
+        ]
+
+        print(
+            f'sample rate {sample_rate:<5} {overheads[0] * 1e6:6.2f} us = {overheads[0] / request_seconds * 100:.2f}%'
+            f' of the request (upper quartiles {overheads[1] / request_seconds * 100:.2f}%)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Requests per second of account gets as clients multiply over a fixed pool of server connections
+
+A small fixed pool (DB_POOLER=pgbouncer with DB_POOL_SIZE) stands in for
+PgBouncer: every client thread shares --server-connections connections. Ten
+times the clients may queue longer per request, but the overall rate should
+hold. Needs PostgreSQL, e.g. from src/:
+    python -m benchmarks.transaction_pooling postgresql://user@localhost/bench --clients 50 500
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from api.config import get_engine_options
+from api.extensions import db
+from api.models.account import Account
+from api.repositories.account import AccountRepository
+from api.services.account import AccountService
+
+
+DEFAULT_CLIENTS = (50, 500)
+DEFAULT_SERVER_CONNECTIONS = 10
+DEFAULT_REQUESTS = 5000
+POOL_TIMEOUT_SECONDS = 60
+
+
+def populate(engine) -> int:
+    db.Model.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        account_id = connection.execute(select(Account.id).limit(1)).scalar()
+        if account_id is not None:
+            return account_id
+
+        return connection.execute(insert(Account).values(name='account').returning(Account.id)).scalar()
+
+
+def requests_per_second(service, account_id, clients, requests) -> float:
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        accounts = list(executor.map(lambda _: service.get(account_id), range(requests)))
+    seconds = time.perf_counter() - started_at
+
+    assert [account['id'] for account in accounts] == [account_id] * requests
+
+    return requests / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--clients', type=int, nargs='+', default=DEFAULT_CLIENTS)
+    parser.add_argument('--server-connections', type=int, default=DEFAULT_SERVER_CONNECTIONS)
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, **get_engine_options({
+        'DB_POOLER': 'pgbouncer',
+        'DB_POOL_SIZE': args.server_connections,
+        'DB_POOL_TIMEOUT': POOL_TIMEOUT_SECONDS,
+    }))
+    account_id = populate(engine)
+    service = AccountService(
+        account_repository=AccountRepository(session=sessionmaker(engine, expire_on_commit=False))
+    )
+
+    # Open the pool's connections and compile the statements before timing anything
+    requests_per_second(service, account_id, args.server_connections, args.server_connections)
+
+    for clients in args.clients:
+        rate = requests_per_second(service, account_id, clients, args.requests)
+        print(f'{clients:5} clients  {rate:8.0f} req/s over {args.server_connections} server connections')
+
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,10 @@ import pytest
 
 from sqlalchemy.orm import sessionmaker
 from testing.postgresql import Postgresql
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from starlette.testclient import TestClient
 
+from api.aio.app import create_asgi_app
 from api.app import create_app
 from api.models.account import Account
 from api.models.mall import Mall
@@ -17,6 +19,7 @@ from api.services.unit import UnitService
 
 from api.extensions import db as _db
 from api.config import get_config_class
+from api.utils.query_budget import QUERY_BUDGET_RAISE
 
 
 @pytest.fixture(scope='session')
@@ -30,11 +33,36 @@ def sqlalchemy_database_url():
         yield database_url
 
 
+@pytest.fixture(scope='session')
+def replica_database_url():
+    with Postgresql() as replica_postgres:
+        dsn = replica_postgres.dsn()
+        database_url = 'postgresql://{}@{}:{}/{}'.format(
+            dsn['user'], dsn['host'], dsn['port'], dsn['database']
+        )
+
+        yield database_url
+
+
+@pytest.fixture(scope='module')
+def replica_engine(engine, replica_database_url):
+    replica_engine = create_engine(replica_database_url)
+
+    # Same schema as the primary but no replicated rows, so reads show which instance served them
+    _db.Model.metadata.create_all(replica_engine)
+
+    yield replica_engine
+
+    _db.Model.metadata.drop_all(replica_engine)
+    replica_engine.dispose()
+
+
 @pytest.fixture(scope='session')
 def app(sqlalchemy_database_url):
 
     config_class = get_config_class('../.env.test')
     config_class.SQLALCHEMY_DATABASE_URI = sqlalchemy_database_url
+    config_class.QUERY_BUDGET_MODE = QUERY_BUDGET_RAISE
 
     app = create_app(config_class)
 
@@ -83,6 +111,30 @@ def permanent_session(connection):
     yield sc_session
 
 
+@pytest.fixture(scope='function')
+def executed_statements(connection):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection, 'before_cursor_execute', before_cursor_execute)
+
+    yield statements
+
+    event.remove(connection, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture(scope='function')
+def explain(connection, session):
+    def explain_statement(statement, parameters=None):
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters or {}).scalars().all()
+        return '\n'.join(plan)
+
+    yield explain_statement
+
+
 @pytest.fixture(scope='function')
 def client(app, engine):
     client = app.test_client()
@@ -90,6 +142,13 @@ def client(app, engine):
     yield client
 
 
+@pytest.fixture(scope='module')
+def asgi_client(app, engine):
+    # The WSGI app fixture has already pointed the config class at the test database
+    with TestClient(create_asgi_app(get_config_class('../.env.test'))) as asgi_client:
+        yield asgi_client
+
+
 @pytest.fixture(scope='function')
 def account_repository(session) -> AccountRepository:
     repository = AccountRepository(
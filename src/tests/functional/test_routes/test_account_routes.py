@@ -1,7 +1,15 @@
+import json
 import pytest
 from http import HTTPStatus
 
 from api.models.account import Account
+from api.routes.account import (
+    AccountsBulkResource,
+    AccountsExportResource,
+    AccountsResource,
+    AccountResource,
+    AccountTreeResource
+)
 
 
 class TestCreate:
@@ -150,6 +158,41 @@ class TestGet:
         assert 'error' in response.json
         assert response.json['error'] == 'Account does not exist!'
 
+    def test_mall_count(self, client, permanent_account_data):
+        account_id = client.post(self.URL, json=permanent_account_data).json['id']
+        malls = [{'name': f'counted_mall_{account_id}_{i}', 'account_id': account_id} for i in range(2)]
+        mall_ids = [client.post('/api/malls/', json=mall).json['id'] for mall in malls]
+        assert client.get(self.URL + str(account_id)).json['mall_count'] == 2
+
+        client.delete(f'/api/malls/{mall_ids[0]}')
+        assert client.get(self.URL + str(account_id)).json['mall_count'] == 1
+
+    def test_children_limit(self, client, permanent_account_data):
+        account_id = client.post(self.URL, json=permanent_account_data).json['id']
+        for i in range(3):
+            client.post('/api/malls/', json={'name': f'child_mall_{account_id}_{i}', 'account_id': account_id})
+
+        response = client.get(self.URL + str(account_id) + '?children_limit=2')
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json['malls']) == 2
+        assert response.json['next_children_cursor'] is not None
+
+        response = client.get(
+            self.URL + str(account_id) + '?children_limit=2&children_cursor=' + response.json['next_children_cursor']
+        )
+
+        assert len(response.json['malls']) == 1
+        assert response.json['next_children_cursor'] is None
+
+    @pytest.mark.parametrize('query', ['children_limit=0', 'children_limit=101', 'children_cursor=invalid'])
+    def test_with_invalid_children_args(self, client, permanent_account_data, query):
+        account_id = client.post(self.URL, json=permanent_account_data).json['id']
+
+        response = client.get(self.URL + str(account_id) + '?' + query)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
 
 class TestGetList:
     URL = '/api/accounts/'
@@ -175,6 +218,89 @@ class TestGetList:
         assert response.json['errors']['querystring']['per_page'] == \
                ['Must be greater than or equal to 1 and less than or equal to 50.']
 
+    def test_with_invalid_cursor(self, client):
+        response = client.get(
+            '{}?cursor={}'.format(self.URL, 'not-a-cursor')
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json['errors']['querystring']['cursor'] == ['Invalid cursor!']
+
+    def test_with_cursor(self, client, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        response = client.get('{}?per_page={}'.format(self.URL, 1))
+        assert response.status_code == HTTPStatus.OK
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(
+                '{}?per_page={}&cursor={}'.format(self.URL, 1, response.json['next_cursor'])
+            )
+            assert response.status_code == HTTPStatus.OK
+
+        assert response.json['accounts'][0]['id'] == account_id
+
+    @pytest.mark.parametrize('sort', ('mall_count', '-mall_count'))
+    def test_sorted(self, client, sort):
+        response = client.get('{}?per_page={}&sort={}'.format(self.URL, 50, sort))
+
+        assert response.status_code == HTTPStatus.OK
+        keys = [(account['mall_count'], account['id']) for account in response.json['accounts']]
+        assert keys == sorted(keys, reverse=sort.startswith('-'))
+
+    def test_with_unknown_sort(self, client):
+        response = client.get('{}?sort={}'.format(self.URL, 'name'))
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert 'sort' in response.json['errors']['querystring']
+
+    def test_search(self, client, permanent_account_data):
+        name = permanent_account_data['name']
+        account_id = client.post(self.URL, json=permanent_account_data).json['id']
+
+        response = client.get('{}?q={}'.format(self.URL, name.upper()))
+
+        assert response.status_code == HTTPStatus.OK
+        # Other accounts may contain the name, the exact match ranks first
+        assert response.json['accounts'][0]['id'] == account_id
+        assert response.json['total'] >= len(response.json['accounts'])
+        assert response.json['next_cursor'] is None
+
+    @pytest.mark.parametrize('query, field', (('q=ab', 'q'), ('q=abc&sort=mall_count', 'sort')))
+    def test_with_invalid_search(self, client, query, field):
+        response = client.get('{}?{}'.format(self.URL, query))
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert field in response.json['errors']['querystring']
+
+    def test_multi_get(self, client, permanent_account_data):
+        account_id = client.post(self.URL, json=permanent_account_data).json['id']
+        missing_id = account_id + 1000000
+
+        response = client.get('{}?ids={},{}'.format(self.URL, missing_id, account_id))
+
+        assert response.status_code == HTTPStatus.OK
+        assert [account['id'] for account in response.json['accounts']] == [account_id]
+        assert response.json['missing'] == [missing_id]
+
+    @pytest.mark.parametrize('query', (
+            'ids=1&names=account',
+            'ids=account',
+            'ids={}'.format(','.join(str(i) for i in range(1, 102)))
+    ))
+    def test_with_invalid_multi_get(self, client, query):
+        response = client.get('{}?{}'.format(self.URL, query))
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert 'ids' in response.json['errors']['querystring']
+
+    def test_without_count(self, client):
+        response = client.get('{}?count={}'.format(self.URL, 'none'))
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['total'] is None
+        assert response.json['total_kind'] == 'none'
+
 
 class TestBulkCreate:
     URL = '/api/accounts/bulk'
@@ -197,6 +323,43 @@ class TestBulkCreate:
                 )
             ).count() == len(data['accounts'])
 
+    def test_bulk_create_returning_ids(self, client, permanent_session):
+        data = {'accounts': [{
+            'name': 'first_returned_account'
+        }, {
+            'name': 'second_returned_account'
+        }]}
+
+        response = client.post(self.URL + '?return_ids=true', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [account['name'] for account in response.json['accounts']] == \
+               [account['name'] for account in data['accounts']]
+
+        with permanent_session.begin() as session:
+            for account in response.json['accounts']:
+                assert session.query(Account).get(account['id']).name == account['name']
+
+    def test_bulk_create_skipping_conflicts(self, client, permanent_account_data):
+        client.post('/api/accounts/', json=permanent_account_data)
+
+        data = {'accounts': [{
+            'name': permanent_account_data['name']
+        }, {
+            'name': 'not_conflicting_account'
+        }]}
+
+        response = client.post(self.URL + '?on_conflict=skip', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [account['name'] for account in response.json['accounts']] == ['not_conflicting_account']
+        assert response.json['skipped'] == [0]
+
+    def test_bulk_create_with_unknown_conflict_mode(self, client):
+        response = client.post(self.URL + '?on_conflict=ignore', json={'accounts': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
     def test_bulk_create_with_duplicated_data(self, client):
         data = {'accounts': [{
             'name': 'first_account',
@@ -211,3 +374,251 @@ class TestBulkCreate:
         assert response.status_code == HTTPStatus.BAD_REQUEST
         assert 'error' in response.json
         assert response.json['error'] == 'One or more accounts already exist!'
+
+
+class TestBulkCreateStream:
+    URL = '/api/accounts/bulk'
+    CONTENT_TYPE = 'application/x-ndjson'
+
+    def test_bulk_create_stream(self, client, permanent_session):
+        accounts = [{'name': f'streamed_account_{i}'} for i in range(5)]
+
+        response = client.post(
+            self.URL, data='\n'.join(json.dumps(account) for account in accounts), content_type=self.CONTENT_TYPE
+        )
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json['inserted'] == len(accounts)
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Account
+            ).filter(
+                Account.name.in_(
+                    [account['name'] for account in accounts]
+                )
+            ).count() == len(accounts)
+
+    @pytest.mark.parametrize('commit, committed_count', [('all', 0), ('chunk', 2)])
+    def test_commit_modes(self, client, permanent_session, app, commit, committed_count):
+        app.config['BULK_STREAM_CHUNK_SIZE'] = 2
+        names = [f'{commit}_committed_account_{i}' for i in range(3)]
+        accounts = [{'name': name} for name in names + names[:1]]
+
+        try:
+            response = client.post(
+                self.URL + f'?commit={commit}',
+                data='\n'.join(json.dumps(account) for account in accounts),
+                content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_STREAM_CHUNK_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        with permanent_session.begin() as session:
+            assert session.query(Account).filter(Account.name.in_(names)).count() == committed_count
+
+    @pytest.mark.parametrize('line, error', [
+        ('{"name": ', 'Line 2: invalid JSON!'),
+        ('["name"]', 'Line 2: expected a JSON object!'),
+    ])
+    def test_with_invalid_line(self, client, line, error):
+        data = json.dumps({'name': 'valid_streamed_account'}) + '\n' + line
+
+        response = client.post(self.URL, data=data, content_type=self.CONTENT_TYPE)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json['error'] == error
+
+    def test_with_too_large_body(self, client, app):
+        app.config['BULK_MAX_BODY_SIZE'] = 16
+
+        try:
+            response = client.post(
+                self.URL, data=json.dumps({'name': 'too_large_streamed_account'}), content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_MAX_BODY_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+class TestBulkUpsert:
+    URL = '/api/accounts/bulk'
+
+    def test_bulk_upsert(self, client, permanent_session):
+        data = {'accounts': [{
+            'name': 'first_upserted_account'
+        }]}
+
+        first_response = client.put(self.URL, json=data)
+
+        data['accounts'].append({
+            'name': 'second_upserted_account'
+        })
+
+        second_response = client.put(self.URL, json=data)
+
+        assert first_response.status_code == second_response.status_code == HTTPStatus.OK
+        assert second_response.json['accounts'][0] == first_response.json['accounts'][0]
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Account
+            ).filter(
+                Account.name.in_(
+                    [account['name'] for account in data['accounts']]
+                )
+            ).count() == len(data['accounts'])
+
+
+class TestBulkUpdate:
+    URL = '/api/accounts/bulk'
+
+    def test_bulk_update(self, client, permanent_session, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        response = client.patch(self.URL, json={'accounts': [{
+            'id': account_id,
+            'name': 'bulk_renamed_account'
+        }]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': account_id, 'affected': True}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Account).get(account_id).name == 'bulk_renamed_account'
+
+    def test_bulk_update_without_id(self, client):
+        response = client.patch(self.URL, json={'accounts': [{'name': 'bulk_renamed_account'}]})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestBulkDelete:
+    URL = '/api/accounts/bulk'
+
+    def test_bulk_delete(self, client, permanent_session, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        response = client.delete(self.URL, json={'ids': [account_id, 100000]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': account_id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Account).get(account_id) is None
+
+    def test_bulk_delete_without_ids(self, client):
+        response = client.delete(self.URL, json={'ids': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestExport:
+    URL = '/api/accounts/export'
+
+    def test_export_ndjson(self, client, permanent_account):
+        expected = {'id': permanent_account.id, 'name': permanent_account.name}
+
+        response = client.get(self.URL)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'application/x-ndjson'
+
+        accounts = [json.loads(line) for line in response.data.decode().splitlines()]
+
+        assert expected in accounts
+        assert [account['id'] for account in accounts] == sorted(account['id'] for account in accounts)
+
+    def test_export_csv(self, client, permanent_account):
+        response = client.get(self.URL + '?format=csv')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'text/csv'
+        assert response.data.decode().splitlines()[0] == 'id,name'
+
+    def test_with_unknown_format(self, client):
+        response = client.get(self.URL + '?format=xml')
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestTree:
+    @pytest.fixture
+    def account_id(self, client, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        for i in range(2):
+            mall_id = client.post(
+                '/api/malls/', json={'name': f'tree_mall_{account_id}_{i}', 'account_id': account_id}
+            ).json['id']
+
+            for j in range(i):
+                client.post('/api/units/', json={'name': f'tree_unit_{mall_id}_{j}', 'mall_id': mall_id})
+
+        yield account_id
+
+    def test_tree(self, client, account_id):
+        response = client.get(f'/api/accounts/{account_id}/tree')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'application/json'
+        assert response.json['id'] == account_id
+        assert response.json['truncated'] is False
+        assert [len(mall['units']) for mall in response.json['malls']] == [0, 1]
+        assert response.json['malls'][1]['units'][0]['name'].startswith('tree_unit_')
+
+    def test_tree_of_malls(self, client, account_id):
+        response = client.get(f'/api/accounts/{account_id}/tree?depth=1')
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json['malls']) == 2
+        assert all('units' not in mall for mall in response.json['malls'])
+
+    def test_account_only(self, client, account_id):
+        response = client.get(f'/api/accounts/{account_id}/tree?depth=0')
+
+        assert response.status_code == HTTPStatus.OK
+        assert 'malls' not in response.json
+
+    def test_truncated(self, client, account_id):
+        response = client.get(f'/api/accounts/{account_id}/tree?max_nodes=2')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['truncated'] is True
+        assert [len(mall['units']) for mall in response.json['malls']] == [0, 0]
+
+    def test_with_non_existent_account(self, client):
+        response = client.get('/api/accounts/100000/tree')
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json['error'] == 'Account does not exist!'
+
+    @pytest.mark.parametrize('query', ['depth=3', 'max_nodes=0'])
+    def test_with_invalid_args(self, client, account_id, query):
+        response = client.get(f'/api/accounts/{account_id}/tree?{query}')
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestQueryBudget:
+    @pytest.mark.parametrize(
+        'resource',
+        [AccountsBulkResource, AccountsExportResource, AccountsResource, AccountResource, AccountTreeResource]
+    )
+    def test_every_endpoint_has_a_budget(self, resource):
+        for method in resource.methods:
+            assert getattr(resource, method.lower()).query_budget >= 1
+
+    def test_get_within_budget(self, client, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+        for i in range(5):
+            client.post('/api/malls/', json={'name': f'budget_mall_{account_id}_{i}', 'account_id': account_id})
+
+        response = client.get(f'/api/accounts/{account_id}')
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json['malls']) == 5
+        assert int(response.headers['X-Query-Count']) <= AccountResource.get.query_budget
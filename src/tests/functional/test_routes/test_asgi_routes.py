@@ -0,0 +1,130 @@
+import pytest
+from http import HTTPStatus
+from starlette.testclient import TestClient
+
+from api.aio.app import create_asgi_app
+from api.config import get_config_class
+from api.utils.replicas import STICKY_COOKIE
+
+
+class TestCreate:
+    def test_create(self, asgi_client, permanent_account_data):
+        response = asgi_client.post('/api/accounts/', json=permanent_account_data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['name'] == permanent_account_data['name']
+        assert isinstance(response.json()['id'], int)
+
+    def test_for_duplicated_name(self, asgi_client, permanent_account_data):
+        asgi_client.post('/api/accounts/', json=permanent_account_data)
+
+        response = asgi_client.post('/api/accounts/', json=permanent_account_data)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'error': 'Account already exists!'}
+
+    def test_for_nonexistent_parent(self, asgi_client):
+        response = asgi_client.post('/api/units/', json={'name': 'orphan_unit', 'mall_id': 1000000})
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json() == {'error': 'Mall does not exist!'}
+
+    def test_with_invalid_data(self, asgi_client):
+        response = asgi_client.post('/api/malls/', json={'name': 1})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert set(response.json()['errors']['json']) == {'name', 'account_id'}
+
+    def test_with_invalid_json(self, asgi_client):
+        response = asgi_client.post('/api/accounts/', content=b'{"name": ')
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+class TestGet:
+    def test_same_body_as_wsgi(self, asgi_client, client, permanent_mall_data):
+        mall_id = client.post('/api/malls/', json=permanent_mall_data).json['id']
+        for i in range(3):
+            client.post('/api/units/', json={'name': f'asgi_unit_{mall_id}_{i}', 'mall_id': mall_id})
+
+        response = asgi_client.get(f'/api/malls/{mall_id}?children_limit=2')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == client.get(f'/api/malls/{mall_id}?children_limit=2').json
+
+    def test_for_nonexistent_unit(self, asgi_client):
+        response = asgi_client.get('/api/units/1000000')
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json() == {'error': 'Unit does not exist!'}
+
+
+class TestGetList:
+    def test_with_cursor(self, asgi_client, client, permanent_account_data):
+        client.post('/api/accounts/', json=permanent_account_data)
+
+        first_page = asgi_client.get('/api/accounts/?per_page=1')
+        second_page = asgi_client.get('/api/accounts/?per_page=1&cursor=' + first_page.json()['next_cursor'])
+
+        assert first_page.json() == client.get('/api/accounts/?per_page=1').json
+        assert second_page.json()['accounts'][0]['id'] > first_page.json()['accounts'][0]['id']
+
+    def test_by_parent(self, asgi_client, client, permanent_unit_data):
+        client.post('/api/units/', json=permanent_unit_data)
+        mall_id = permanent_unit_data['mall_id']
+
+        nested = asgi_client.get(f'/api/malls/{mall_id}/units')
+
+        assert nested.status_code == HTTPStatus.OK
+        assert nested.json() == asgi_client.get(f'/api/units/?mall_id={mall_id}').json()
+        assert nested.json() == client.get(f'/api/malls/{mall_id}/units').json
+
+    @pytest.mark.parametrize('query', ['per_page=51', 'page=0', 'count=unknown', 'cursor=invalid'])
+    def test_with_invalid_args(self, asgi_client, query):
+        response = asgi_client.get('/api/units/?' + query)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert 'querystring' in response.json()['errors']
+
+
+class TestUpdate:
+    def test_update(self, asgi_client, client, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        response = asgi_client.patch(f'/api/accounts/{account_id}', json={'name': f'asgi_renamed_{account_id}'})
+
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(f'/api/accounts/{account_id}').json['name'] == f'asgi_renamed_{account_id}'
+
+
+class TestDelete:
+    def test_delete(self, asgi_client, client, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+
+        response = asgi_client.delete(f'/api/units/{unit_id}')
+
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(f'/api/units/{unit_id}').status_code == HTTPStatus.NOT_FOUND
+
+
+class TestReplicaRouting:
+    @pytest.fixture
+    def routed_client(self, app, replica_engine, replica_database_url):
+        config_class = type(
+            'ReplicaConfig', (get_config_class('../.env.test'),), {'SQLALCHEMY_REPLICA_URIS': replica_database_url}
+        )
+
+        with TestClient(create_asgi_app(config_class)) as routed_client:
+            yield routed_client
+
+    def test_reads_go_to_replica(self, routed_client, client, permanent_account_data):
+        account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+
+        # The replica has not received the account yet
+        assert routed_client.get(f'/api/accounts/{account_id}').status_code == HTTPStatus.NOT_FOUND
+
+    def test_sticky_client_reads_its_writes(self, routed_client, permanent_account_data):
+        response = routed_client.post('/api/accounts/', json=permanent_account_data)
+
+        assert STICKY_COOKIE in response.cookies
+        assert routed_client.get(f'/api/accounts/{response.json()["id"]}').status_code == HTTPStatus.OK
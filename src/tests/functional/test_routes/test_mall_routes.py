@@ -1,7 +1,9 @@
+import json
 import pytest
 from http import HTTPStatus
 
 from api.models.mall import Mall
+from api.routes.mall import AccountMallsResource, MallsBulkResource, MallsExportResource, MallsResource, MallResource
 
 
 class TestCreate:
@@ -150,6 +152,32 @@ class TestGet:
         assert 'error' in response.json
         assert response.json['error'] == 'Mall does not exist!'
 
+    def test_children_limit(self, client, permanent_mall_data):
+        mall_id = client.post(self.URL, json=permanent_mall_data).json['id']
+        for i in range(3):
+            client.post('/api/units/', json={'name': f'child_unit_{mall_id}_{i}', 'mall_id': mall_id})
+
+        response = client.get(self.URL + str(mall_id) + '?children_limit=2')
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json['units']) == 2
+        assert response.json['next_children_cursor'] is not None
+
+        response = client.get(
+            self.URL + str(mall_id) + '?children_limit=2&children_cursor=' + response.json['next_children_cursor']
+        )
+
+        assert len(response.json['units']) == 1
+        assert response.json['next_children_cursor'] is None
+
+    @pytest.mark.parametrize('query', ['children_limit=0', 'children_limit=101', 'children_cursor=invalid'])
+    def test_with_invalid_children_args(self, client, permanent_mall_data, query):
+        mall_id = client.post(self.URL, json=permanent_mall_data).json['id']
+
+        response = client.get(self.URL + str(mall_id) + '?' + query)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
 
 class TestGetList:
     URL = '/api/malls/'
@@ -175,6 +203,103 @@ class TestGetList:
         assert response.json['errors']['querystring']['per_page'] == \
                ['Must be greater than or equal to 1 and less than or equal to 50.']
 
+    def test_with_invalid_cursor(self, client):
+        response = client.get(
+            '{}?cursor={}'.format(self.URL, 'not-a-cursor')
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json['errors']['querystring']['cursor'] == ['Invalid cursor!']
+
+    def test_with_cursor(self, client, permanent_mall_data):
+        mall_id = client.post('/api/malls/', json=permanent_mall_data).json['id']
+
+        response = client.get('{}?per_page={}'.format(self.URL, 1))
+        assert response.status_code == HTTPStatus.OK
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(
+                '{}?per_page={}&cursor={}'.format(self.URL, 1, response.json['next_cursor'])
+            )
+            assert response.status_code == HTTPStatus.OK
+
+        assert response.json['malls'][0]['id'] == mall_id
+
+    def test_without_count(self, client):
+        response = client.get('{}?count={}'.format(self.URL, 'none'))
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['total'] is None
+        assert response.json['total_kind'] == 'none'
+
+
+class TestGetListByAccount:
+    @pytest.fixture
+    def mall_ids(self, client, permanent_account):
+        account_id = permanent_account.id
+        malls = [{'name': f'child_mall_{account_id}_{i}', 'account_id': account_id} for i in range(3)]
+
+        yield [client.post('/api/malls/', json=mall).json['id'] for mall in malls]
+
+    def test_filter(self, client, permanent_account, mall_ids):
+        response = client.get(f'/api/malls/?account_id={permanent_account.id}')
+
+        assert response.status_code == HTTPStatus.OK
+        assert [mall['id'] for mall in response.json['malls']] == mall_ids
+        assert response.json['total'] == len(mall_ids)
+
+    def test_nested_route(self, client, permanent_account, mall_ids):
+        nested = client.get(f'/api/accounts/{permanent_account.id}/malls')
+        filtered = client.get(f'/api/malls/?account_id={permanent_account.id}')
+
+        assert nested.status_code == HTTPStatus.OK
+        assert nested.json == filtered.json
+
+    def test_with_cursor(self, client, permanent_account, mall_ids):
+        url = f'/api/accounts/{permanent_account.id}/malls?per_page=2'
+
+        response = client.get(url)
+        retrieved_ids = [mall['id'] for mall in response.json['malls']]
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(f'{url}&cursor={response.json["next_cursor"]}')
+            retrieved_ids += [mall['id'] for mall in response.json['malls']]
+
+        assert retrieved_ids == mall_ids
+
+    def test_sorted_by_unit_count(self, client, permanent_account, mall_ids):
+        for i, mall_id in enumerate(mall_ids):
+            for j in range(i):
+                client.post('/api/units/', json={'name': f'child_unit_{mall_id}_{j}', 'mall_id': mall_id})
+
+        assert [client.get(f'/api/malls/{mall_id}').json['unit_count'] for mall_id in mall_ids] == [0, 1, 2]
+
+        url = f'/api/accounts/{permanent_account.id}/malls?per_page=2&sort=-unit_count'
+        response = client.get(url)
+        retrieved = [mall['unit_count'] for mall in response.json['malls']]
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(f'{url}&cursor={response.json["next_cursor"]}')
+            retrieved += [mall['unit_count'] for mall in response.json['malls']]
+
+        assert retrieved == [2, 1, 0]
+
+    def test_with_cursor_of_another_sort(self, client, permanent_account, mall_ids):
+        url = f'/api/accounts/{permanent_account.id}/malls?per_page=1'
+        cursor = client.get(url).json['next_cursor']
+
+        response = client.get(f'{url}&sort=unit_count&cursor={cursor}')
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert 'cursor' in response.json['errors']['querystring']
+
+    def test_without_malls(self, client):
+        response = client.get('/api/accounts/100000/malls')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['malls'] == []
+        assert response.json['total'] == 0
+
 
 class TestBulkCreate:
     URL = '/api/malls/bulk'
@@ -201,6 +326,46 @@ class TestBulkCreate:
                 )
             ).count() == len(data['malls'])
 
+    def test_bulk_create_returning_ids(self, client, permanent_session, permanent_account):
+        data = {'malls': [{
+            'name': 'first_returned_mall',
+            'account_id': permanent_account.id
+        }, {
+            'name': 'second_returned_mall',
+            'account_id': permanent_account.id
+        }]}
+
+        response = client.post(self.URL + '?return_ids=true', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [mall['name'] for mall in response.json['malls']] == [mall['name'] for mall in data['malls']]
+
+        with permanent_session.begin() as session:
+            for mall in response.json['malls']:
+                assert session.query(Mall).get(mall['id']).name == mall['name']
+
+    def test_bulk_create_skipping_conflicts(self, client, permanent_mall_data):
+        client.post('/api/malls/', json=permanent_mall_data)
+
+        data = {'malls': [{
+            'name': permanent_mall_data['name'],
+            'account_id': permanent_mall_data['account_id']
+        }, {
+            'name': 'not_conflicting_mall',
+            'account_id': permanent_mall_data['account_id']
+        }]}
+
+        response = client.post(self.URL + '?on_conflict=skip', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [mall['name'] for mall in response.json['malls']] == ['not_conflicting_mall']
+        assert response.json['skipped'] == [0]
+
+    def test_bulk_create_with_unknown_conflict_mode(self, client):
+        response = client.post(self.URL + '?on_conflict=ignore', json={'malls': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
     def test_bulk_create_with_duplicated_data(self, client, permanent_account):
         data = {'malls': [{
             'name': 'first_mall',
@@ -217,3 +382,194 @@ class TestBulkCreate:
         assert response.status_code == HTTPStatus.BAD_REQUEST
         assert 'error' in response.json
         assert response.json['error'] == 'One or more malls already exist!'
+
+
+class TestBulkCreateStream:
+    URL = '/api/malls/bulk'
+    CONTENT_TYPE = 'application/x-ndjson'
+
+    def test_bulk_create_stream(self, client, permanent_session, permanent_account):
+        malls = [{'name': f'streamed_mall_{i}', 'account_id': permanent_account.id} for i in range(5)]
+
+        response = client.post(
+            self.URL, data='\n'.join(json.dumps(mall) for mall in malls), content_type=self.CONTENT_TYPE
+        )
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json['inserted'] == len(malls)
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Mall
+            ).filter(
+                Mall.name.in_(
+                    [mall['name'] for mall in malls]
+                )
+            ).count() == len(malls)
+
+    @pytest.mark.parametrize('commit, committed_count', [('all', 0), ('chunk', 2)])
+    def test_commit_modes(self, client, permanent_session, permanent_account, app, commit, committed_count):
+        app.config['BULK_STREAM_CHUNK_SIZE'] = 2
+        names = [f'{commit}_committed_mall_{i}' for i in range(3)]
+        malls = [{'name': name, 'account_id': permanent_account.id} for name in names + names[:1]]
+
+        try:
+            response = client.post(
+                self.URL + f'?commit={commit}',
+                data='\n'.join(json.dumps(mall) for mall in malls),
+                content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_STREAM_CHUNK_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        with permanent_session.begin() as session:
+            assert session.query(Mall).filter(Mall.name.in_(names)).count() == committed_count
+
+    @pytest.mark.parametrize('line, error', [
+        ('{"name": ', 'Line 2: invalid JSON!'),
+        ('["name"]', 'Line 2: expected a JSON object!'),
+    ])
+    def test_with_invalid_line(self, client, line, error):
+        data = json.dumps({'name': 'valid_streamed_mall'}) + '\n' + line
+
+        response = client.post(self.URL, data=data, content_type=self.CONTENT_TYPE)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json['error'] == error
+
+    def test_with_too_large_body(self, client, app):
+        app.config['BULK_MAX_BODY_SIZE'] = 16
+
+        try:
+            response = client.post(
+                self.URL, data=json.dumps({'name': 'too_large_streamed_mall'}), content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_MAX_BODY_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+class TestBulkUpsert:
+    URL = '/api/malls/bulk'
+
+    def test_bulk_upsert(self, client, permanent_session, permanent_account):
+        data = {'malls': [{
+            'name': 'first_upserted_mall',
+            'account_id': permanent_account.id
+        }]}
+
+        first_response = client.put(self.URL, json=data)
+
+        data['malls'].append({
+            'name': 'second_upserted_mall',
+            'account_id': permanent_account.id
+        })
+
+        second_response = client.put(self.URL, json=data)
+
+        assert first_response.status_code == second_response.status_code == HTTPStatus.OK
+        assert second_response.json['malls'][0] == first_response.json['malls'][0]
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Mall
+            ).filter(
+                Mall.name.in_(
+                    [mall['name'] for mall in data['malls']]
+                )
+            ).count() == len(data['malls'])
+
+
+class TestBulkUpdate:
+    URL = '/api/malls/bulk'
+
+    def test_bulk_update(self, client, permanent_session, permanent_mall_data):
+        mall_id = client.post('/api/malls/', json=permanent_mall_data).json['id']
+
+        response = client.patch(self.URL, json={'malls': [{
+            'id': mall_id,
+            'name': 'bulk_renamed_mall'
+        }]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': mall_id, 'affected': True}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Mall).get(mall_id).name == 'bulk_renamed_mall'
+
+    def test_bulk_update_without_id(self, client):
+        response = client.patch(self.URL, json={'malls': [{'name': 'bulk_renamed_mall'}]})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestBulkDelete:
+    URL = '/api/malls/bulk'
+
+    def test_bulk_delete(self, client, permanent_session, permanent_mall_data):
+        mall_id = client.post('/api/malls/', json=permanent_mall_data).json['id']
+
+        response = client.delete(self.URL, json={'ids': [mall_id, 100000]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': mall_id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Mall).get(mall_id) is None
+
+    def test_bulk_delete_without_ids(self, client):
+        response = client.delete(self.URL, json={'ids': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestExport:
+    URL = '/api/malls/export'
+
+    def test_export_ndjson(self, client, permanent_mall):
+        expected = {'id': permanent_mall.id, 'name': permanent_mall.name, 'account_id': permanent_mall.account_id}
+
+        response = client.get(self.URL)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'application/x-ndjson'
+
+        malls = [json.loads(line) for line in response.data.decode().splitlines()]
+
+        assert expected in malls
+        assert [mall['id'] for mall in malls] == sorted(mall['id'] for mall in malls)
+
+    def test_export_csv(self, client, permanent_mall):
+        response = client.get(self.URL + '?format=csv')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'text/csv'
+        assert response.data.decode().splitlines()[0] == 'id,name,account_id'
+
+    def test_with_unknown_format(self, client):
+        response = client.get(self.URL + '?format=xml')
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestQueryBudget:
+    @pytest.mark.parametrize(
+        'resource', [MallsBulkResource, MallsExportResource, MallsResource, MallResource, AccountMallsResource]
+    )
+    def test_every_endpoint_has_a_budget(self, resource):
+        for method in resource.methods:
+            assert getattr(resource, method.lower()).query_budget >= 1
+
+    def test_get_within_budget(self, client, permanent_mall_data):
+        mall_id = client.post('/api/malls/', json=permanent_mall_data).json['id']
+        for i in range(5):
+            client.post('/api/units/', json={'name': f'budget_unit_{mall_id}_{i}', 'mall_id': mall_id})
+
+        response = client.get(f'/api/malls/{mall_id}')
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json['units']) == 5
+        assert int(response.headers['X-Query-Count']) <= MallResource.get.query_budget
@@ -0,0 +1,28 @@
+from http import HTTPStatus
+
+
+class TestGet:
+    URL = '/api/telemetry'
+
+    def test_get(self, client, app, permanent_account_data):
+        telemetry = app.extensions['query_telemetry']
+        sample_rate, telemetry.sample_rate = telemetry.sample_rate, 1
+        try:
+            account_id = client.post('/api/accounts/', json=permanent_account_data).json['id']
+            client.get(f'/api/accounts/{account_id}')
+        finally:
+            telemetry.sample_rate = sample_rate
+
+        response = client.get(self.URL)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['endpoints']['GET account']['count'] >= 1
+        fingerprints = [statement['fingerprint'] for statement in response.json['statements']]
+        assert any(fingerprint.startswith('SELECT account.id') for fingerprint in fingerprints)
+
+    def test_reports_counter_deltas(self, client, permanent_account_data):
+        before = client.get(self.URL).json['table_counter_deltas'].get('account', 0)
+
+        client.post('/api/accounts/', json=permanent_account_data)
+
+        assert client.get(self.URL).json['table_counter_deltas']['account'] == before + 1
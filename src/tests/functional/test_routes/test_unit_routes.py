@@ -1,7 +1,9 @@
+import json
 import pytest
 from http import HTTPStatus
 
 from api.models.unit import Unit
+from api.routes.unit import MallUnitsResource, UnitsBulkResource, UnitsExportResource, UnitsResource, UnitResource
 
 
 class TestCreate:
@@ -175,6 +177,76 @@ class TestGetList:
         assert response.json['errors']['querystring']['per_page'] == \
                ['Must be greater than or equal to 1 and less than or equal to 50.']
 
+    def test_with_invalid_cursor(self, client):
+        response = client.get(
+            '{}?cursor={}'.format(self.URL, 'not-a-cursor')
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json['errors']['querystring']['cursor'] == ['Invalid cursor!']
+
+    def test_with_cursor(self, client, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+
+        response = client.get('{}?per_page={}'.format(self.URL, 1))
+        assert response.status_code == HTTPStatus.OK
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(
+                '{}?per_page={}&cursor={}'.format(self.URL, 1, response.json['next_cursor'])
+            )
+            assert response.status_code == HTTPStatus.OK
+
+        assert response.json['units'][0]['id'] == unit_id
+
+    def test_without_count(self, client):
+        response = client.get('{}?count={}'.format(self.URL, 'none'))
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['total'] is None
+        assert response.json['total_kind'] == 'none'
+
+
+class TestGetListByMall:
+    @pytest.fixture
+    def unit_ids(self, client, permanent_mall):
+        units = [{'name': f'child_unit_{permanent_mall.id}_{i}', 'mall_id': permanent_mall.id} for i in range(3)]
+
+        yield [client.post('/api/units/', json=unit).json['id'] for unit in units]
+
+    def test_filter(self, client, permanent_mall, unit_ids):
+        response = client.get(f'/api/units/?mall_id={permanent_mall.id}')
+
+        assert response.status_code == HTTPStatus.OK
+        assert [unit['id'] for unit in response.json['units']] == unit_ids
+        assert response.json['total'] == len(unit_ids)
+
+    def test_nested_route(self, client, permanent_mall, unit_ids):
+        nested = client.get(f'/api/malls/{permanent_mall.id}/units')
+        filtered = client.get(f'/api/units/?mall_id={permanent_mall.id}')
+
+        assert nested.status_code == HTTPStatus.OK
+        assert nested.json == filtered.json
+
+    def test_with_cursor(self, client, permanent_mall, unit_ids):
+        url = f'/api/malls/{permanent_mall.id}/units?per_page=2'
+
+        response = client.get(url)
+        retrieved_ids = [unit['id'] for unit in response.json['units']]
+
+        while response.json['next_cursor'] is not None:
+            response = client.get(f'{url}&cursor={response.json["next_cursor"]}')
+            retrieved_ids += [unit['id'] for unit in response.json['units']]
+
+        assert retrieved_ids == unit_ids
+
+    def test_without_units(self, client):
+        response = client.get('/api/malls/100000/units')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['units'] == []
+        assert response.json['total'] == 0
+
 
 class TestBulkCreate:
     URL = '/api/units/bulk'
@@ -201,6 +273,60 @@ class TestBulkCreate:
                 )
             ).count() == len(data['units'])
 
+    def test_bulk_create_returning_ids(self, client, permanent_session, permanent_mall):
+        data = {'units': [{
+            'name': 'first_returned_unit',
+            'mall_id': permanent_mall.id
+        }, {
+            'name': 'second_returned_unit',
+            'mall_id': permanent_mall.id
+        }]}
+
+        response = client.post(self.URL + '?return_ids=true', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [unit['name'] for unit in response.json['units']] == [unit['name'] for unit in data['units']]
+
+        with permanent_session.begin() as session:
+            for unit in response.json['units']:
+                assert session.query(Unit).get(unit['id']).name == unit['name']
+
+    def test_bulk_create_in_chunks_within_budget(self, client, app, permanent_mall):
+        # The suite runs in raise mode: three chunk INSERTs must neither break the budget nor look like N+1
+        app.config['BULK_RETURNING_CHUNK_SIZE'] = 2
+        try:
+            data = {'units': [{'name': f'chunked_unit_{i}', 'mall_id': permanent_mall.id} for i in range(5)]}
+
+            response = client.post(self.URL + '?return_ids=true', json=data)
+        finally:
+            app.config['BULK_RETURNING_CHUNK_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(response.json['units']) == 5
+        assert int(response.headers['X-Query-Count']) >= 3
+
+    def test_bulk_create_skipping_conflicts(self, client, permanent_unit_data):
+        client.post('/api/units/', json=permanent_unit_data)
+
+        data = {'units': [{
+            'name': permanent_unit_data['name'],
+            'mall_id': permanent_unit_data['mall_id']
+        }, {
+            'name': 'not_conflicting_unit',
+            'mall_id': permanent_unit_data['mall_id']
+        }]}
+
+        response = client.post(self.URL + '?on_conflict=skip', json=data)
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert [unit['name'] for unit in response.json['units']] == ['not_conflicting_unit']
+        assert response.json['skipped'] == [0]
+
+    def test_bulk_create_with_unknown_conflict_mode(self, client):
+        response = client.post(self.URL + '?on_conflict=ignore', json={'units': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
     def test_bulk_create_with_duplicated_data(self, client, permanent_mall):
         data = {'units': [{
             'name': 'first_unit',
@@ -217,3 +343,192 @@ class TestBulkCreate:
         assert response.status_code == HTTPStatus.BAD_REQUEST
         assert 'error' in response.json
         assert response.json['error'] == 'One or more units already exist!'
+
+
+class TestBulkCreateStream:
+    URL = '/api/units/bulk'
+    CONTENT_TYPE = 'application/x-ndjson'
+
+    def test_bulk_create_stream(self, client, permanent_session, permanent_mall):
+        units = [{'name': f'streamed_unit_{i}', 'mall_id': permanent_mall.id} for i in range(5)]
+
+        response = client.post(
+            self.URL, data='\n'.join(json.dumps(unit) for unit in units), content_type=self.CONTENT_TYPE
+        )
+
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json['inserted'] == len(units)
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Unit
+            ).filter(
+                Unit.name.in_(
+                    [unit['name'] for unit in units]
+                )
+            ).count() == len(units)
+
+    @pytest.mark.parametrize('commit, committed_count', [('all', 0), ('chunk', 2)])
+    def test_commit_modes(self, client, permanent_session, permanent_mall, app, commit, committed_count):
+        app.config['BULK_STREAM_CHUNK_SIZE'] = 2
+        names = [f'{commit}_committed_unit_{i}' for i in range(3)]
+        units = [{'name': name, 'mall_id': permanent_mall.id} for name in names + names[:1]]
+
+        try:
+            response = client.post(
+                self.URL + f'?commit={commit}',
+                data='\n'.join(json.dumps(unit) for unit in units),
+                content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_STREAM_CHUNK_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        with permanent_session.begin() as session:
+            assert session.query(Unit).filter(Unit.name.in_(names)).count() == committed_count
+
+    @pytest.mark.parametrize('line, error', [
+        ('{"name": ', 'Line 2: invalid JSON!'),
+        ('["name"]', 'Line 2: expected a JSON object!'),
+    ])
+    def test_with_invalid_line(self, client, line, error):
+        data = json.dumps({'name': 'valid_streamed_unit'}) + '\n' + line
+
+        response = client.post(self.URL, data=data, content_type=self.CONTENT_TYPE)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json['error'] == error
+
+    def test_with_too_large_body(self, client, app):
+        app.config['BULK_MAX_BODY_SIZE'] = 16
+
+        try:
+            response = client.post(
+                self.URL, data=json.dumps({'name': 'too_large_streamed_unit'}), content_type=self.CONTENT_TYPE
+            )
+        finally:
+            app.config['BULK_MAX_BODY_SIZE'] = None
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+class TestBulkUpsert:
+    URL = '/api/units/bulk'
+
+    def test_bulk_upsert(self, client, permanent_session, permanent_mall):
+        data = {'units': [{
+            'name': 'first_upserted_unit',
+            'mall_id': permanent_mall.id
+        }]}
+
+        first_response = client.put(self.URL, json=data)
+
+        data['units'].append({
+            'name': 'second_upserted_unit',
+            'mall_id': permanent_mall.id
+        })
+
+        second_response = client.put(self.URL, json=data)
+
+        assert first_response.status_code == second_response.status_code == HTTPStatus.OK
+        assert second_response.json['units'][0] == first_response.json['units'][0]
+
+        with permanent_session.begin() as session:
+            assert session.query(
+                Unit
+            ).filter(
+                Unit.name.in_(
+                    [unit['name'] for unit in data['units']]
+                )
+            ).count() == len(data['units'])
+
+
+class TestBulkUpdate:
+    URL = '/api/units/bulk'
+
+    def test_bulk_update(self, client, permanent_session, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+
+        response = client.patch(self.URL, json={'units': [{
+            'id': unit_id,
+            'name': 'bulk_renamed_unit'
+        }]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': unit_id, 'affected': True}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Unit).get(unit_id).name == 'bulk_renamed_unit'
+
+    def test_bulk_update_without_id(self, client):
+        response = client.patch(self.URL, json={'units': [{'name': 'bulk_renamed_unit'}]})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestBulkDelete:
+    URL = '/api/units/bulk'
+
+    def test_bulk_delete(self, client, permanent_session, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+
+        response = client.delete(self.URL, json={'ids': [unit_id, 100000]})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['results'] == [{'id': unit_id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with permanent_session.begin() as session:
+            assert session.query(Unit).get(unit_id) is None
+
+    def test_bulk_delete_without_ids(self, client):
+        response = client.delete(self.URL, json={'ids': []})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestExport:
+    URL = '/api/units/export'
+
+    def test_export_ndjson(self, client, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+        expected = {'id': unit_id, **permanent_unit_data}
+
+        response = client.get(self.URL)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'application/x-ndjson'
+
+        units = [json.loads(line) for line in response.data.decode().splitlines()]
+
+        assert expected in units
+        assert [unit['id'] for unit in units] == sorted(unit['id'] for unit in units)
+
+    def test_export_csv(self, client, permanent_unit_data):
+        response = client.get(self.URL + '?format=csv')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == 'text/csv'
+        assert response.data.decode().splitlines()[0] == 'id,name,mall_id'
+
+    def test_with_unknown_format(self, client):
+        response = client.get(self.URL + '?format=xml')
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestQueryBudget:
+    @pytest.mark.parametrize(
+        'resource', [UnitsBulkResource, UnitsExportResource, UnitsResource, UnitResource, MallUnitsResource]
+    )
+    def test_every_endpoint_has_a_budget(self, resource):
+        for method in resource.methods:
+            assert getattr(resource, method.lower()).query_budget >= 1
+
+    def test_get_within_budget(self, client, permanent_unit_data):
+        unit_id = client.post('/api/units/', json=permanent_unit_data).json['id']
+
+        response = client.get(f'/api/units/{unit_id}')
+
+        assert response.status_code == HTTPStatus.OK
+        assert int(response.headers['X-Query-Count']) <= UnitResource.get.query_budget
@@ -1,8 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
 import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
 
+from api.config import get_engine_options
 from api.exceptions import AlreadyExistsException, DoesNotExistException
 from api.models.account import Account
-
+from api.repositories.account import AccountRepository
+from api.services.account import AccountService
 
 
 class TestCreate:
@@ -96,7 +103,7 @@ class TestGet:
                 Account
             ).get(account.id)
 
-        assert storage_account.name == retrieved_account.name
+        assert storage_account.name == retrieved_account['name']
 
     def test_for_nonexistent_account(self, account_service):
         with pytest.raises(DoesNotExistException) as exception_info:
@@ -134,6 +141,48 @@ class TestGetList:
             assert retrieved_account.id == created_accounts[i + created_accounts_skip].id
             assert retrieved_account.name == created_accounts[i + created_accounts_skip].name
 
+    def test_get_list_with_cursor(self, account_service, account_data):
+        created_accounts = []
+
+        for i in range(10):
+            account_data = account_data.copy()
+            account_data.update({'name': f'{account_data["name"]}{i}'})
+
+            created_accounts.append(
+                account_service.create(account_data)
+            )
+
+        retrieved_accounts = account_service.get_list(1, 4)
+        retrieved_ids = [account.id for account in retrieved_accounts['accounts']]
+
+        while retrieved_accounts['next_cursor'] is not None:
+            retrieved_accounts = account_service.get_list(1, 4, retrieved_accounts['next_cursor'])
+            retrieved_ids += [account.id for account in retrieved_accounts['accounts']]
+
+        assert retrieved_accounts['total'] == len(created_accounts)
+        assert retrieved_ids == [account.id for account in created_accounts]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, account_service, account_data, count):
+        account_service.create(account_data)
+
+        retrieved_accounts = account_service.get_list(1, 5, count=count)
+
+        assert retrieved_accounts['total_kind'] == count
+        assert len(retrieved_accounts['accounts']) == 1
+        if count == 'none':
+            assert retrieved_accounts['total'] is None
+        else:
+            assert retrieved_accounts['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, account_service, account_data):
+        account = account_service.create(account_data)
+        total = account_service.get_list(1, 5)['total']
+
+        account_service.delete(account.id)
+
+        assert account_service.get_list(1, 5)['total'] == total - 1
+
 
 class TestBulkCreate:
     def test_bulk_create(self, account_service, session):
@@ -167,3 +216,40 @@ class TestBulkCreate:
             account_service.bulk_create(data)
 
         assert exception_info.value.message == 'One or more accounts already exist!'
+
+
+class TestTransactionPooling:
+    CLIENTS = 500
+    DB_POOL_SIZE = 10
+
+    def test_clients_share_the_pool(self, app, permanent_account):
+        # A small fixed pool stands in for PgBouncer: every client shares DB_POOL_SIZE server connections
+        engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'], **get_engine_options({
+            'DB_POOLER': 'pgbouncer',
+            'DB_POOL_SIZE': self.DB_POOL_SIZE,
+            'DB_POOL_TIMEOUT': 60,
+        }))
+        service = AccountService(
+            account_repository=AccountRepository(session=sessionmaker(engine, expire_on_commit=False))
+        )
+        checked_out = []
+        event.listen(engine, 'checkout', lambda *args: checked_out.append(engine.pool.checkedout()))
+        # Every client waits for the others before its request, so all of them are in flight together
+        start = Barrier(self.CLIENTS)
+
+        def client(_):
+            start.wait()
+            return service.get(permanent_account.id)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.CLIENTS) as executor:
+                accounts = list(executor.map(client, range(self.CLIENTS)))
+
+            assert [(account['id'], account['name']) for account in accounts] == (
+                [(permanent_account.id, permanent_account.name)] * self.CLIENTS
+            )
+            assert len(checked_out) >= 1
+            assert max(checked_out) <= self.DB_POOL_SIZE
+            assert engine.pool.checkedout() == 0
+        finally:
+            engine.dispose()
@@ -95,7 +95,7 @@ class TestGet:
                 Mall
             ).get(mall.id)
 
-        assert storage_mall.name == retrieved_mall.name
+        assert storage_mall.name == retrieved_mall['name']
 
     def test_for_nonexistent_mall(self, mall_service):
         with pytest.raises(DoesNotExistException) as exception_info:
@@ -133,6 +133,48 @@ class TestGetList:
             assert retrieved_mall.id == created_malls[i + created_malls_skip].id
             assert retrieved_mall.name == created_malls[i + created_malls_skip].name
 
+    def test_get_list_with_cursor(self, mall_service, mall_data):
+        created_malls = []
+
+        for i in range(10):
+            mall_data = mall_data.copy()
+            mall_data.update({'name': f'{mall_data["name"]}{i}'})
+
+            created_malls.append(
+                mall_service.create(mall_data)
+            )
+
+        retrieved_malls = mall_service.get_list(1, 4)
+        retrieved_ids = [mall.id for mall in retrieved_malls['malls']]
+
+        while retrieved_malls['next_cursor'] is not None:
+            retrieved_malls = mall_service.get_list(1, 4, retrieved_malls['next_cursor'])
+            retrieved_ids += [mall.id for mall in retrieved_malls['malls']]
+
+        assert retrieved_malls['total'] == len(created_malls)
+        assert retrieved_ids == [mall.id for mall in created_malls]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, mall_service, mall_data, count):
+        mall_service.create(mall_data)
+
+        retrieved_malls = mall_service.get_list(1, 5, count=count)
+
+        assert retrieved_malls['total_kind'] == count
+        assert len(retrieved_malls['malls']) == 1
+        if count == 'none':
+            assert retrieved_malls['total'] is None
+        else:
+            assert retrieved_malls['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, mall_service, mall_data):
+        mall = mall_service.create(mall_data)
+        total = mall_service.get_list(1, 5)['total']
+
+        mall_service.delete(mall.id)
+
+        assert mall_service.get_list(1, 5)['total'] == total - 1
+
 
 class TestBulkCreate:
     def test_bulk_create(self, mall_service, session, account):
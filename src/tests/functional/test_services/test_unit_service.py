@@ -133,6 +133,48 @@ class TestGetList:
             assert retrieved_unit.id == created_units[i + created_units_skip].id
             assert retrieved_unit.name == created_units[i + created_units_skip].name
 
+    def test_get_list_with_cursor(self, unit_service, unit_data):
+        created_units = []
+
+        for i in range(10):
+            unit_data = unit_data.copy()
+            unit_data.update({'name': f'{unit_data["name"]}{i}'})
+
+            created_units.append(
+                unit_service.create(unit_data)
+            )
+
+        retrieved_units = unit_service.get_list(1, 4)
+        retrieved_ids = [unit.id for unit in retrieved_units['units']]
+
+        while retrieved_units['next_cursor'] is not None:
+            retrieved_units = unit_service.get_list(1, 4, retrieved_units['next_cursor'])
+            retrieved_ids += [unit.id for unit in retrieved_units['units']]
+
+        assert retrieved_units['total'] == len(created_units)
+        assert retrieved_ids == [unit.id for unit in created_units]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, unit_service, unit_data, count):
+        unit_service.create(unit_data)
+
+        retrieved_units = unit_service.get_list(1, 5, count=count)
+
+        assert retrieved_units['total_kind'] == count
+        assert len(retrieved_units['units']) == 1
+        if count == 'none':
+            assert retrieved_units['total'] is None
+        else:
+            assert retrieved_units['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, unit_service, unit_data):
+        unit = unit_service.create(unit_data)
+        total = unit_service.get_list(1, 5)['total']
+
+        unit_service.delete(unit.id)
+
+        assert unit_service.get_list(1, 5)['total'] == total - 1
+
 
 class TestBulkCreate:
     def test_bulk_create(self, unit_service, session, mall):
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.pool import NullPool
+
+from api.config import get_async_database_uri, get_async_engine_options, get_engine_options
+
+
+class TestEngineOptions:
+    def test_defaults(self):
+        assert get_engine_options({}) == {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+        }
+
+    def test_settings_from_environment(self):
+        options = get_engine_options({
+            'DB_POOL_SIZE': '20',
+            'DB_MAX_OVERFLOW': '0',
+            'DB_POOL_TIMEOUT': '5',
+            'DB_POOL_RECYCLE': '600',
+            'DB_POOL_PRE_PING': 'false',
+        })
+
+        assert options == {
+            'pool_size': 20,
+            'max_overflow': 0,
+            'pool_timeout': 5,
+            'pool_recycle': 600,
+            'pool_pre_ping': False,
+        }
+
+    def test_pgbouncer_without_pool_size(self):
+        assert get_engine_options({'DB_POOLER': 'pgbouncer'}) == {'poolclass': NullPool}
+
+    @pytest.mark.parametrize('max_overflow, expected', [(None, 0), ('2', 2)])
+    def test_pgbouncer_with_small_pool(self, max_overflow, expected):
+        options = get_engine_options({'DB_POOLER': 'pgbouncer', 'DB_POOL_SIZE': '2', 'DB_MAX_OVERFLOW': max_overflow})
+
+        assert options['pool_size'] == 2
+        assert options['max_overflow'] == expected
+
+
+class TestAsyncEngineOptions:
+    def test_same_as_sync_without_pooler(self):
+        assert get_async_engine_options({}) == get_engine_options({})
+
+    def test_refused_behind_pgbouncer(self):
+        # asyncpg's named prepared statements would collide on shared server connections
+        with pytest.raises(ValueError):
+            get_async_engine_options({'DB_POOLER': 'pgbouncer'})
+
+
+class TestAsyncDatabaseUri:
+    @pytest.mark.parametrize('uri', ['postgresql://user@localhost/db', 'postgresql+psycopg2://user@localhost/db'])
+    def test_switches_to_asyncpg(self, uri):
+        assert get_async_database_uri({'SQLALCHEMY_DATABASE_URI': uri}) == 'postgresql+asyncpg://user@localhost/db'
+
+    def test_explicit_uri(self):
+        config = {
+            'SQLALCHEMY_DATABASE_URI': 'postgresql://user@localhost/db',
+            'SQLALCHEMY_ASYNC_DATABASE_URI': 'postgresql+asyncpg://user@pgbouncer/db'
+        }
+
+        assert get_async_database_uri(config) == 'postgresql+asyncpg://user@pgbouncer/db'
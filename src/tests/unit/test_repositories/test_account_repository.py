@@ -1,7 +1,17 @@
+import time
+
 import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
 
 from api.exceptions import AlreadyExistsException, DoesNotExistException
 from api.models.account import Account
+from api.models.counter import TableCounter
+from api.models.mall import Mall
+from api.repositories.account import AccountRepository
+from api.utils.counting import compact_row_counts
+from api.utils.replicas import RoutingSession, STICKY_COOKIE
+from api.utils.tree import TREE_DEPTH_ACCOUNT, TREE_DEPTH_MALLS, TREE_DEPTH_UNITS
 
 
 class TestCreate:
@@ -95,7 +105,7 @@ class TestGet:
                 Account
             ).get(account.id)
 
-        assert storage_account.name == retrieved_account.name
+        assert storage_account.name == retrieved_account['name']
 
     def test_for_nonexistent_account(self, account_repository):
         with pytest.raises(DoesNotExistException) as exception_info:
@@ -103,6 +113,73 @@ class TestGet:
 
         assert exception_info.value.message == 'Account does not exist!'
 
+    def test_children_are_paginated(self, account_repository, session, account):
+        with session.begin() as session:
+            session.bulk_insert_mappings(
+                Mall, [{'name': f'child_mall_{i}', 'account_id': account.id} for i in range(5)]
+            )
+
+        retrieved_account = account_repository.get(account.id, children_limit=2)
+        retrieved_ids = [mall.id for mall in retrieved_account['malls']]
+
+        while retrieved_account['next_children_cursor'] is not None:
+            retrieved_account = account_repository.get(account.id, 2, retrieved_account['next_children_cursor'])
+            assert len(retrieved_account['malls']) <= 2
+            retrieved_ids += [mall.id for mall in retrieved_account['malls']]
+
+        assert len(retrieved_ids) == 5
+        assert retrieved_ids == sorted(retrieved_ids)
+
+
+class TestGetTree:
+    @pytest.fixture
+    def tree_repository(self, app):
+        # get_tree opens its own REPEATABLE READ snapshot, so it needs connections of its own
+        engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+
+        yield AccountRepository(session=sessionmaker(engine, class_=RoutingSession, expire_on_commit=False))
+
+        engine.dispose()
+
+    def test_account_only(self, tree_repository, permanent_account):
+        tree, rows = tree_repository.get_tree(permanent_account.id, TREE_DEPTH_ACCOUNT, 10)
+
+        assert tree == {'id': permanent_account.id, 'name': permanent_account.name}
+        assert rows is None
+
+    @pytest.mark.parametrize('depth, columns', [
+        (TREE_DEPTH_MALLS, ['mall_id', 'mall_name']),
+        (TREE_DEPTH_UNITS, ['mall_id', 'mall_name', 'unit_id', 'unit_name']),
+    ])
+    def test_rows_are_streamed(self, tree_repository, permanent_mall, depth, columns):
+        tree, rows = tree_repository.get_tree(permanent_mall.account_id, depth, 10)
+
+        assert tree['id'] == permanent_mall.account_id
+        assert rows.columns == columns
+        assert [row.mall_id for chunk in rows for row in chunk] == [permanent_mall.id]
+
+    def test_hierarchy_from_the_same_snapshot(self, tree_repository, permanent_session, permanent_mall):
+        tree, rows = tree_repository.get_tree(permanent_mall.account_id, TREE_DEPTH_MALLS, 10)
+
+        with permanent_session.begin() as session:
+            session.query(Mall).filter_by(id=permanent_mall.id).update({'name': f'renamed_{permanent_mall.id}'})
+
+        # The rename committed after the account was read is not seen by the streamed malls
+        assert [row.mall_name for chunk in rows for row in chunk] == [permanent_mall.name]
+
+    def test_unread_rows_are_closed(self, tree_repository, permanent_mall):
+        tree, rows = tree_repository.get_tree(permanent_mall.account_id, TREE_DEPTH_MALLS, 10)
+
+        rows.close()
+
+        assert tree_repository.get_tree(permanent_mall.account_id, TREE_DEPTH_ACCOUNT, 10)[0] == tree
+
+    def test_for_nonexistent_account(self, tree_repository):
+        with pytest.raises(DoesNotExistException) as exception_info:
+            tree_repository.get_tree(1000000, TREE_DEPTH_UNITS, 10)
+
+        assert exception_info.value.message == 'Account does not exist!'
+
 
 class TestGetList:
     @pytest.mark.parametrize(
@@ -133,6 +210,133 @@ class TestGetList:
             assert retrieved_account.id == created_accounts[i + created_accounts_skip].id
             assert retrieved_account.name == created_accounts[i + created_accounts_skip].name
 
+    def test_get_list_with_cursor(self, account_repository, account_data):
+        created_accounts = []
+
+        for i in range(10):
+            account_data = account_data.copy()
+            account_data.update({'name': f'{account_data["name"]}{i}'})
+
+            created_accounts.append(
+                account_repository.create(account_data)
+            )
+
+        retrieved_accounts = account_repository.get_list(1, 4)
+        retrieved_ids = [account.id for account in retrieved_accounts['accounts']]
+
+        while retrieved_accounts['next_cursor'] is not None:
+            retrieved_accounts = account_repository.get_list(1, 4, retrieved_accounts['next_cursor'])
+            retrieved_ids += [account.id for account in retrieved_accounts['accounts']]
+
+        assert retrieved_accounts['total'] == len(created_accounts)
+        assert retrieved_ids == [account.id for account in created_accounts]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, account_repository, account_data, count):
+        account_repository.create(account_data)
+
+        retrieved_accounts = account_repository.get_list(1, 5, count=count)
+
+        assert retrieved_accounts['total_kind'] == count
+        assert len(retrieved_accounts['accounts']) == 1
+        if count == 'none':
+            assert retrieved_accounts['total'] is None
+        else:
+            assert retrieved_accounts['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, account_repository, account_data):
+        account = account_repository.create(account_data)
+        total = account_repository.get_list(1, 5)['total']
+
+        account_repository.delete(account.id)
+
+        assert account_repository.get_list(1, 5)['total'] == total - 1
+
+    def test_exact_count_follows_truncate(self, account_repository, session, account_data):
+        account_repository.create(account_data)
+
+        with session.begin() as session:
+            session.execute(text('TRUNCATE account, mall, unit'))
+
+        assert account_repository.get_list(1, 5)['total'] == 0
+
+    def test_compaction_keeps_total(self, account_repository, session, account_data):
+        accounts = [account_repository.create({'name': f'compacted_account_{i}'}) for i in range(3)]
+        account_repository.delete(accounts[0].id)
+        total = account_repository.get_list(1, 5)['total']
+
+        with session.begin() as session:
+            compact_row_counts(session)
+            deltas = session.query(TableCounter).filter_by(table_name='account').count()
+
+        assert deltas == 1
+        assert account_repository.get_list(1, 5)['total'] == total
+
+    def test_writers_do_not_wait_on_the_counter(self, engine):
+        with engine.connect() as first, engine.connect() as second:
+            first_transaction, second_transaction = first.begin(), second.begin()
+            first.execute(Account.__table__.insert().values(name='first_writer'))
+
+            # The first writer's counter delta is still uncommitted
+            second.exec_driver_sql("SET LOCAL lock_timeout = '1s'")
+            second.execute(Account.__table__.insert().values(name='second_writer'))
+
+            second_transaction.rollback()
+            first_transaction.rollback()
+
+    @pytest.mark.parametrize('sort', ('mall_count', '-mall_count'))
+    def test_get_list_sorted_by_mall_count(self, account_repository, session, sort):
+        with session.begin() as session:
+            accounts = [Account(name=f'sorted_account_{i}') for i in range(5)]
+            session.add_all(accounts)
+            session.flush()
+            session.bulk_insert_mappings(Mall, [
+                {'name': f'sorted_mall_{i}_{j}', 'account_id': account.id}
+                for i, account in enumerate(accounts) for j in range(i % 3)
+            ])
+
+        retrieved_accounts = account_repository.get_list(1, 2, sort=sort)
+        retrieved = [(account.mall_count, account.id) for account in retrieved_accounts['accounts']]
+
+        while retrieved_accounts['next_cursor'] is not None:
+            retrieved_accounts = account_repository.get_list(1, 2, retrieved_accounts['next_cursor'], sort=sort)
+            retrieved += [(account.mall_count, account.id) for account in retrieved_accounts['accounts']]
+
+        assert retrieved == sorted(retrieved, reverse=sort.startswith('-'))
+        assert sorted(count for count, _ in retrieved) == [0, 0, 1, 1, 2]
+
+
+class TestGetMany:
+    @pytest.fixture(scope='function')
+    def accounts(self, account_repository, account_data):
+        return [
+            account_repository.create({'name': f'{account_data["name"]}_many_{i}'}) for i in range(3)
+        ]
+
+    def test_by_ids(self, account_repository, accounts):
+        missing_id = max(account.id for account in accounts) + 1
+        ids = [accounts[2].id, missing_id, accounts[0].id, accounts[2].id]
+
+        retrieved_accounts = account_repository.get_many(ids=ids)
+
+        assert [account.id for account in retrieved_accounts['accounts']] == [accounts[2].id, accounts[0].id]
+        assert retrieved_accounts['missing'] == [missing_id]
+
+    def test_by_names(self, account_repository, accounts):
+        names = [accounts[1].name, 'missing_account', accounts[0].name]
+
+        retrieved_accounts = account_repository.get_many(names=names)
+
+        assert [account.name for account in retrieved_accounts['accounts']] == [accounts[1].name, accounts[0].name]
+        assert retrieved_accounts['missing'] == ['missing_account']
+
+    def test_single_statement(self, account_repository, accounts, executed_statements):
+        account_repository.get_many(ids=[account.id for account in accounts])
+
+        selects = [statement for statement, _ in executed_statements if statement.lstrip().upper().startswith('SELECT')]
+        assert len(selects) == 1
+        assert 'ANY' in selects[0]
+
 
 class TestBulkCreate:
     def test_bulk_create(self, account_repository, session):
@@ -153,6 +357,53 @@ class TestBulkCreate:
                 )
             ).count() == len(data['accounts'])
 
+    def test_bulk_create_with_special_characters(self, account_repository, session):
+        names = ['with, comma', 'with "quotes"', 'with\nnewline', '']
+        data = {'accounts': [{'name': name} for name in names]}
+
+        account_repository.bulk_create(data)
+
+        with session.begin() as session:
+            stored_names = session.query(
+                Account.name
+            ).filter(
+                Account.name.in_(names)
+            ).all()
+
+        assert sorted(name for name, in stored_names) == sorted(names)
+
+    def test_bulk_create_returning_ids(self, account_repository, session, app):
+        app.config['BULK_RETURNING_CHUNK_SIZE'] = 2
+        names = [f'returned_account_{i}' for i in range(5)]
+        data = {'accounts': [{'name': name} for name in reversed(names)]}
+
+        try:
+            created_accounts = account_repository.bulk_create(data, return_ids=True)['accounts']
+        finally:
+            app.config['BULK_RETURNING_CHUNK_SIZE'] = None
+
+        assert [account['name'] for account in created_accounts] == list(reversed(names))
+
+        with session.begin() as session:
+            stored_ids = dict(session.query(
+                Account.name, Account.id
+            ).filter(
+                Account.name.in_(names)
+            ).all())
+
+        for account in created_accounts:
+            assert account['id'] == stored_ids[account['name']]
+
+    def test_bulk_create_skipping_conflicts(self, account_repository, account_data):
+        account_repository.create(account_data)
+        names = [account_data['name'], 'new_account', 'new_account']
+        data = {'accounts': [{'name': name} for name in names]}
+
+        result = account_repository.bulk_create(data, on_conflict='skip')
+
+        assert [account['name'] for account in result['accounts']] == ['new_account']
+        assert result['skipped'] == [0, 2]
+
     def test_bulk_create_with_duplicated_data(self, account_repository):
         data = {'accounts': [{
             'name': 'first_account',
@@ -166,3 +417,153 @@ class TestBulkCreate:
             account_repository.bulk_create(data)
 
         assert exception_info.value.message == 'One or more accounts already exist!'
+
+
+class TestQueryPlan:
+    @pytest.fixture(scope='function')
+    def seeded_account(self, session, account):
+        with session.begin() as session:
+            session.bulk_insert_mappings(
+                Mall, [{'name': f'seeded_mall_{i}', 'account_id': account.id} for i in range(1000)]
+            )
+            session.execute(text('ANALYZE mall'))
+
+        yield account
+
+    def test_get_does_not_scan_malls(self, account_repository, seeded_account, executed_statements, explain):
+        account_repository.get(seeded_account.id)
+
+        selects = [
+            (statement, parameters) for statement, parameters in executed_statements
+            if statement.lstrip().upper().startswith('SELECT')
+        ]
+        assert selects
+
+        for statement, parameters in selects:
+            assert 'Seq Scan' not in explain(statement, parameters)
+
+    def test_cascade_delete_does_not_scan_malls(self, seeded_account, explain):
+        plan = explain('DELETE FROM mall WHERE account_id = %(account_id)s', {'account_id': seeded_account.id})
+
+        assert 'Seq Scan' not in plan
+
+
+class TestBulkCreateStream:
+    @pytest.mark.parametrize('commit', ['all', 'chunk'])
+    def test_bulk_create_stream(self, account_repository, session, commit):
+        chunks = [[{'name': f'streamed_account_{i}_{j}'} for j in range(2)] for i in range(3)]
+
+        result = account_repository.bulk_create_stream(iter(chunks), commit)
+
+        assert result == {'inserted': 6}
+
+        with session.begin() as session:
+            assert session.query(
+                Account
+            ).filter(
+                Account.name.in_(
+                    [account['name'] for chunk in chunks for account in chunk]
+                )
+            ).count() == 6
+
+
+class TestBulkUpsert:
+    def test_bulk_upsert(self, account_repository, session, account):
+        data = {'accounts': [
+            {'name': account.name},
+            {'name': 'upserted_account'},
+            {'name': account.name}
+        ]}
+
+        upserted_accounts = account_repository.bulk_upsert(data)['accounts']
+
+        assert [account['name'] for account in upserted_accounts] == \
+               [account['name'] for account in data['accounts']]
+        assert upserted_accounts[0]['id'] == upserted_accounts[2]['id'] == account.id
+
+        with session.begin() as session:
+            assert session.query(
+                Account
+            ).filter_by(name='upserted_account').one().id == upserted_accounts[1]['id']
+
+
+class TestBulkUpdate:
+    def test_bulk_update(self, account_repository, session, account_data):
+        account = account_repository.create(account_data)
+        data = {'accounts': [
+            {'id': account.id, 'name': 'renamed_account'},
+            {'id': 100000, 'name': 'missing_account'}
+        ]}
+
+        results = account_repository.bulk_update(data)['results']
+
+        assert results == [{'id': account.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Account).get(account.id).name == 'renamed_account'
+
+    def test_bulk_update_with_duplicated_name(self, account_repository, account_data):
+        first_account = account_repository.create(account_data)
+
+        second_account_data = account_data.copy()
+        second_account_data.update({'name': 'second_account_name'})
+        second_account = account_repository.create(second_account_data)
+
+        with pytest.raises(AlreadyExistsException) as exception_info:
+            account_repository.bulk_update({'accounts': [{'id': second_account.id, 'name': first_account.name}]})
+
+        assert exception_info.value.message == 'One or more accounts already exist!'
+
+
+class TestBulkDelete:
+    def test_bulk_delete(self, account_repository, session, account_data):
+        account = account_repository.create(account_data)
+
+        results = account_repository.bulk_delete([account.id, 100000])['results']
+
+        assert results == [{'id': account.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Account).get(account.id) is None
+
+
+class TestReplicaRouting:
+    @pytest.fixture
+    def routed_repository(self, app, replica_engine):
+        primary_engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+
+        yield AccountRepository(session=sessionmaker(
+            primary_engine, class_=RoutingSession, replicas=[replica_engine], expire_on_commit=False
+        ))
+
+        primary_engine.dispose()
+
+    def test_reads_go_to_replica(self, routed_repository, permanent_account):
+        # The replica has not received the account yet
+        with pytest.raises(DoesNotExistException):
+            routed_repository.get(permanent_account.id)
+
+        assert permanent_account.id not in [
+            account.id for account in routed_repository.get_list(1, 50)['accounts']
+        ]
+
+    def test_writes_go_to_primary(self, routed_repository, permanent_session, permanent_account_data):
+        account = routed_repository.create(permanent_account_data)
+
+        with permanent_session.begin() as session:
+            assert session.query(Account).get(account.id) is not None
+
+    def test_sticky_client_reads_its_writes(self, app, routed_repository, permanent_account):
+        with app.test_request_context(headers={'Cookie': f'{STICKY_COOKIE}={time.time() + 5}'}):
+            assert routed_repository.get(permanent_account.id)['id'] == permanent_account.id
+
+    def test_tree_goes_to_replica(self, routed_repository, permanent_mall):
+        # The account lookup and the hierarchy share the routing, so neither is read from the primary
+        with pytest.raises(DoesNotExistException):
+            routed_repository.get_tree(permanent_mall.account_id, TREE_DEPTH_MALLS, 10)
+
+    def test_sticky_tree_reads_primary(self, app, routed_repository, permanent_mall):
+        with app.test_request_context(headers={'Cookie': f'{STICKY_COOKIE}={time.time() + 5}'}):
+            tree, rows = routed_repository.get_tree(permanent_mall.account_id, TREE_DEPTH_MALLS, 10)
+
+            assert [row.mall_id for chunk in rows for row in chunk] == [permanent_mall.id]
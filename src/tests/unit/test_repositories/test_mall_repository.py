@@ -1,7 +1,11 @@
 import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
 
 from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.models.account import Account
 from api.models.mall import Mall
+from api.models.unit import Unit
 
 
 class TestCreate:
@@ -10,6 +14,12 @@ class TestCreate:
 
         assert hasattr(mall, 'id')
 
+    def test_relationships_are_not_lazy_loaded(self, mall_repository, mall_data):
+        mall = mall_repository.create(mall_data)
+
+        with pytest.raises(InvalidRequestError):
+            mall.account
+
     def test_create(self, mall_repository, session, mall_data):
         mall = mall_repository.create(mall_data)
 
@@ -95,7 +105,7 @@ class TestGet:
                 Mall
             ).get(mall.id)
 
-        assert storage_mall.name == retrieved_mall.name
+        assert storage_mall.name == retrieved_mall['name']
 
     def test_for_nonexistent_mall(self, mall_repository):
         with pytest.raises(DoesNotExistException) as exception_info:
@@ -103,6 +113,23 @@ class TestGet:
 
         assert exception_info.value.message == 'Mall does not exist!'
 
+    def test_children_are_paginated(self, mall_repository, session, mall):
+        with session.begin() as session:
+            session.bulk_insert_mappings(
+                Unit, [{'name': f'child_unit_{i}', 'mall_id': mall.id} for i in range(5)]
+            )
+
+        retrieved_mall = mall_repository.get(mall.id, children_limit=2)
+        retrieved_ids = [unit.id for unit in retrieved_mall['units']]
+
+        while retrieved_mall['next_children_cursor'] is not None:
+            retrieved_mall = mall_repository.get(mall.id, 2, retrieved_mall['next_children_cursor'])
+            assert len(retrieved_mall['units']) <= 2
+            retrieved_ids += [unit.id for unit in retrieved_mall['units']]
+
+        assert len(retrieved_ids) == 5
+        assert retrieved_ids == sorted(retrieved_ids)
+
 
 class TestGetList:
     @pytest.mark.parametrize(
@@ -133,6 +160,144 @@ class TestGetList:
             assert retrieved_mall.id == created_malls[i + created_malls_skip].id
             assert retrieved_mall.name == created_malls[i + created_malls_skip].name
 
+    def test_get_list_does_not_join_account(self, mall_repository, mall_data, executed_statements):
+        mall_repository.create(mall_data)
+
+        mall_repository.get_list(1, 20)
+
+        selects = [statement for statement, _ in executed_statements if statement.lstrip().upper().startswith('SELECT')]
+        assert selects
+        assert not any('JOIN' in statement.upper() for statement in selects)
+
+    def test_get_list_with_cursor(self, mall_repository, mall_data):
+        created_malls = []
+
+        for i in range(10):
+            mall_data = mall_data.copy()
+            mall_data.update({'name': f'{mall_data["name"]}{i}'})
+
+            created_malls.append(
+                mall_repository.create(mall_data)
+            )
+
+        retrieved_malls = mall_repository.get_list(1, 4)
+        retrieved_ids = [mall.id for mall in retrieved_malls['malls']]
+
+        while retrieved_malls['next_cursor'] is not None:
+            retrieved_malls = mall_repository.get_list(1, 4, retrieved_malls['next_cursor'])
+            retrieved_ids += [mall.id for mall in retrieved_malls['malls']]
+
+        assert retrieved_malls['total'] == len(created_malls)
+        assert retrieved_ids == [mall.id for mall in created_malls]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, mall_repository, mall_data, count):
+        mall_repository.create(mall_data)
+
+        retrieved_malls = mall_repository.get_list(1, 5, count=count)
+
+        assert retrieved_malls['total_kind'] == count
+        assert len(retrieved_malls['malls']) == 1
+        if count == 'none':
+            assert retrieved_malls['total'] is None
+        else:
+            assert retrieved_malls['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, mall_repository, mall_data):
+        mall = mall_repository.create(mall_data)
+        total = mall_repository.get_list(1, 5)['total']
+
+        mall_repository.delete(mall.id)
+
+        assert mall_repository.get_list(1, 5)['total'] == total - 1
+
+    def test_get_list_by_account(self, mall_repository, session, mall_data):
+        own_mall = mall_repository.create(mall_data)
+        with session.begin() as session:
+            other_account = Account(name='other_account')
+            session.add(other_account)
+        mall_repository.create({'name': 'other_mall', 'account_id': other_account.id})
+
+        retrieved_malls = mall_repository.get_list(1, 5, account_id=own_mall.account_id)
+
+        assert [mall.id for mall in retrieved_malls['malls']] == [own_mall.id]
+        assert retrieved_malls['total'] == 1
+
+    def test_estimated_total_by_account_is_exact(self, mall_repository, mall_data):
+        mall = mall_repository.create(mall_data)
+
+        retrieved_malls = mall_repository.get_list(1, 5, count='estimated', account_id=mall.account_id)
+
+        assert retrieved_malls['total_kind'] == 'exact'
+        assert retrieved_malls['total'] == 1
+
+
+class TestMallCount:
+    @staticmethod
+    def mall_count(session, account_id):
+        with session.begin() as session:
+            return session.query(Account.mall_count).filter_by(id=account_id).scalar()
+
+    def test_follows_create_and_delete(self, mall_repository, session, mall_data):
+        mall = mall_repository.create(mall_data)
+        assert self.mall_count(session, mall.account_id) == 1
+
+        mall_repository.delete(mall.id)
+        assert self.mall_count(session, mall.account_id) == 0
+
+    def test_follows_bulk_create_and_delete(self, mall_repository, session, account):
+        mall_repository.bulk_create({
+            'malls': [{'name': f'counted_mall_{i}', 'account_id': account.id} for i in range(3)]
+        })
+        assert self.mall_count(session, account.id) == 3
+
+        with session.begin() as session:
+            ids = [mall_id for mall_id, in session.query(Mall.id).filter_by(account_id=account.id)]
+        mall_repository.bulk_delete(ids[:2])
+        assert self.mall_count(session, account.id) == 1
+
+    def test_follows_moves_only(self, mall_repository, session, mall_data):
+        mall = mall_repository.create(mall_data)
+        with session.begin() as session:
+            other_account = Account(name='other_account')
+            session.add(other_account)
+
+        mall_repository.update(mall.id, {'name': 'renamed_mall'})
+        assert self.mall_count(session, mall.account_id) == 1
+
+        mall_repository.update(mall.id, {'account_id': other_account.id})
+        assert self.mall_count(session, mall.account_id) == 0
+        assert self.mall_count(session, other_account.id) == 1
+
+    def test_is_returned(self, mall_repository, account_repository, mall_data):
+        mall = mall_repository.create(mall_data)
+
+        assert account_repository.get(mall.account_id)['mall_count'] == 1
+        assert mall_repository.get_list(1, 5, account_id=mall.account_id)['total'] == 1
+
+    @pytest.mark.parametrize('sort', ('unit_count', '-unit_count'))
+    def test_get_list_sorted_by_unit_count(self, mall_repository, session, account, sort):
+        with session.begin() as session:
+            malls = [Mall(name=f'sorted_mall_{i}', account_id=account.id) for i in range(5)]
+            session.add_all(malls)
+            session.flush()
+            session.bulk_insert_mappings(Unit, [
+                {'name': f'sorted_unit_{i}_{j}', 'mall_id': mall.id}
+                for i, mall in enumerate(malls) for j in range(i % 3)
+            ])
+
+        retrieved_malls = mall_repository.get_list(1, 2, account_id=account.id, sort=sort)
+        retrieved = [(mall.unit_count, mall.id) for mall in retrieved_malls['malls']]
+
+        while retrieved_malls['next_cursor'] is not None:
+            retrieved_malls = mall_repository.get_list(
+                1, 2, retrieved_malls['next_cursor'], account_id=account.id, sort=sort
+            )
+            retrieved += [(mall.unit_count, mall.id) for mall in retrieved_malls['malls']]
+
+        assert retrieved == sorted(retrieved, reverse=sort.startswith('-'))
+        assert sorted(count for count, _ in retrieved) == [0, 0, 1, 1, 2]
+
 
 class TestBulkCreate:
     def test_bulk_create(self, mall_repository, session, account):
@@ -155,6 +320,53 @@ class TestBulkCreate:
                 )
             ).count() == len(data['malls'])
 
+    def test_bulk_create_with_special_characters(self, mall_repository, session, account):
+        names = ['with, comma', 'with "quotes"', 'with\nnewline', '']
+        data = {'malls': [{'name': name, 'account_id': account.id} for name in names]}
+
+        mall_repository.bulk_create(data)
+
+        with session.begin() as session:
+            stored_names = session.query(
+                Mall.name
+            ).filter(
+                Mall.name.in_(names)
+            ).all()
+
+        assert sorted(name for name, in stored_names) == sorted(names)
+
+    def test_bulk_create_returning_ids(self, mall_repository, session, account, app):
+        app.config['BULK_RETURNING_CHUNK_SIZE'] = 2
+        names = [f'returned_mall_{i}' for i in range(5)]
+        data = {'malls': [{'name': name, 'account_id': account.id} for name in reversed(names)]}
+
+        try:
+            created_malls = mall_repository.bulk_create(data, return_ids=True)['malls']
+        finally:
+            app.config['BULK_RETURNING_CHUNK_SIZE'] = None
+
+        assert [mall['name'] for mall in created_malls] == list(reversed(names))
+
+        with session.begin() as session:
+            stored_ids = dict(session.query(
+                Mall.name, Mall.id
+            ).filter(
+                Mall.name.in_(names)
+            ).all())
+
+        for mall in created_malls:
+            assert mall['id'] == stored_ids[mall['name']]
+
+    def test_bulk_create_skipping_conflicts(self, mall_repository, mall_data):
+        mall_repository.create(mall_data)
+        names = [mall_data['name'], 'new_mall', 'new_mall']
+        data = {'malls': [{'name': name, 'account_id': mall_data['account_id']} for name in names]}
+
+        result = mall_repository.bulk_create(data, on_conflict='skip')
+
+        assert [mall['name'] for mall in result['malls']] == ['new_mall']
+        assert result['skipped'] == [0, 2]
+
     def test_bulk_create_with_duplicated_data(self, mall_repository, account):
         data = {'malls': [{
             'name': 'first_mall',
@@ -170,3 +382,137 @@ class TestBulkCreate:
             mall_repository.bulk_create(data)
 
         assert exception_info.value.message == 'One or more malls already exist!'
+
+    @pytest.mark.parametrize('return_ids', [False, True])
+    def test_bulk_create_with_missing_account(self, mall_repository, account, return_ids):
+        data = {'malls': [{'name': 'orphan_mall', 'account_id': account.id + 1}]}
+
+        # COPY and INSERT ... RETURNING report the missing parent the same way
+        with pytest.raises(DoesNotExistException) as exception_info:
+            mall_repository.bulk_create(data, return_ids=return_ids)
+
+        assert exception_info.value.message == 'Account does not exist!'
+
+
+class TestQueryPlan:
+    @pytest.fixture(scope='function')
+    def seeded_mall(self, session, mall):
+        with session.begin() as session:
+            session.bulk_insert_mappings(
+                Unit, [{'name': f'seeded_unit_{i}', 'mall_id': mall.id} for i in range(1000)]
+            )
+            session.execute(text('ANALYZE unit'))
+
+        yield mall
+
+    def test_get_does_not_scan_units(self, mall_repository, seeded_mall, executed_statements, explain):
+        mall_repository.get(seeded_mall.id)
+
+        selects = [
+            (statement, parameters) for statement, parameters in executed_statements
+            if statement.lstrip().upper().startswith('SELECT')
+        ]
+        assert selects
+
+        for statement, parameters in selects:
+            assert 'Seq Scan' not in explain(statement, parameters)
+
+    def test_cascade_delete_does_not_scan_units(self, seeded_mall, explain):
+        plan = explain('DELETE FROM unit WHERE mall_id = %(mall_id)s', {'mall_id': seeded_mall.id})
+
+        assert 'Seq Scan' not in plan
+
+
+class TestBulkCreateStream:
+    @pytest.mark.parametrize('commit', ['all', 'chunk'])
+    def test_bulk_create_stream(self, mall_repository, session, account, commit):
+        chunks = [[{'name': f'streamed_mall_{i}_{j}', 'account_id': account.id} for j in range(2)] for i in range(3)]
+
+        result = mall_repository.bulk_create_stream(iter(chunks), commit)
+
+        assert result == {'inserted': 6}
+
+        with session.begin() as session:
+            assert session.query(
+                Mall
+            ).filter(
+                Mall.name.in_(
+                    [mall['name'] for chunk in chunks for mall in chunk]
+                )
+            ).count() == 6
+
+
+class TestBulkUpsert:
+    def test_bulk_upsert(self, mall_repository, session, mall):
+        with session.begin() as session:
+            other_account = Account(name='other_account')
+            session.add(other_account)
+
+        data = {'malls': [
+            {'name': mall.name, 'account_id': other_account.id},
+            {'name': 'upserted_mall', 'account_id': mall.account_id}
+        ]}
+
+        upserted_malls = mall_repository.bulk_upsert(data)['malls']
+
+        assert [mall['name'] for mall in upserted_malls] == [mall['name'] for mall in data['malls']]
+        assert upserted_malls[0]['id'] == mall.id
+
+        with session.begin() as session:
+            assert session.query(Mall).get(mall.id).account_id == other_account.id
+            assert session.query(Mall).get(upserted_malls[1]['id']).name == 'upserted_mall'
+
+    def test_bulk_upsert_without_changes(self, mall_repository, mall):
+        data = {'malls': [{'name': mall.name, 'account_id': mall.account_id}]}
+
+        upserted_malls = mall_repository.bulk_upsert(data)['malls']
+
+        assert upserted_malls == [{'id': mall.id, 'name': mall.name}]
+
+    def test_bulk_upsert_with_nonexistent_account(self, mall_repository):
+        data = {'malls': [{'name': 'orphan_mall', 'account_id': 100000}]}
+
+        with pytest.raises(DoesNotExistException) as exception_info:
+            mall_repository.bulk_upsert(data)
+
+        assert exception_info.value.message == 'Account does not exist!'
+
+
+class TestBulkUpdate:
+    def test_bulk_update(self, mall_repository, session, mall_data):
+        mall = mall_repository.create(mall_data)
+        data = {'malls': [
+            {'id': mall.id, 'name': 'renamed_mall'},
+            {'id': 100000, 'name': 'missing_mall'}
+        ]}
+
+        results = mall_repository.bulk_update(data)['results']
+
+        assert results == [{'id': mall.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Mall).get(mall.id).name == 'renamed_mall'
+
+    def test_bulk_update_with_duplicated_name(self, mall_repository, mall_data):
+        first_mall = mall_repository.create(mall_data)
+
+        second_mall_data = mall_data.copy()
+        second_mall_data.update({'name': 'second_mall_name'})
+        second_mall = mall_repository.create(second_mall_data)
+
+        with pytest.raises(AlreadyExistsException) as exception_info:
+            mall_repository.bulk_update({'malls': [{'id': second_mall.id, 'name': first_mall.name}]})
+
+        assert exception_info.value.message == 'One or more malls already exist!'
+
+
+class TestBulkDelete:
+    def test_bulk_delete(self, mall_repository, session, mall_data):
+        mall = mall_repository.create(mall_data)
+
+        results = mall_repository.bulk_delete([mall.id, 100000])['results']
+
+        assert results == [{'id': mall.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Mall).get(mall.id) is None
@@ -1,6 +1,8 @@
 import pytest
+from sqlalchemy import text
 
-from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.exceptions import AlreadyExistsException, DoesNotExistException, PayloadTooLargeException
+from api.models.mall import Mall
 from api.models.unit import Unit
 
 
@@ -133,6 +135,170 @@ class TestGetList:
             assert retrieved_unit.id == created_units[i + created_units_skip].id
             assert retrieved_unit.name == created_units[i + created_units_skip].name
 
+    def test_get_list_does_not_join_mall(self, unit_repository, unit_data, executed_statements):
+        unit_repository.create(unit_data)
+
+        unit_repository.get_list(1, 20)
+
+        selects = [statement for statement, _ in executed_statements if statement.lstrip().upper().startswith('SELECT')]
+        assert selects
+        assert not any('JOIN' in statement.upper() for statement in selects)
+
+    def test_get_list_with_cursor(self, unit_repository, unit_data):
+        created_units = []
+
+        for i in range(10):
+            unit_data = unit_data.copy()
+            unit_data.update({'name': f'{unit_data["name"]}{i}'})
+
+            created_units.append(
+                unit_repository.create(unit_data)
+            )
+
+        retrieved_units = unit_repository.get_list(1, 4)
+        retrieved_ids = [unit.id for unit in retrieved_units['units']]
+
+        while retrieved_units['next_cursor'] is not None:
+            retrieved_units = unit_repository.get_list(1, 4, retrieved_units['next_cursor'])
+            retrieved_ids += [unit.id for unit in retrieved_units['units']]
+
+        assert retrieved_units['total'] == len(created_units)
+        assert retrieved_ids == [unit.id for unit in created_units]
+
+    @pytest.mark.parametrize('count', ('none', 'estimated'))
+    def test_get_list_with_cheap_count(self, unit_repository, unit_data, count):
+        unit_repository.create(unit_data)
+
+        retrieved_units = unit_repository.get_list(1, 5, count=count)
+
+        assert retrieved_units['total_kind'] == count
+        assert len(retrieved_units['units']) == 1
+        if count == 'none':
+            assert retrieved_units['total'] is None
+        else:
+            assert retrieved_units['total'] >= 0
+
+    def test_exact_count_follows_deletes(self, unit_repository, unit_data):
+        unit = unit_repository.create(unit_data)
+        total = unit_repository.get_list(1, 5)['total']
+
+        unit_repository.delete(unit.id)
+
+        assert unit_repository.get_list(1, 5)['total'] == total - 1
+
+
+class TestGetListByMall:
+    @pytest.fixture(scope='function')
+    def seeded_mall(self, session, mall):
+        with session.begin() as session:
+            session.bulk_insert_mappings(
+                Unit, [{'name': f'seeded_unit_{i}', 'mall_id': mall.id} for i in range(1000)]
+            )
+            session.execute(text('ANALYZE unit'))
+
+        yield mall
+
+    def test_get_list_by_mall(self, unit_repository, seeded_mall):
+        retrieved_units = unit_repository.get_list(1, 20, mall_id=seeded_mall.id)
+        retrieved_ids = [unit.id for unit in retrieved_units['units']]
+
+        while retrieved_units['next_cursor'] is not None:
+            retrieved_units = unit_repository.get_list(1, 20, retrieved_units['next_cursor'], mall_id=seeded_mall.id)
+            retrieved_ids += [unit.id for unit in retrieved_units['units']]
+
+        assert len(retrieved_ids) == retrieved_units['total'] == 1000
+        assert retrieved_ids == sorted(retrieved_ids)
+
+    @pytest.mark.parametrize('count', ('exact', 'estimated'))
+    def test_total_is_read_from_mall(self, unit_repository, seeded_mall, count):
+        retrieved_units = unit_repository.get_list(1, 20, count=count, mall_id=seeded_mall.id)
+
+        assert retrieved_units['total_kind'] == 'exact'
+        assert retrieved_units['total'] == 1000
+
+    def test_page_is_an_index_range(self, unit_repository, seeded_mall, executed_statements, explain):
+        unit_repository.get_list(1, 20, cursor=0, mall_id=seeded_mall.id)
+
+        statement, parameters = next(
+            (statement, parameters) for statement, parameters in executed_statements
+            if statement.lstrip().upper().startswith('SELECT unit.id')
+        )
+        plan = explain(statement, parameters)
+
+        assert 'ix_unit_mall_id_id' in plan
+        assert 'Sort' not in plan
+
+
+class TestSearch:
+    @pytest.fixture(scope='function')
+    def seeded_mall(self, session, mall):
+        names = ['north plaza', 'plaza', 'south plaza annex', 'harbour', '100% plaza']
+        with session.begin() as session:
+            session.bulk_insert_mappings(Unit, [{'name': name, 'mall_id': mall.id} for name in names])
+            session.bulk_insert_mappings(
+                Unit, [{'name': f'filler_unit_{i}', 'mall_id': mall.id} for i in range(1000)]
+            )
+            session.execute(text('ANALYZE unit'))
+
+        yield mall
+
+    def test_matches_are_ranked(self, unit_repository, seeded_mall):
+        retrieved_units = unit_repository.get_list(1, 20, q='PLAZA')
+        names = [unit.name for unit in retrieved_units['units']]
+
+        assert names[0] == 'plaza'
+        assert sorted(names) == ['100% plaza', 'north plaza', 'plaza', 'south plaza annex']
+        assert retrieved_units['total'] == 4
+        assert retrieved_units['next_cursor'] is None
+
+    def test_wildcards_are_literal(self, unit_repository, seeded_mall):
+        retrieved_units = unit_repository.get_list(1, 20, q='0% p')
+
+        assert [unit.name for unit in retrieved_units['units']] == ['100% plaza']
+
+    def test_within_mall(self, unit_repository, seeded_mall, unit_data):
+        retrieved_units = unit_repository.get_list(1, 20, mall_id=seeded_mall.id + 1, q='plaza')
+
+        assert retrieved_units['units'] == []
+        assert retrieved_units['total'] == 0
+
+    def test_estimated_total_is_planned(self, unit_repository, seeded_mall, executed_statements):
+        retrieved_units = unit_repository.get_list(1, 20, count='estimated', q='plaza')
+
+        assert retrieved_units['total_kind'] == 'estimated'
+        assert retrieved_units['total'] >= 1
+        assert not any('count(' in statement.lower() for statement, _ in executed_statements)
+
+    def test_uses_trigram_index(self, unit_repository, seeded_mall, executed_statements, explain):
+        unit_repository.get_list(1, 20, q='harbour')
+
+        statement, parameters = next(
+            (statement, parameters) for statement, parameters in executed_statements
+            if statement.lstrip().upper().startswith('SELECT unit.id')
+        )
+
+        assert 'ix_unit_name_trgm' in explain(statement, parameters)
+
+
+class TestUnitCount:
+    @staticmethod
+    def unit_count(session, mall_id):
+        with session.begin() as session:
+            return session.query(Mall.unit_count).filter_by(id=mall_id).scalar()
+
+    def test_follows_create_and_delete(self, unit_repository, session, unit_data):
+        unit = unit_repository.create(unit_data)
+        assert self.unit_count(session, unit.mall_id) == 1
+
+        unit_repository.delete(unit.id)
+        assert self.unit_count(session, unit.mall_id) == 0
+
+    def test_follows_bulk_create(self, unit_repository, session, mall):
+        unit_repository.bulk_create({'units': [{'name': f'counted_unit_{i}', 'mall_id': mall.id} for i in range(3)]})
+
+        assert self.unit_count(session, mall.id) == 3
+        assert unit_repository.get_list(1, 5, mall_id=mall.id)['total'] == 3
+
 
 class TestBulkCreate:
     def test_bulk_create(self, unit_repository, session, mall):
@@ -155,6 +321,53 @@ class TestBulkCreate:
                 )
             ).count() == len(data['units'])
 
+    def test_bulk_create_with_special_characters(self, unit_repository, session, mall):
+        names = ['with, comma', 'with "quotes"', 'with\nnewline', '']
+        data = {'units': [{'name': name, 'mall_id': mall.id} for name in names]}
+
+        unit_repository.bulk_create(data)
+
+        with session.begin() as session:
+            stored_names = session.query(
+                Unit.name
+            ).filter(
+                Unit.name.in_(names)
+            ).all()
+
+        assert sorted(name for name, in stored_names) == sorted(names)
+
+    def test_bulk_create_returning_ids(self, unit_repository, session, mall, app):
+        app.config['BULK_RETURNING_CHUNK_SIZE'] = 2
+        names = [f'returned_unit_{i}' for i in range(5)]
+        data = {'units': [{'name': name, 'mall_id': mall.id} for name in reversed(names)]}
+
+        try:
+            created_units = unit_repository.bulk_create(data, return_ids=True)['units']
+        finally:
+            app.config['BULK_RETURNING_CHUNK_SIZE'] = None
+
+        assert [unit['name'] for unit in created_units] == list(reversed(names))
+
+        with session.begin() as session:
+            stored_ids = dict(session.query(
+                Unit.name, Unit.id
+            ).filter(
+                Unit.name.in_(names)
+            ).all())
+
+        for unit in created_units:
+            assert unit['id'] == stored_ids[unit['name']]
+
+    def test_bulk_create_skipping_conflicts(self, unit_repository, unit_data):
+        unit_repository.create(unit_data)
+        names = [unit_data['name'], 'new_unit', 'new_unit']
+        data = {'units': [{'name': name, 'mall_id': unit_data['mall_id']} for name in names]}
+
+        result = unit_repository.bulk_create(data, on_conflict='skip')
+
+        assert [unit['name'] for unit in result['units']] == ['new_unit']
+        assert result['skipped'] == [0, 2]
+
     def test_bulk_create_with_duplicated_data(self, unit_repository, mall):
         data = {'units': [{
             'name': 'first_unit',
@@ -170,3 +383,140 @@ class TestBulkCreate:
             unit_repository.bulk_create(data)
 
         assert exception_info.value.message == 'One or more units already exist!'
+
+    @pytest.mark.parametrize('return_ids', [False, True])
+    def test_bulk_create_with_missing_mall(self, unit_repository, mall, return_ids):
+        data = {'units': [{'name': 'orphan_unit', 'mall_id': mall.id + 1}]}
+
+        # COPY and INSERT ... RETURNING report the missing parent the same way
+        with pytest.raises(DoesNotExistException) as exception_info:
+            unit_repository.bulk_create(data, return_ids=return_ids)
+
+        assert exception_info.value.message == 'Mall does not exist!'
+
+
+class TestBulkCreateStream:
+    @pytest.mark.parametrize('commit', ['all', 'chunk'])
+    def test_bulk_create_stream(self, unit_repository, session, mall, commit):
+        chunks = [[{'name': f'streamed_unit_{i}_{j}', 'mall_id': mall.id} for j in range(2)] for i in range(3)]
+
+        result = unit_repository.bulk_create_stream(iter(chunks), commit)
+
+        assert result == {'inserted': 6}
+
+        with session.begin() as session:
+            assert session.query(
+                Unit
+            ).filter(
+                Unit.name.in_(
+                    [unit['name'] for chunk in chunks for unit in chunk]
+                )
+            ).count() == 6
+
+    def test_bulk_create_stream_with_duplicated_name(self, unit_repository, unit_data):
+        unit_repository.create(unit_data)
+        chunks = [[{'name': 'streamed_unit', 'mall_id': unit_data['mall_id']}], [unit_data]]
+
+        with pytest.raises(AlreadyExistsException) as exception_info:
+            unit_repository.bulk_create_stream(iter(chunks), 'chunk')
+
+        assert exception_info.value.message == (
+            'One or more units already exist! 1 units were committed before the failure.'
+        )
+
+    def test_bulk_create_stream_with_too_large_body(self, unit_repository, mall):
+        def chunks():
+            yield [{'name': f'streamed_unit_{i}', 'mall_id': mall.id} for i in range(2)]
+            raise PayloadTooLargeException('Request body is larger than 10 bytes!')
+
+        with pytest.raises(PayloadTooLargeException) as exception_info:
+            unit_repository.bulk_create_stream(chunks(), 'chunk')
+
+        assert exception_info.value.message == (
+            'Request body is larger than 10 bytes! 2 units were committed before the failure.'
+        )
+
+    def test_bulk_create_stream_with_missing_mall(self, unit_repository, mall):
+        chunks = [[{'name': 'streamed_unit', 'mall_id': mall.id + 1}]]
+
+        with pytest.raises(DoesNotExistException, match='Mall does not exist!'):
+            unit_repository.bulk_create_stream(iter(chunks))
+
+
+class TestBulkUpsert:
+    def test_bulk_upsert(self, unit_repository, session, unit_data, mall):
+        unit = unit_repository.create(unit_data)
+
+        with session.begin() as session:
+            other_mall = Mall(name='other_mall', account_id=mall.account_id)
+            session.add(other_mall)
+
+        data = {'units': [
+            {'name': unit.name, 'mall_id': other_mall.id},
+            {'name': 'upserted_unit', 'mall_id': unit.mall_id}
+        ]}
+
+        upserted_units = unit_repository.bulk_upsert(data)['units']
+
+        assert [unit['name'] for unit in upserted_units] == [unit['name'] for unit in data['units']]
+        assert upserted_units[0]['id'] == unit.id
+
+        with session.begin() as session:
+            assert session.query(Unit).get(unit.id).mall_id == other_mall.id
+            assert session.query(Unit).get(upserted_units[1]['id']).name == 'upserted_unit'
+
+    def test_bulk_upsert_without_changes(self, unit_repository, unit_data):
+        unit = unit_repository.create(unit_data)
+        data = {'units': [{'name': unit.name, 'mall_id': unit.mall_id}]}
+
+        upserted_units = unit_repository.bulk_upsert(data)['units']
+
+        assert upserted_units == [{'id': unit.id, 'name': unit.name}]
+
+    def test_bulk_upsert_with_nonexistent_mall(self, unit_repository):
+        data = {'units': [{'name': 'orphan_unit', 'mall_id': 100000}]}
+
+        with pytest.raises(DoesNotExistException) as exception_info:
+            unit_repository.bulk_upsert(data)
+
+        assert exception_info.value.message == 'Mall does not exist!'
+
+
+class TestBulkUpdate:
+    def test_bulk_update(self, unit_repository, session, unit_data):
+        unit = unit_repository.create(unit_data)
+        data = {'units': [
+            {'id': unit.id, 'name': 'renamed_unit'},
+            {'id': 100000, 'name': 'missing_unit'}
+        ]}
+
+        results = unit_repository.bulk_update(data)['results']
+
+        assert results == [{'id': unit.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Unit).get(unit.id).name == 'renamed_unit'
+
+    def test_bulk_update_with_duplicated_name(self, unit_repository, unit_data):
+        first_unit = unit_repository.create(unit_data)
+
+        second_unit_data = unit_data.copy()
+        second_unit_data.update({'name': 'second_unit_name'})
+        second_unit = unit_repository.create(second_unit_data)
+
+        with pytest.raises(AlreadyExistsException) as exception_info:
+            unit_repository.bulk_update({'units': [{'id': second_unit.id, 'name': first_unit.name}]})
+
+        assert exception_info.value.message == 'One or more units already exist!'
+
+
+class TestBulkDelete:
+    def test_bulk_delete(self, unit_repository, session, unit_data):
+        unit = unit_repository.create(unit_data)
+
+        results = unit_repository.bulk_delete([unit.id, 100000])['results']
+
+        assert results == [{'id': unit.id, 'affected': True}, {'id': 100000, 'affected': False}]
+
+        with session.begin() as session:
+            assert session.query(Unit).get(unit.id) is None
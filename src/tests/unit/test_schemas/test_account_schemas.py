@@ -2,9 +2,11 @@ import json
 import marshmallow.exceptions
 import pytest
 
+from api.schemas.base import MultiGetArgsSchema
 from api.schemas.account import (
     AccountCreateSchema,
     AccountListSchema,
+    AccountMultiGetSchema,
     AccountUpdateSchema,
     AccountRetrieveSchema,
     AccountBulkCreateSchema
@@ -198,6 +200,103 @@ class TestAccountListSchema:
 
         schema.dumps(data)
 
+    def test_cursor_round_trip(self):
+        schema = self.schema_class()
+
+        next_cursor = schema.dump({'total': 0, 'accounts': [], 'next_cursor': 42})['next_cursor']
+        data = schema.load({'cursor': next_cursor, 'per_page': 10})
+
+        assert data['cursor'] == 42
+
+    @pytest.mark.parametrize('cursor', ('not-a-cursor', 'eyJpZCI6ICJ4In0'))
+    def test_with_invalid_cursor(self, cursor):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'cursor': cursor})
+
+    def test_with_page_and_cursor(self):
+        schema = self.schema_class()
+        cursor = schema.dump({'next_cursor': 1})['next_cursor']
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'page': 1, 'cursor': cursor})
+
+    def test_with_unknown_count_mode(self):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'count': 'approximate'})
+
+    def test_sorted_cursor_round_trip(self):
+        schema = self.schema_class()
+
+        next_cursor = schema.dump({'total': 0, 'accounts': [], 'next_cursor': (3, 42)})['next_cursor']
+        data = schema.load({'cursor': next_cursor, 'sort': '-mall_count'})
+
+        assert data['cursor'] == (3, 42)
+
+    @pytest.mark.parametrize('cursor, sort', (((3, 42), None), (42, 'mall_count')))
+    def test_with_cursor_of_another_sort(self, cursor, sort):
+        schema = self.schema_class()
+        data = {'cursor': schema.dump({'next_cursor': cursor})['next_cursor']}
+        if sort is not None:
+            data['sort'] = sort
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load(data)
+
+    def test_with_unknown_sort(self):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'sort': 'name'})
+
+    def test_search(self):
+        schema = self.schema_class()
+
+        assert schema.load({'q': 'plaza', 'page': 2})['q'] == 'plaza'
+
+    @pytest.mark.parametrize('data', ({'q': 'pl'}, {'q': 'plaza', 'sort': 'mall_count'}))
+    def test_with_invalid_search(self, data):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load(data)
+
+    def test_search_with_cursor(self):
+        schema = self.schema_class()
+        cursor = schema.dump({'next_cursor': 1})['next_cursor']
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'q': 'plaza', 'cursor': cursor})
+
+
+class TestMultiGetSchema:
+    def test_ids(self):
+        assert MultiGetArgsSchema().load({'ids': '3,1,2'}) == {'ids': [3, 1, 2]}
+
+    def test_names(self):
+        assert MultiGetArgsSchema().load({'names': 'first,second'}) == {'names': ['first', 'second']}
+
+    @pytest.mark.parametrize('data', (
+            {},
+            {'ids': '1', 'names': 'first'},
+            {'ids': 'first'},
+            {'ids': ''},
+            {'ids': ','.join(str(i) for i in range(101))},
+    ))
+    def test_with_invalid_keys(self, data):
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            MultiGetArgsSchema().load(data)
+
+    def test_dump(self):
+        dumped = AccountMultiGetSchema().dump({'accounts': [{'id': 2, 'name': 'account_name'}], 'missing': [5]})
+
+        assert dumped['accounts'][0]['id'] == 2
+        assert 'malls' not in dumped['accounts'][0]
+        assert dumped['missing'] == [5]
+
 
 class TestBulkCreateSchema:
     schema_class = AccountBulkCreateSchema
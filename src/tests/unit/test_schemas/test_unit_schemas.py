@@ -195,6 +195,41 @@ class TestUnitListSchema:
 
         schema.dumps(data)
 
+    def test_cursor_round_trip(self):
+        schema = self.schema_class()
+
+        next_cursor = schema.dump({'total': 0, 'units': [], 'next_cursor': 42})['next_cursor']
+        data = schema.load({'cursor': next_cursor, 'per_page': 10})
+
+        assert data['cursor'] == 42
+
+    @pytest.mark.parametrize('cursor', ('not-a-cursor', 'eyJpZCI6ICJ4In0'))
+    def test_with_invalid_cursor(self, cursor):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'cursor': cursor})
+
+    def test_with_page_and_cursor(self):
+        schema = self.schema_class()
+        cursor = schema.dump({'next_cursor': 1})['next_cursor']
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'page': 1, 'cursor': cursor})
+
+    def test_with_unknown_count_mode(self):
+        schema = self.schema_class()
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'count': 'approximate'})
+
+    def test_with_sorted_cursor(self):
+        schema = self.schema_class()
+        cursor = schema.dump({'next_cursor': (3, 42)})['next_cursor']
+
+        with pytest.raises(marshmallow.exceptions.ValidationError):
+            schema.load({'cursor': cursor})
+
 
 class TestBulkCreateSchema:
     schema_class = UnitBulkCreateSchema
@@ -0,0 +1,50 @@
+import csv
+import io
+
+import pytest
+
+from api.utils.bulk_ingest import CopyStream
+
+
+ROWS = [
+    {'name': 'plain', 'mall_id': 1},
+    {'name': 'with, comma', 'mall_id': 2},
+    {'name': 'with "quotes"\nand newline', 'mall_id': 3},
+    {'name': '', 'mall_id': 4},
+]
+
+
+class TestCopyStream:
+    @pytest.mark.parametrize('size', (1, 7, 8192, -1))
+    def test_read_in_chunks(self, size):
+        stream = CopyStream(ROWS, ('name', 'mall_id'))
+
+        chunks = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        parsed = list(csv.reader(io.StringIO(''.join(chunks)), quoting=csv.QUOTE_NONNUMERIC))
+
+        assert stream.row_count == len(ROWS)
+        assert parsed == [[row['name'], row['mall_id']] for row in ROWS]
+
+    def test_empty_string_is_quoted(self):
+        stream = CopyStream([{'name': ''}], ('name',))
+
+        assert stream.read() == '""\n'
+
+    def test_rows_are_consumed_lazily(self):
+        consumed = []
+
+        def rows():
+            for i in range(100):
+                consumed.append(i)
+                yield {'name': f'name-{i}'}
+
+        stream = CopyStream(rows(), ('name',))
+        stream.read(10)
+
+        assert len(consumed) < 100
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from collections import namedtuple
+
+from api.utils.export import encode_csv, encode_ndjson
+
+
+Row = namedtuple('Row', ('id', 'name', 'mall_id'))
+
+
+class Rows:
+    columns = list(Row._fields)
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+
+CHUNKS = [
+    [Row(1, 'plain', 1), Row(2, 'with, comma', 1)],
+    [Row(3, 'with "quotes"\nand newline', 2)],
+]
+
+
+class TestEncodeNdjson:
+    def test_encode(self):
+        body = ''.join(encode_ndjson(Rows(CHUNKS)))
+
+        assert [json.loads(line) for line in body.splitlines()] == [
+            row._asdict() for chunk in CHUNKS for row in chunk
+        ]
+
+    def test_one_piece_per_chunk(self):
+        assert len(list(encode_ndjson(Rows(CHUNKS)))) == len(CHUNKS)
+
+
+class TestEncodeCsv:
+    def test_encode(self):
+        body = ''.join(encode_csv(Rows(CHUNKS)))
+
+        assert list(csv.reader(io.StringIO(body))) == [Rows.columns] + [
+            [str(value) for value in row] for chunk in CHUNKS for row in chunk
+        ]
+
+    def test_header_without_rows(self):
+        assert list(encode_csv(Rows([]))) == ['id,name,mall_id\n']
@@ -0,0 +1,42 @@
+import pytest
+from psycopg2 import errorcodes
+from sqlalchemy.exc import IntegrityError
+
+from api.exceptions import AlreadyExistsException, DoesNotExistException
+from api.utils.integrity import integrity_exception
+
+
+class DriverError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def violation(pgcode) -> IntegrityError:
+    return IntegrityError('INSERT INTO unit ...', {}, DriverError(pgcode))
+
+
+class TestIntegrityException:
+    def test_unique_violation(self):
+        exception = integrity_exception(violation(errorcodes.UNIQUE_VIOLATION), 'Unit already exists!')
+
+        assert isinstance(exception, AlreadyExistsException)
+        assert exception.message == 'Unit already exists!'
+
+    def test_foreign_key_violation(self):
+        exception = integrity_exception(
+            violation(errorcodes.FOREIGN_KEY_VIOLATION), 'Unit already exists!', 'Mall does not exist!'
+        )
+
+        assert isinstance(exception, DoesNotExistException)
+        assert exception.message == 'Mall does not exist!'
+
+    @pytest.mark.parametrize('pgcode, missing_parent', [
+        (errorcodes.FOREIGN_KEY_VIOLATION, None),
+        (errorcodes.NOT_NULL_VIOLATION, 'Mall does not exist!'),
+        (None, 'Mall does not exist!'),
+    ])
+    def test_other_violations_are_kept(self, pgcode, missing_parent):
+        error = violation(pgcode)
+
+        assert integrity_exception(error, 'Unit already exists!', missing_parent) is error
@@ -0,0 +1,28 @@
+from collections import namedtuple
+
+from api.utils.multi_get import in_requested_order
+
+
+Row = namedtuple('Row', ('id', 'name'))
+
+ROWS = [Row(1, 'first'), Row(2, 'second'), Row(3, 'third')]
+
+
+class TestInRequestedOrder:
+    def test_keeps_requested_order(self):
+        rows, missing = in_requested_order(ROWS, [3, 1, 2], 'id')
+
+        assert [row.id for row in rows] == [3, 1, 2]
+        assert missing == []
+
+    def test_reports_missing(self):
+        rows, missing = in_requested_order(ROWS, ['fourth', 'second', 'zeroth'], 'name')
+
+        assert rows == [ROWS[1]]
+        assert missing == ['fourth', 'zeroth']
+
+    def test_duplicates_answered_once(self):
+        rows, missing = in_requested_order(ROWS, [2, 4, 2, 1, 4], 'id')
+
+        assert [row.id for row in rows] == [2, 1]
+        assert missing == [4]
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+from marshmallow import Schema, fields
+
+from api.exceptions import PayloadTooLargeException, ValidationException
+from api.utils import ndjson
+from api.utils.ndjson import iter_ndjson, load_in_chunks
+
+
+class RecordSchema(Schema):
+    name = fields.String(required=True)
+
+
+class TestIterNdjson:
+    @pytest.mark.parametrize('read_size', (1, 5, 64 * 1024))
+    def test_lines_split_across_reads(self, monkeypatch, read_size):
+        monkeypatch.setattr(ndjson, 'READ_SIZE', read_size)
+        body = b'{"name": "first"}\n\n{"name": "second"}\n{"name": "third"}'
+
+        records = list(iter_ndjson(io.BytesIO(body), len(body)))
+
+        assert records == [(1, {'name': 'first'}), (3, {'name': 'second'}), (4, {'name': 'third'})]
+
+    def test_invalid_json(self):
+        body = b'{"name": "first"}\n{"name": '
+
+        with pytest.raises(ValidationException, match='Line 2: invalid JSON!'):
+            list(iter_ndjson(io.BytesIO(body), len(body)))
+
+    def test_not_an_object(self):
+        body = b'["name"]\n'
+
+        with pytest.raises(ValidationException, match='Line 1: expected a JSON object!'):
+            list(iter_ndjson(io.BytesIO(body), len(body)))
+
+    def test_too_large_body(self):
+        body = b'{"name": "first"}\n'
+
+        with pytest.raises(PayloadTooLargeException):
+            list(iter_ndjson(io.BytesIO(body), len(body) - 1))
+
+
+    @pytest.mark.parametrize('read_size', (4, 64 * 1024))
+    def test_too_long_line(self, monkeypatch, read_size):
+        monkeypatch.setattr(ndjson, 'READ_SIZE', read_size)
+        body = b'{"name": "first"}\n{"name": "' + b'x' * 64 + b'"}\n{"name": "third"}\n'
+
+        with pytest.raises(PayloadTooLargeException, match='Line 2: longer than 32 bytes!'):
+            list(iter_ndjson(io.BytesIO(body), len(body), max_line_size=32))
+
+
+class TestLoadInChunks:
+    def test_chunks(self):
+        records = [(i + 1, {'name': f'name_{i}'}) for i in range(5)]
+
+        chunks = list(load_in_chunks(records, RecordSchema(), 2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [row['name'] for chunk in chunks for row in chunk] == [f'name_{i}' for i in range(5)]
+
+    def test_invalid_record_reports_its_line(self):
+        records = [(1, {'name': 'valid'}), (3, {'name': 1})]
+
+        with pytest.raises(ValidationException, match='Line 3'):
+            list(load_in_chunks(records, RecordSchema(), 10))
+
+    def test_chunks_are_loaded_lazily(self):
+        consumed = []
+
+        def records():
+            for i in range(10):
+                consumed.append(i)
+                yield i + 1, {'name': f'name_{i}'}
+
+        next(load_in_chunks(records(), RecordSchema(), 2))
+
+        assert len(consumed) == 2
@@ -0,0 +1,111 @@
+import pytest
+from flask import Flask, Response, stream_with_context
+from flask_restful import Api, Resource
+from sqlalchemy import create_engine, text
+
+from api.utils.query_budget import (
+    QueryBudgetExceeded, budget_chunks, query_budget, track_query_budgets, QUERY_BUDGET_RAISE, QUERY_BUDGET_WARN
+)
+
+
+@pytest.fixture(scope='module')
+def engine():
+    yield create_engine('sqlite://')
+
+
+@pytest.fixture(scope='module')
+def flask_app(engine):
+    class NodesResource(Resource):
+        @query_budget(2)
+        def get(self, count: int):
+            with engine.connect() as connection:
+                for i in range(count):
+                    connection.execute(text('SELECT :i'), {'i': i})
+
+            return {}
+
+    class ChunksResource(Resource):
+        @query_budget(2)
+        def get(self, count: int):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 0'))
+                for i in budget_chunks(range(count)):
+                    connection.execute(text('SELECT :i'), {'i': i})
+
+            return {}
+
+    class StreamResource(Resource):
+        @query_budget(2)
+        def get(self, count: int):
+            def body():
+                with engine.connect() as connection:
+                    for i in range(count):
+                        yield str(connection.execute(text('SELECT :i'), {'i': i}).scalar())
+
+            return Response(stream_with_context(body()))
+
+    flask_app = Flask(__name__)
+    flask_app.config.update({'TESTING': True, 'QUERY_REPEAT_THRESHOLD': 3})
+
+    api = Api(flask_app)
+    api.add_resource(NodesResource, '/nodes/<int:count>')
+    api.add_resource(ChunksResource, '/chunks/<int:count>')
+    api.add_resource(StreamResource, '/stream/<int:count>')
+
+    track_query_budgets(flask_app, [engine])
+
+    return flask_app
+
+
+@pytest.fixture
+def client(flask_app):
+    flask_app.config['QUERY_BUDGET_MODE'] = QUERY_BUDGET_RAISE
+    yield flask_app.test_client()
+
+
+class TestQueryBudget:
+    def test_query_count_header(self, client):
+        response = client.get('/nodes/2')
+
+        assert response.headers['X-Query-Count'] == '2'
+
+    def test_budget_exceeded(self, client):
+        with pytest.raises(QueryBudgetExceeded, match='3 queries, the budget is 2'):
+            client.get('/nodes/3')
+
+    def test_repeated_statement(self, client, flask_app):
+        flask_app.config['QUERY_REPEAT_THRESHOLD'] = 2
+        try:
+            with pytest.raises(QueryBudgetExceeded, match=r'N\+1: 2 x SELECT'):
+                client.get('/nodes/2')
+        finally:
+            flask_app.config['QUERY_REPEAT_THRESHOLD'] = 3
+
+    def test_warn_mode_only_logs(self, client, flask_app, caplog):
+        flask_app.config['QUERY_BUDGET_MODE'] = QUERY_BUDGET_WARN
+
+        response = client.get('/nodes/3')
+
+        assert response.status_code == 200
+        assert '3 queries, the budget is 2' in caplog.text
+
+    def test_statements_outside_requests_are_ignored(self, client, engine):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        assert client.get('/nodes/0').headers['X-Query-Count'] == '0'
+
+    def test_chunks_after_the_first_are_free(self, client):
+        response = client.get('/chunks/5')
+
+        assert response.status_code == 200
+        assert response.headers['X-Query-Count'] == '6'
+
+    def test_streamed_body_within_budget(self, client):
+        assert client.get('/stream/2').data == b'01'
+
+    def test_streamed_body_is_checked(self, client):
+        response = client.get('/stream/3')
+
+        with pytest.raises(QueryBudgetExceeded, match='3 queries, the budget is 2'):
+            response.get_data()
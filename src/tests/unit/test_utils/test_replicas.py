@@ -0,0 +1,134 @@
+import time
+
+import pytest
+from flask import Flask, Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from api.aio.replicas import StickToPrimaryMiddleware
+from api.utils.replicas import (
+    is_sticky_to_primary,
+    read_only,
+    stick_to_primary,
+    sticky_until,
+    RoutingSession,
+    STICKY_COOKIE
+)
+
+
+@pytest.fixture(scope='module')
+def flask_app():
+    return Flask(__name__)
+
+
+@pytest.fixture(scope='module')
+def primary():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE node (name VARCHAR)"))
+        connection.execute(text("INSERT INTO node VALUES ('primary')"))
+
+    yield engine
+
+
+@pytest.fixture(scope='module')
+def replica():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE node (name VARCHAR)"))
+        connection.execute(text("INSERT INTO node VALUES ('replica')"))
+
+    yield engine
+
+
+@pytest.fixture(scope='module')
+def session(primary, replica):
+    yield sessionmaker(primary, class_=RoutingSession, replicas=[replica], expire_on_commit=False)
+
+
+def node(session):
+    return session.execute(text('SELECT name FROM node')).scalar()
+
+
+class TestRoutingSession:
+    def test_read_only_goes_to_replica(self, session):
+        with read_only(session) as session:
+            assert node(session) == 'replica'
+
+    def test_write_goes_to_primary(self, session):
+        with session.begin() as session:
+            assert node(session) == 'primary'
+
+    def test_sticky_client_reads_from_primary(self, flask_app, session):
+        with flask_app.test_request_context(headers={'Cookie': f'{STICKY_COOKIE}={time.time() + 5}'}):
+            with read_only(session) as session:
+                assert node(session) == 'primary'
+
+    def test_expired_sticky_window(self, flask_app, session):
+        with flask_app.test_request_context(headers={'Cookie': f'{STICKY_COOKIE}={time.time() - 1}'}):
+            with read_only(session) as session:
+                assert node(session) == 'replica'
+
+    def test_sticky_without_flask_request(self, session):
+        token = sticky_until.set(time.time() + 5)
+        try:
+            with read_only(session) as session:
+                assert node(session) == 'primary'
+        finally:
+            sticky_until.reset(token)
+
+    def test_without_replicas(self, primary):
+        with read_only(sessionmaker(primary, class_=RoutingSession)) as session:
+            assert node(session) == 'primary'
+
+
+class TestStickToPrimary:
+    @pytest.mark.parametrize('method, status, is_sticky', [
+        ('POST', 201, True),
+        ('DELETE', 204, True),
+        ('POST', 400, False),
+        ('GET', 200, False),
+    ])
+    def test_cookie(self, flask_app, method, status, is_sticky):
+        with flask_app.test_request_context(method=method):
+            response = stick_to_primary(Response(status=status))
+
+        assert any(STICKY_COOKIE in cookie for cookie in response.headers.getlist('Set-Cookie')) == is_sticky
+
+
+class TestStickToPrimaryMiddleware:
+    @pytest.fixture
+    def asgi_client(self):
+        async def endpoint(request):
+            return JSONResponse({'is_sticky': is_sticky_to_primary()}, status_code=int(request.query_params['status']))
+
+        app = Starlette(
+            routes=[Route('/', endpoint, methods=['GET', 'POST'])],
+            middleware=[Middleware(StickToPrimaryMiddleware)]
+        )
+        app.state.config = {'REPLICA_STICKY_SECONDS': '5'}
+
+        with TestClient(app) as asgi_client:
+            yield asgi_client
+
+    @pytest.mark.parametrize('method, status, is_sticky', [
+        ('POST', 201, True),
+        ('POST', 400, False),
+        ('GET', 200, False),
+    ])
+    def test_cookie(self, asgi_client, method, status, is_sticky):
+        response = asgi_client.request(method, f'/?status={status}')
+
+        assert (STICKY_COOKIE in response.cookies) == is_sticky
+
+    def test_sticky_client_reads_from_primary(self, asgi_client):
+        assert asgi_client.get('/?status=200').json() == {'is_sticky': False}
+
+        asgi_client.post('/?status=201')
+
+        assert asgi_client.get('/?status=200').json() == {'is_sticky': True}
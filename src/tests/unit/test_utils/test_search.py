@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+
+from api.utils.search import like_pattern, name_matches
+
+
+NAMES = ['North plaza', 'plaza', '100% plaza', '100 plaza', 'snake_case', 'snakecase', 'a/b']
+
+metadata = MetaData()
+node_table = Table('node', metadata, Column('id', Integer, primary_key=True), Column('name', String))
+
+
+@pytest.fixture(scope='module')
+def engine():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(node_table), [{'name': name} for name in NAMES])
+
+    yield engine
+
+
+class TestLikePattern:
+    @pytest.mark.parametrize('q, pattern', [
+        ('plaza', '%plaza%'),
+        ('100%', '%100/%%'),
+        ('snake_case', '%snake/_case%'),
+        ('a/b', '%a//b%'),
+    ])
+    def test_pattern(self, q, pattern):
+        assert like_pattern(q) == pattern
+
+
+class TestNameMatches:
+    @pytest.mark.parametrize('q, names', [
+        ('PLAZA', ['North plaza', 'plaza', '100% plaza', '100 plaza']),
+        ('100%', ['100% plaza']),
+        ('e_c', ['snake_case']),
+        ('a/b', ['a/b']),
+    ])
+    def test_matches(self, engine, q, names):
+        with engine.connect() as connection:
+            matched = connection.execute(
+                select(node_table.c.name).where(name_matches(node_table.c.name, q)).order_by(node_table.c.id)
+            ).scalars().all()
+
+        assert matched == names
@@ -0,0 +1,28 @@
+from sqlalchemy import create_engine, lambda_stmt, literal_column, select
+
+from api.utils.statement_cache import StatementCacheStats, track_statement_cache
+
+
+class TestStatementCacheStats:
+    def test_hits_and_misses(self):
+        engine = create_engine('sqlite://')
+        stats = StatementCacheStats()
+        track_statement_cache(engine, stats)
+
+        with engine.connect() as connection:
+            for value in range(3):
+                statement = lambda_stmt(lambda: select(literal_column('1')))
+                statement += lambda s: s.where(literal_column('1') != value)
+
+                connection.execute(statement)
+
+        assert (stats.hits, stats.misses) == (2, 1)
+        assert stats.hit_ratio == 2 / 3
+
+    def test_reset(self):
+        stats = StatementCacheStats()
+        stats.hits, stats.misses = 5, 1
+
+        stats.reset()
+
+        assert (stats.hits, stats.misses, stats.hit_ratio) == (0, 0, 0.0)
@@ -0,0 +1,115 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from api.utils.telemetry import QueryTelemetry, fingerprint, track_query_telemetry
+
+
+@pytest.fixture(scope='module')
+def engine():
+    yield create_engine('sqlite://')
+
+
+@pytest.fixture(scope='module')
+def flask_app(engine):
+    flask_app = Flask(__name__)
+    flask_app.config['TESTING'] = True
+
+    @flask_app.route('/nodes')
+    def nodes():
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT :value'), {'value': 2})
+
+        return {}
+
+    flask_app.config.update({'QUERY_SAMPLE_RATE': 1, 'QUERY_SLOW_THRESHOLD_MS': 1000})
+    track_query_telemetry(flask_app, [engine])
+
+    return flask_app
+
+
+@pytest.fixture
+def telemetry(flask_app):
+    telemetry = flask_app.extensions['query_telemetry']
+    telemetry.reset()
+
+    yield telemetry
+
+    telemetry.sample_rate = 1
+    telemetry.slow_threshold_ms = 1000
+
+
+@pytest.fixture
+def client(flask_app, telemetry):
+    yield flask_app.test_client()
+
+
+class TestFingerprint:
+    @pytest.mark.parametrize('statement, expected', [
+        ("SELECT * FROM account WHERE name = 'x' AND id > 10", 'SELECT * FROM account WHERE name = ? AND id > ?'),
+        (
+            'SELECT account.id\n  FROM account\n WHERE account.id = %(id_1)s',
+            'SELECT account.id FROM account WHERE account.id = ?'
+        ),
+        (
+            'DELETE FROM unit WHERE unit.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)',
+            'DELETE FROM unit WHERE unit.id IN (?, ...)'
+        ),
+        (
+            'INSERT INTO mall (name, account_id) VALUES '
+            '(%(name_m0)s, %(account_id_m0)s), (%(name_m1)s, %(account_id_m1)s), (%(name_m2)s, %(account_id_m2)s)',
+            'INSERT INTO mall (name, account_id) VALUES (?, ...), ...'
+        ),
+    ])
+    def test_fingerprint(self, statement, expected):
+        assert fingerprint(statement) == expected
+
+    def test_identifiers_with_digits_are_kept(self):
+        assert fingerprint('SELECT col1 FROM t2') == 'SELECT col1 FROM t2'
+
+
+class TestQueryTelemetry:
+    def test_sampled_request(self, client, telemetry):
+        client.get('/nodes')
+
+        snapshot = telemetry.snapshot()
+
+        assert [statement['fingerprint'] for statement in snapshot['statements']] == ['SELECT ?']
+        assert snapshot['statements'][0]['count'] == 2
+        assert snapshot['endpoints']['GET nodes']['count'] == 1
+        assert sum(snapshot['endpoints']['GET nodes']['buckets_ms'].values()) == 1
+
+    def test_unsampled_request(self, client, telemetry):
+        telemetry.sample_rate = 0
+
+        client.get('/nodes')
+
+        assert telemetry.snapshot() == {'statements': [], 'endpoints': {}}
+
+    def test_slow_query_is_logged(self, client, telemetry, caplog):
+        telemetry.sample_rate = 0
+        telemetry.slow_threshold_ms = 0
+
+        client.get('/nodes')
+
+        assert 'Slow query' in caplog.text
+        assert 'SELECT ?' in caplog.text
+
+    def test_fast_query_is_not_logged(self, client, caplog):
+        client.get('/nodes')
+
+        assert 'Slow query' not in caplog.text
+
+    def test_histogram_buckets(self):
+        telemetry = QueryTelemetry()
+
+        for duration_ms in (1, 5, 6, 30, 10000):
+            telemetry.record_request('GET nodes', duration_ms)
+
+        buckets = telemetry.snapshot()['endpoints']['GET nodes']['buckets_ms']
+
+        assert buckets['5'] == 2
+        assert buckets['10'] == 1
+        assert buckets['50'] == 1
+        assert buckets['inf'] == 1
@@ -0,0 +1,67 @@
+import json
+from collections import namedtuple
+
+import pytest
+
+from api.utils.tree import encode_tree
+
+
+MallRow = namedtuple('MallRow', ('mall_id', 'mall_name'))
+UnitRow = namedtuple('UnitRow', ('mall_id', 'mall_name', 'unit_id', 'unit_name'))
+
+ACCOUNT = {'id': 1, 'name': 'account'}
+
+UNIT_CHUNKS = [
+    [UnitRow(1, 'first', 1, 'a'), UnitRow(1, 'first', 2, 'b')],
+    [UnitRow(1, 'first', 3, 'c'), UnitRow(2, 'empty', None, None), UnitRow(3, 'last', 4, 'd')],
+]
+
+
+def decode(account, rows, max_nodes=100):
+    return json.loads(''.join(encode_tree(account, rows, max_nodes)))
+
+
+class TestEncodeTree:
+    def test_units(self):
+        assert decode(ACCOUNT, UNIT_CHUNKS) == {
+            **ACCOUNT,
+            'malls': [
+                {'id': 1, 'name': 'first', 'units': [
+                    {'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}
+                ]},
+                {'id': 2, 'name': 'empty', 'units': []},
+                {'id': 3, 'name': 'last', 'units': [{'id': 4, 'name': 'd'}]},
+            ],
+            'truncated': False
+        }
+
+    def test_malls(self):
+        assert decode(ACCOUNT, [[MallRow(1, 'first'), MallRow(2, 'second')]]) == {
+            **ACCOUNT,
+            'malls': [{'id': 1, 'name': 'first'}, {'id': 2, 'name': 'second'}],
+            'truncated': False
+        }
+
+    def test_account_only(self):
+        assert decode(ACCOUNT, None) == {**ACCOUNT, 'truncated': False}
+
+    @pytest.mark.parametrize('rows', [[], [[]]])
+    def test_without_malls(self, rows):
+        assert decode(ACCOUNT, rows) == {**ACCOUNT, 'malls': [], 'truncated': False}
+
+    @pytest.mark.parametrize('max_nodes, units', [(1, [0]), (3, [2]), (4, [3]), (5, [3, 0]), (7, [3, 0, 1])])
+    def test_max_nodes(self, max_nodes, units):
+        tree = decode(ACCOUNT, UNIT_CHUNKS, max_nodes)
+
+        assert [len(mall['units']) for mall in tree['malls']] == units
+        assert tree['truncated'] is (max_nodes < 7)
+
+    def test_stops_reading_when_truncated(self):
+        chunks = iter(UNIT_CHUNKS)
+
+        decode(ACCOUNT, chunks, max_nodes=2)
+
+        assert next(chunks) == UNIT_CHUNKS[1]
+
+    def test_one_piece_per_chunk(self):
+        assert len(list(encode_tree(ACCOUNT, UNIT_CHUNKS, 100))) == len(UNIT_CHUNKS) + 2